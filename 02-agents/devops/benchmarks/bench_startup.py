@@ -0,0 +1,173 @@
+"""Cold-start time of the DevOps agent: boot and time to first task.
+
+Each run is a fresh interpreter, as in a scale-to-zero container. It imports
+``xpander_handler`` (with the xpander decorators replaced so no event
+listener starts), runs the ``@on_boot`` hook, then serves two tasks through
+the real handler with a scripted model that calls one tool on every MCP
+server. The AWS MCP servers are replaced by local stdio stubs that take
+``--mcp-delay`` seconds to start (one per server, like ``uvx``). Three
+startups are compared:
+
+- ``baseline``: boot enters one ``MultiMCPTools`` for all servers, as the
+  handler did before ``mcp_pool.py``, so the servers start one after another
+- ``prewarm``: boot starts the pool in the background (the default)
+- ``lazy``: ``MCP_PREWARM=false``, the first task starts the pool
+
+Times are measured from process launch, except the first task's latency,
+which starts when the task arrives. ``--idle`` inserts a pause between boot
+and the first task, as when a worker waits for work after starting. Each run
+also scrapes ``devops_mcp_server_ready`` after the tasks. Run from the
+devops directory:
+
+    python -m benchmarks.bench_startup --runs 3 --mcp-delay 1,1.5,2 --idle 1
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--runs", type=int, default=3)
+parser.add_argument("--mcp-delay", default="1,1.5,2", help="startup seconds of each stub MCP server, comma-separated")
+parser.add_argument("--idle", type=float, default=0.0,
+                    help="seconds between boot and the first task (left out of the times)")
+parser.add_argument("--modes", default="baseline,prewarm,lazy")
+parser.add_argument("--mode", help=argparse.SUPPRESS)
+args = parser.parse_args()
+
+PHASES = ("import", "boot", "first_task", "second_task", "first_task_latency")
+LABELS = {
+    "import": "handler imported",
+    "boot": "boot hook done",
+    "first_task": "first task done",
+    "second_task": "second task done",
+    "first_task_latency": "first task latency",
+}
+
+
+def _passthrough(fn=None, **kwargs):
+    return fn if fn is not None else (lambda f: f)
+
+
+def child(mode):
+    launched = float(os.environ["BENCH_LAUNCHED_AT"])
+    marks, excluded = {}, 0.0
+
+    def mark(phase):
+        marks[phase] = time.time() - launched - excluded
+
+    import xpander_sdk
+    xpander_sdk.on_task = xpander_sdk.on_boot = _passthrough
+    import xpander_handler
+    mark("import")
+
+    # Benchmark scaffolding, not part of the agent's own startup.
+    helpers_started = time.time()
+    from datetime import datetime, timezone
+
+    from loguru import logger
+    from xpander_sdk import Configuration, Task
+    from xpander_sdk.modules.tasks.models.task import AgentExecutionInput
+
+    from benchmarks.fake_model import FakeModel, plan_message
+    from metrics import REGISTRY
+    logger.remove()
+
+    servers = list(xpander_handler.mcp_pool.servers.values())
+    delays = [float(d) for d in args.mcp_delay.split(",")]
+    for server, delay in zip(servers, delays + delays[-1:] * len(servers)):
+        server.command = f"{sys.executable} -m benchmarks.stub_mcp_server --name {server.name} --delay {delay}"
+
+    class FakeAgentCache:
+        async def aget_args(self, task, **kwargs):
+            return {"name": "devops-agent", "model": FakeModel(), "instructions": "", "tools": []}
+
+    xpander_handler.agent_cache = FakeAgentCache()
+    configuration = Configuration(api_key="offline", organization_id="startup")
+    calls = [{"tool": f"{server.name.replace('-', '_')}_status", "args": {}} for server in servers]
+    tasks = [
+        Task(id=f"task-{i}", agent_id="devops-agent", organization_id="startup",
+             created_at=datetime.now(timezone.utc), configuration=configuration,
+             input=AgentExecutionInput(text=plan_message("How many EKS clusters do I have?", calls)))
+        for i in range(2)
+    ]
+    excluded += time.time() - helpers_started
+
+    async def baseline_boot():
+        from agno.tools.mcp import MultiMCPTools
+
+        multi = MultiMCPTools(commands=[server.command for server in servers], env=xpander_handler.MCP_ENV,
+                              timeout_seconds=300)
+        await multi.__aenter__()
+
+        class Connected:
+            async def get_tools(self):
+                return [multi]
+
+            def metrics(self):
+                return {}
+
+        xpander_handler.mcp_pool = Connected()
+
+    async def run():
+        nonlocal excluded
+        if mode == "baseline":
+            await baseline_boot()
+        else:
+            xpander_handler.MCP_PREWARM = mode == "prewarm"
+            await xpander_handler.initialize_mcp()
+        mark("boot")
+        await asyncio.sleep(args.idle)
+        excluded += args.idle
+        for phase, task in zip(("first_task", "second_task"), tasks):
+            task = await xpander_handler.my_agent_handler(task)
+            if len(task.used_tools) != len(servers):
+                raise RuntimeError(f"task used {task.used_tools}: {task.result}")
+            mark(phase)
+        marks["first_task_latency"] = marks["first_task"] - marks["boot"]
+        marks["mcp_ready"] = sum(
+            float(line.rsplit(" ", 1)[1]) for line in REGISTRY.render().splitlines()
+            if line.startswith("devops_mcp_server_ready{")
+        )
+
+    asyncio.run(run())
+    print(json.dumps(marks), flush=True)
+    os._exit(0)  # skip teardown; the MCP servers die with the process
+
+
+def launch(mode):
+    env = dict(os.environ, DEVOPS_METRICS_PORT="0", AGNO_TELEMETRY="false",
+               PROD_AWS_ACCESS_KEY_ID="stub", PROD_AWS_SECRET_ACCESS_KEY="stub", AWS_REGION="us-west-2",
+               BENCH_LAUNCHED_AT=repr(time.time()))
+    command = [sys.executable, "-m", "benchmarks.bench_startup", "--mode", mode,
+               "--mcp-delay", args.mcp_delay, "--idle", str(args.idle)]
+    proc = subprocess.run(command, env=env, capture_output=True, text=True)
+    if proc.returncode:
+        sys.exit(proc.stderr[-4000:])
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    if args.mode:
+        child(args.mode)
+        return
+
+    modes = args.modes.split(",")
+    runs = {mode: [launch(mode) for _ in range(args.runs)] for mode in modes}
+    print(f"{args.runs} cold starts per mode, stub MCP servers starting in {args.mcp_delay}s, "
+          f"idle {args.idle:g}s before the first task; median seconds:")
+    print(f"  {'':<22}" + "".join(f"{mode:>10}" for mode in modes))
+    for phase in PHASES:
+        medians = [sorted(run[phase] for run in runs[mode])[args.runs // 2] for mode in modes]
+        print(f"  {LABELS[phase]:<22}" + "".join(f"{value:10.2f}" for value in medians))
+    for mode in modes:
+        if mode != "baseline":
+            ready = min(run["mcp_ready"] for run in runs[mode])
+            print(f"  {mode}: devops_mcp_server_ready sums to {ready:g} after the tasks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Stdio MCP server standing in for the AWS servers in benchmarks.
+
+Sleeps ``--delay`` seconds before serving, as ``uvx`` does while it resolves
+and starts a server, then exposes one ``<name>_status`` tool.
+
+    python -m benchmarks.stub_mcp_server --name eks --delay 1.5
+"""
+import argparse
+import time
+
+from mcp.server.fastmcp import FastMCP
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--name", required=True)
+parser.add_argument("--delay", type=float, default=1.0)
+args = parser.parse_args()
+
+time.sleep(args.delay)
+server = FastMCP(args.name)
+
+
+@server.tool(name=f"{args.name.replace('-', '_')}_status")
+def status() -> str:
+    """Report that the server is up."""
+    return f"{args.name} ok"
+
+
+if __name__ == "__main__":
+    server.run()
@@ -0,0 +1,188 @@
+import asyncio
+import os
+import time
+
+from loguru import logger
+
+from metrics import REGISTRY
+
+MCP_READY_TIMEOUT = float(os.environ.get("MCP_READY_TIMEOUT", "300"))
+MCP_HEALTH_INTERVAL = float(os.environ.get("MCP_HEALTH_INTERVAL", "30"))
+MCP_HEALTH_TIMEOUT = float(os.environ.get("MCP_HEALTH_TIMEOUT", "10"))
+MCP_MAX_BACKOFF = float(os.environ.get("MCP_MAX_BACKOFF", "60"))
+
+MCP_SERVER_READY = REGISTRY.gauge("devops_mcp_server_ready", "1 while the MCP server is connected", ("server",))
+MCP_STARTUP_SECONDS = REGISTRY.gauge("devops_mcp_startup_seconds", "Duration of the last MCP server startup", ("server",))
+MCP_HEALTH_SECONDS = REGISTRY.gauge("devops_mcp_health_check_seconds", "Latency of the last MCP ping", ("server",))
+MCP_RESTARTS = REGISTRY.counter("devops_mcp_restarts_total", "MCP server restarts", ("server",))
+MCP_FAILURES = REGISTRY.counter("devops_mcp_failures_total", "MCP server connections that failed", ("server",))
+
+
+def _or_nan(value, scale=1):
+    return value * scale if value is not None else float("nan")
+
+
+class MCPServer:
+    """One supervised MCP server.
+
+    A dedicated task owns the connection for its whole life (the MCP stdio
+    client must be entered and exited from the same task), pings it
+    periodically and reconnects with exponential backoff when it dies.
+    """
+
+    def __init__(self, name, command, env=None, timeout_seconds=MCP_READY_TIMEOUT):
+        self.name = name
+        self.command = command
+        self.env = env
+        self.timeout_seconds = int(timeout_seconds)
+        self.state = "stopped"
+        self.tools = None
+        self.ready = asyncio.Event()
+        self.starts = 0
+        self.restarts = 0
+        self.failures = 0
+        self.startup_seconds = None
+        self.last_health_ms = None
+        self.last_error = None
+        self._runner = None
+        self._stopping = False
+        self._stop = asyncio.Event()
+        # Computed on scrape from the fields above
+        MCP_SERVER_READY.labels(name).set_function(lambda: float(self.state == "ready"))
+        MCP_STARTUP_SECONDS.labels(name).set_function(lambda: _or_nan(self.startup_seconds))
+        MCP_HEALTH_SECONDS.labels(name).set_function(lambda: _or_nan(self.last_health_ms, 1 / 1000))
+        MCP_RESTARTS.labels(name).set_function(lambda: self.restarts)
+        MCP_FAILURES.labels(name).set_function(lambda: self.failures)
+
+    def start(self):
+        if self._runner is None or self._runner.done():
+            self._stopping = False
+            self._stop.clear()
+            self._runner = asyncio.create_task(self._supervise(), name=f"mcp-{self.name}")
+
+    async def _health_loop(self, tools):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=MCP_HEALTH_INTERVAL)
+                return
+            except asyncio.TimeoutError:
+                pass
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(tools.session.send_ping(), timeout=MCP_HEALTH_TIMEOUT)
+            except Exception as e:
+                self.last_error = f"health check failed: {e!r}"
+                logger.warning(f"💔 MCP server '{self.name}' failed health check: {e!r}")
+                return
+            self.last_health_ms = (time.perf_counter() - started) * 1000
+
+    async def _supervise(self):
+        backoff = 1.0
+        while not self._stopping:
+            self.state = "starting"
+            self.starts += 1
+            started = time.perf_counter()
+            from agno.tools.mcp import MCPTools  # deferred: pulls in the mcp client stack
+
+            tools = MCPTools(command=self.command, env=self.env, timeout_seconds=self.timeout_seconds)
+            try:
+                async with tools:
+                    self.startup_seconds = time.perf_counter() - started
+                    self.tools = tools
+                    self.state = "ready"
+                    self.ready.set()
+                    backoff = 1.0
+                    logger.info(f"✅ MCP server '{self.name}' ready in {self.startup_seconds:.1f}s")
+                    await self._health_loop(tools)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                self.last_error = repr(e)
+                logger.error(f"❌ MCP server '{self.name}' failed: {e!r}")
+            finally:
+                self.ready.clear()
+                self.tools = None
+                self.state = "stopped" if self._stopping else "restarting"
+            if self._stopping:
+                break
+            self.restarts += 1
+            logger.info(f"🔁 Restarting MCP server '{self.name}' in {backoff:.0f}s")
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=backoff)
+                break
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, MCP_MAX_BACKOFF)
+
+    async def wait_ready(self, timeout):
+        """Wait for the first startup; once a server has been up or failed,
+        tasks no longer block on it while it restarts."""
+        self.start()
+        if self.state == "ready":
+            return self.tools
+        if self.failures or self.restarts:
+            return None
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self.tools
+
+    async def stop(self, timeout=10):
+        """Ask the supervisor to close its connection, cancelling it if it hangs."""
+        self._stopping = True
+        self._stop.set()
+        if self._runner is not None and not self._runner.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self._runner), timeout=timeout)
+            except (asyncio.TimeoutError, Exception):
+                self._runner.cancel()
+        self.state = "stopped"
+
+    def metrics(self):
+        return {
+            "state": self.state,
+            "startup_seconds": self.startup_seconds,
+            "starts": self.starts,
+            "restarts": self.restarts,
+            "failures": self.failures,
+            "last_health_ms": self.last_health_ms,
+            "last_error": self.last_error,
+        }
+
+
+class MCPPool:
+    """Starts MCP servers in parallel on first use and hands out the healthy ones."""
+
+    def __init__(self, servers):
+        self.servers = {server.name: server for server in servers}
+        self._created = time.perf_counter()
+
+    def start(self):
+        """Begin starting every server in the background without waiting."""
+        for server in self.servers.values():
+            server.start()
+
+    async def get_tools(self, timeout=MCP_READY_TIMEOUT):
+        """Return the tools of every server that is ready within ``timeout``."""
+        started = time.perf_counter()
+        results = await asyncio.gather(*(s.wait_ready(timeout) for s in self.servers.values()))
+        ready = [tools for tools in results if tools is not None]
+        missing = [s.name for s in self.servers.values() if s.state != "ready"]
+        if missing:
+            logger.warning(f"⚠️  MCP servers not ready: {', '.join(missing)}")
+        waited = time.perf_counter() - started
+        if waited > 0.01:
+            logger.info(f"⏱️ Waited {waited:.1f}s for MCP readiness ({len(ready)}/{len(self.servers)} ready)")
+        return ready
+
+    async def close(self):
+        await asyncio.gather(*(s.stop() for s in self.servers.values()))
+
+    def metrics(self):
+        return {
+            "ready": sum(1 for s in self.servers.values() if s.state == "ready"),
+            "total": len(self.servers),
+            "servers": {name: s.metrics() for name, s in self.servers.items()},
+        }
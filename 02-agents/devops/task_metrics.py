@@ -0,0 +1,151 @@
+# Vendored from 02-agents/shared/task_metrics.py; edit it there and run `python 02-agents/shared/sync.py`.
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from loguru import logger
+from xpander_sdk import Task, Tokens
+
+_current = ContextVar("task_metrics", default=None)
+
+
+def _value(metrics, *names):
+    """Read a metric from agno 1.x (dict of per-call lists) or 2.x (dataclass) metrics."""
+    for name in names:
+        value = metrics.get(name) if isinstance(metrics, dict) else getattr(metrics, name, None)
+        if isinstance(value, (list, tuple)):
+            value = sum(v for v in value if v is not None)
+        if value:
+            return value
+    return 0
+
+
+def _calls(run, metrics):
+    """Model calls made by a run: one per entry of agno 1.x's per-call ``time`` list,
+    or one per assistant message the run added in agno 2.x (history excluded)."""
+    if isinstance(metrics, dict):
+        value = metrics.get("time")
+        return len(value) if isinstance(value, (list, tuple)) else int(bool(value))
+    messages = [
+        message for message in getattr(run, "messages", None) or []
+        if message.role == "assistant" and not getattr(message, "from_history", False)
+    ]
+    return len(messages) or int(bool(metrics))
+
+
+class TaskMetrics:
+    """Token, LLM and tool usage of every agent run that served one task.
+
+    Each agent run (the main agent, or each sub-agent of a pipeline) is
+    recorded as a step; ``apply`` writes the totals across all steps to
+    the task instead of only the last agent's numbers.
+    """
+
+    def __init__(self):
+        self.steps = []
+        self.started = time.perf_counter()
+
+    def record(self, step, run, seconds=None):
+        """Record an agno run response (or run output) as ``step``."""
+        if run is None:
+            return
+        metrics = getattr(run, "metrics", None) or {}
+        tools = [
+            {
+                "name": tool.tool_name,
+                "seconds": _value(getattr(tool, "metrics", None) or {}, "duration", "time"),
+                "error": bool(getattr(tool, "tool_call_error", False)),
+            }
+            for tool in getattr(run, "tools", None) or []
+        ]
+        self.add_step(
+            step,
+            prompt_tokens=int(_value(metrics, "input_tokens", "prompt_tokens")),
+            completion_tokens=int(_value(metrics, "output_tokens", "completion_tokens")),
+            llm_calls=_calls(run, metrics),
+            llm_seconds=_value(metrics, "time", "duration"),
+            time_to_first_token=_value(metrics, "time_to_first_token") or None,
+            seconds=seconds,
+            tools=tools,
+        )
+
+    def add_step(self, step, prompt_tokens=0, completion_tokens=0, llm_calls=0, llm_seconds=0.0,
+                 time_to_first_token=None, seconds=None, tools=(), tokens_saved=0):
+        """Record a step that is not an agno run, e.g. tools called directly by code.
+
+        ``tokens_saved`` is the estimated prompt tokens the step kept out of
+        later model calls, such as compacting research before it is prompted.
+        """
+        self.steps.append({
+            "step": step,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "tokens_saved": tokens_saved,
+            "llm_calls": llm_calls,
+            "llm_seconds": llm_seconds,
+            "time_to_first_token": time_to_first_token,
+            "seconds": seconds,
+            "tools": list(tools),
+        })
+
+    @property
+    def used_tools(self):
+        return [tool["name"] for step in self.steps for tool in step["tools"]]
+
+    def totals(self):
+        tools = [tool for step in self.steps for tool in step["tools"]]
+        return {
+            "steps": len(self.steps),
+            "prompt_tokens": sum(s["prompt_tokens"] for s in self.steps),
+            "completion_tokens": sum(s["completion_tokens"] for s in self.steps),
+            "tokens_saved": sum(s["tokens_saved"] for s in self.steps),
+            "llm_calls": sum(s["llm_calls"] for s in self.steps),
+            "llm_seconds": sum(s["llm_seconds"] for s in self.steps),
+            "tool_calls": len(tools),
+            "tool_errors": sum(1 for t in tools if t["error"]),
+            "tool_seconds": sum(t["seconds"] for t in tools),
+            "seconds": time.perf_counter() - self.started,
+        }
+
+    def apply(self, task: Task):
+        """Attach the totals to ``task`` and log the per-step breakdown."""
+        totals = self.totals()
+        task.tokens = Tokens(prompt_tokens=totals["prompt_tokens"], completion_tokens=totals["completion_tokens"])
+        task.used_tools = self.used_tools
+        for step in self.steps:
+            logger.info(
+                f"📊 {step['step']}: {step['prompt_tokens']}+{step['completion_tokens']} tokens, "
+                f"{step['llm_calls']} LLM calls in {step['llm_seconds']:.2f}s, {len(step['tools'])} tool calls"
+            )
+        saved = f" (≈{totals['tokens_saved']} prompt tokens saved)" if totals["tokens_saved"] else ""
+        logger.info(
+            f"📊 Task {task.id}: {totals['prompt_tokens']}+{totals['completion_tokens']} tokens{saved}, "
+            f"LLM {totals['llm_seconds']:.2f}s, {totals['tool_calls']} tool calls "
+            f"({totals['tool_seconds']:.2f}s), total {totals['seconds']:.2f}s"
+        )
+        return totals
+
+
+@contextmanager
+def collect_metrics():
+    """Bind a fresh ``TaskMetrics`` to the current task so sub-agents can report into it."""
+    metrics = TaskMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def current_metrics():
+    """The collector of the task being served, or a throwaway one outside a task."""
+    return _current.get() or TaskMetrics()
+
+
+async def run_agent(agent, message, step=None, **kwargs):
+    """``agent.arun`` that records the run in the current task's metrics."""
+    started = time.perf_counter()
+    result = await agent.arun(message, **kwargs)  # first positional: "message" in agno 1.x, "input" in 2.x
+    current_metrics().record(step or getattr(agent, "name", None) or "agent", result,
+                             time.perf_counter() - started)
+    return result
@@ -1,60 +1,80 @@
-from agno.agent import Agent
-from agno.tools.mcp import MultiMCPTools
 import os
 from loguru import logger
 from pydantic import BaseModel
-from xpander_sdk import Task, Backend, on_task, OutputFormat, on_boot
+from xpander_sdk import Task, on_task, OutputFormat, on_boot
 from dotenv import load_dotenv
 load_dotenv()
 
-# Global MCP tools instance
-mcp_tools = None
+from admission import admission
+from agent_cache import agent_cache, imports_warmed, warm_imports
+from mcp_pool import MCPPool, MCPServer
+from metrics import start_metrics_server
+from task_metrics import collect_metrics, run_agent
+from worker_pool import workers
+
+MCP_ENV = {
+    "AWS_ACCESS_KEY_ID": os.environ.get("PROD_AWS_ACCESS_KEY_ID"),
+    "AWS_SECRET_ACCESS_KEY": os.environ.get("PROD_AWS_SECRET_ACCESS_KEY"),
+    "AWS_REGION": os.environ.get("AWS_REGION", ""),
+}
+
+# Servers start in parallel on first use (or at boot when prewarmed) and are
+# health-checked and restarted independently of each other.
+mcp_pool = MCPPool([
+    # Knowledge MCP
+    MCPServer("aws-knowledge", "uvx mcp-proxy --transport streamablehttp https://knowledge-mcp.global.api.aws", MCP_ENV),
+    MCPServer("aws-api", "uvx awslabs.aws-api-mcp-server", MCP_ENV),
+    # EKS MCP
+    MCPServer("eks", "uvx awslabs.eks-mcp-server --allow-sensitive-data-access", MCP_ENV),
+])
+
+MCP_PREWARM = os.environ.get("MCP_PREWARM", "true").lower() not in ("0", "false", "no")
+METRICS_HOST = os.environ.get("DEVOPS_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("DEVOPS_METRICS_PORT", "9464"))
 
 
 @on_boot
+@workers.boot
 async def initialize_mcp():
-    """Initialize MCP tools on boot"""
-    global mcp_tools
-    logger.info("🚀 Initializing MCP tools on boot...")
-
-    mcp_tools = MultiMCPTools(
-        commands=[
-            # Knowledge MCP
-            "uvx mcp-proxy --transport streamablehttp https://knowledge-mcp.global.api.aws",
-            "uvx awslabs.aws-api-mcp-server",
-            # EKS MCP
-            "uvx awslabs.eks-mcp-server --allow-sensitive-data-access"
-        ],
-        env={
-            "AWS_ACCESS_KEY_ID": os.environ.get("PROD_AWS_ACCESS_KEY_ID"),
-            "AWS_SECRET_ACCESS_KEY": os.environ.get("PROD_AWS_SECRET_ACCESS_KEY"),
-            "AWS_REGION": os.environ.get("AWS_REGION", ""),
-        },
-        timeout_seconds=300
-    )
-
-    await mcp_tools.__aenter__()
-    logger.info("✅ MCP tools initialized successfully on boot!")
+    """Kick off MCP server startup and Agno imports in the background without blocking boot
+
+    With TASK_WORKERS > 1 this runs in every worker, each with its own MCP servers.
+    """
+    start_metrics_server(workers.port(METRICS_PORT), METRICS_HOST)
+    warm_imports("agno.agent", "agno.team", "agno.tools.mcp", "httpcore")
+    if MCP_PREWARM:
+        logger.info("🚀 Prewarming MCP servers in the background...")
+        mcp_pool.start()
 
 
 @on_task
+@workers.dispatch
+@admission.guard
 async def my_agent_handler(task: Task):
-    backend = Backend(configuration=task.configuration)
-    agno_args = await backend.aget_args(task=task)
+    await imports_warmed()
+    agno_args = await agent_cache.aget_args(task)
 
-    # Use pre-initialized MCP tools
+    # Use healthy MCP servers, starting them on first use if needed
+    mcp_tools = await mcp_pool.get_tools()
     if mcp_tools:
-        agno_args["tools"].append(mcp_tools)
-        logger.info("🔧 Processing task with MCP tools")
+        agno_args["tools"].extend(mcp_tools)
+        logger.info(f"🔧 Processing task with {len(mcp_tools)} MCP servers")
     else:
         logger.info("⚠️  No MCP tools available")
+    logger.debug(f"MCP readiness: {mcp_pool.metrics()}")
+
+    from agno.agent import Agent  # deferred: ~0.26s after this module's imports, warmed on boot
 
     agno_agent = Agent(**agno_args)
-    result = await agno_agent.arun(message=task.to_message())
+    with collect_metrics() as metrics:
+        result = await run_agent(agno_agent, task.to_message(), step="devops-agent")
 
     # in case of structured output, return as stringified json
     if task.output_format == OutputFormat.Json and isinstance(result.content, BaseModel):
         result.content = result.content.model_dump_json()
 
     task.result = result.content
+
+    # report execution metrics
+    metrics.apply(task)
     return task
@@ -0,0 +1,197 @@
+# Vendored from 02-agents/shared/admission.py; edit it there and run `python 02-agents/shared/sync.py`.
+import asyncio
+import functools
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from loguru import logger
+from xpander_sdk import AgentExecutionStatus, Task
+
+TASK_MAX_IN_FLIGHT = int(os.getenv("TASK_MAX_IN_FLIGHT", "8"))
+TASK_MAX_PER_USER = int(os.getenv("TASK_MAX_PER_USER", "2"))
+TASK_MAX_QUEUE = int(os.getenv("TASK_MAX_QUEUE", "100"))
+TASK_QUEUE_TIMEOUT = float(os.getenv("TASK_QUEUE_TIMEOUT", "120"))
+TASK_SCHEDULED_SOURCES = {
+    s.strip().lower() for s in os.getenv("TASK_SCHEDULED_SOURCES", "scheduler,schedule,cron").split(",") if s.strip()
+}
+
+# Lanes in priority order: a free slot goes to the first lane with an eligible waiter.
+INTERACTIVE = "interactive"
+SCHEDULED = "scheduled"
+LANES = (INTERACTIVE, SCHEDULED)
+
+BUSY_MESSAGE = "The agent is at capacity right now. Please retry in a moment."
+
+
+class Overloaded(Exception):
+    """The task was shed: the queue is full or the wait timed out."""
+
+
+def task_user(task: Task):
+    """Fairness key of a task: its user, or None when the task carries none."""
+    user = getattr(task.input, "user", None)
+    return getattr(task, "user_id", None) or getattr(user, "id", None)
+
+
+def task_lane(task: Task):
+    return SCHEDULED if (task.source or "").lower() in TASK_SCHEDULED_SOURCES else INTERACTIVE
+
+
+class AdmissionController:
+    """Bounds the tasks a worker runs at once and decides who runs next.
+
+    At most ``max_in_flight`` tasks run, and at most ``max_per_user`` of them
+    for one user (tasks without a user are not capped). Waiting tasks queue per
+    lane and per user; free slots go to the highest-priority lane, round-robin
+    across its users, so one busy user cannot starve the rest. When
+    ``max_queue`` tasks are already waiting, new ones are shed with
+    :class:`Overloaded` instead of queueing without bound: ``pressure()`` is the
+    queue fill ratio callers can act on before that happens.
+    """
+
+    def __init__(self, max_in_flight=TASK_MAX_IN_FLIGHT, max_per_user=TASK_MAX_PER_USER,
+                 max_queue=TASK_MAX_QUEUE, queue_timeout=TASK_QUEUE_TIMEOUT, lanes=LANES):
+        self.max_in_flight = max_in_flight
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._lanes = {lane: OrderedDict() for lane in lanes}
+        self._running = {}
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _has_room(self, user):
+        return user is None or self._running.get(user, 0) < self.max_per_user
+
+    def _grant(self, user):
+        self.in_flight += 1
+        self.admitted += 1
+        if user is not None:
+            self._running[user] = self._running.get(user, 0) + 1
+
+    def _dispatch(self):
+        progress = True
+        while progress and self.in_flight < self.max_in_flight:
+            progress = False
+            for waiting in self._lanes.values():
+                for user in list(waiting):
+                    if self.in_flight >= self.max_in_flight:
+                        return
+                    if not self._has_room(user):
+                        continue
+                    # Pop and re-append so the next grant in this lane goes to another user.
+                    futures = waiting.pop(user)
+                    future = futures.popleft()
+                    if futures:
+                        waiting[user] = futures
+                    self.queued -= 1
+                    self._grant(user)
+                    future.set_result(None)
+                    progress = True
+                if progress:
+                    break
+
+    def _discard(self, lane, user, future):
+        futures = self._lanes[lane].get(user)
+        if futures is not None and future in futures:
+            futures.remove(future)
+            self.queued -= 1
+            if not futures:
+                del self._lanes[lane][user]
+
+    async def acquire(self, user=None, lane=INTERACTIVE):
+        if not self.queued and self.in_flight < self.max_in_flight and self._has_room(user):
+            self._grant(user)
+            return
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(f"{self.queued} tasks already waiting")
+        future = asyncio.get_running_loop().create_future()
+        self._lanes[lane].setdefault(user, deque()).append(future)
+        self.queued += 1
+        self._dispatch()
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except BaseException as exc:
+            if future.done():
+                # Granted just as the wait was abandoned: hand the slot back.
+                self.release(user)
+            else:
+                future.cancel()
+                self._discard(lane, user, future)
+            if isinstance(exc, asyncio.TimeoutError):
+                self.timed_out += 1
+                raise Overloaded(f"no slot within {self.queue_timeout:g}s") from None
+            raise
+        finally:
+            waited = time.monotonic() - started
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def release(self, user=None):
+        self.in_flight -= 1
+        if user is not None:
+            remaining = self._running[user] - 1
+            if remaining:
+                self._running[user] = remaining
+            else:
+                del self._running[user]
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user=None, lane=INTERACTIVE):
+        await self.acquire(user, lane)
+        try:
+            yield
+        finally:
+            self.release(user)
+
+    def pressure(self):
+        """Backpressure signal: fraction of the wait queue in use (1.0 = shedding)."""
+        return self.queued / self.max_queue if self.max_queue else 1.0
+
+    def guard(self, handler):
+        """Wrap an ``@on_task`` handler so it runs under admission control.
+
+        A shed task is returned failed with :data:`BUSY_MESSAGE` rather than
+        raising, so the caller gets a prompt, retryable answer.
+        """
+        @functools.wraps(handler)
+        async def wrapper(task: Task, *args, **kwargs):
+            user = task_user(task)
+            try:
+                await self.acquire(user, task_lane(task))
+            except Overloaded as e:
+                logger.warning(f"🚦 Shedding task {task.id}: {e} (in flight {self.in_flight}, queued {self.queued})")
+                task.status = AgentExecutionStatus.Failed
+                task.result = BUSY_MESSAGE
+                return task
+            try:
+                return await handler(task, *args, **kwargs)
+            finally:
+                self.release(user)
+
+        return wrapper
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "pressure": self.pressure(),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait": self.wait_total / self.admitted if self.admitted else 0.0,
+            "max_wait": self.wait_max,
+        }
+
+
+admission = AdmissionController()
@@ -0,0 +1,382 @@
+# Vendored from 02-agents/shared/worker_pool.py; edit it there and run `python 02-agents/shared/sync.py`.
+import asyncio
+import atexit
+import functools
+import importlib
+import itertools
+import os
+import pickle
+import signal
+import subprocess
+import sys
+import threading
+import zlib
+from multiprocessing.connection import Connection, Pipe
+
+from loguru import logger
+from xpander_sdk import Task
+
+from admission import task_user
+
+WORKER_INDEX_ENV = "TASK_WORKER_INDEX"
+TASK_WORKER_RESTART_DELAY = float(os.getenv("TASK_WORKER_RESTART_DELAY", "1"))
+TASK_WORKER_STOP_TIMEOUT = float(os.getenv("TASK_WORKER_STOP_TIMEOUT", "10"))
+
+
+def _worker_count(value):
+    """``TASK_WORKERS``: a process count, or ``auto`` for one per usable CPU."""
+    if value.strip().lower() == "auto":
+        return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    return max(1, int(value))
+
+
+TASK_WORKERS = _worker_count(os.getenv("TASK_WORKERS", "1"))
+
+
+def worker_index():
+    """Index of this pool worker, or None outside a pool worker."""
+    index = os.environ.get(WORKER_INDEX_ENV)
+    return int(index) if index is not None else None
+
+
+class WorkerLost(Exception):
+    """The worker process running a task exited before returning it."""
+
+
+class _Worker:
+    def __init__(self, index):
+        self.index = index
+        self.proc = None
+        self.conn = None
+        self.ready = None
+        self.pending = {}
+        self.in_flight = 0
+        self.dispatched = 0
+        self.restarts = 0
+
+
+class WorkerPool:
+    """Runs an ``@on_task`` handler in ``workers`` processes behind one listener.
+
+    With more than one worker, the process the xpander listener runs in
+    becomes a supervisor: its ``@on_boot`` hooks wrapped with :meth:`boot`
+    spawn the workers instead of running, and its handler wrapped with
+    :meth:`dispatch` forwards each task to a worker and returns the task the
+    worker sends back. Each worker imports the handler module, runs the boot
+    hooks itself (so MCP servers, database pools and caches are per process)
+    and serves tasks concurrently on its own event loop, so CPU-bound work
+    spreads over ``workers`` cores.
+
+    Tasks are routed by user: the same user always lands on the same worker,
+    keeping its per-user caches warm and its writes in one process; tasks
+    without a user go to the least busy worker. A worker that exits fails its
+    in-flight tasks with :class:`WorkerLost` and is restarted after
+    ``restart_delay`` seconds. With one worker (the default) both wrappers
+    are pass-throughs and everything runs in-process as before. Only regular
+    (non-streaming) handlers can be dispatched.
+    """
+
+    def __init__(self, workers=TASK_WORKERS, module=None, restart_delay=TASK_WORKER_RESTART_DELAY):
+        self.workers = workers
+        self.module = module
+        self.restart_delay = restart_delay
+        self.index = worker_index()
+        self._root = None
+        self._pool = []
+        self._loop = None
+        self._started = None
+        self._stopping = False
+        self._ids = itertools.count()
+
+    @property
+    def supervising(self):
+        return self.workers > 1 and self.index is None
+
+    @property
+    def primary(self):
+        """True in the process that should run once-per-deployment work, like cron jobs."""
+        return not self.index
+
+    def port(self, base):
+        """Per-worker port for listeners that would otherwise collide (0 stays 0)."""
+        return base + self.index if base and self.index else base
+
+    # --- decorators ---
+    def boot(self, fn):
+        """Wrap an ``@on_boot`` hook so it runs in each worker, not the supervisor."""
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if self.supervising:
+                await self.start()
+                return None
+            result = fn(*args, **kwargs)
+            return await result if asyncio.iscoroutine(result) else result
+
+        return wrapper
+
+    def dispatch(self, handler):
+        """Wrap an ``@on_task`` handler so the supervisor forwards tasks to the workers."""
+        if self.module is None:
+            self.module, self._root = _module_of(handler)
+
+        @functools.wraps(handler)
+        async def wrapper(task: Task, *args, **kwargs):
+            if self.supervising:
+                return await self.submit(task)
+            return await handler(task, *args, **kwargs)
+
+        return wrapper
+
+    # --- supervisor ---
+    async def start(self):
+        """Spawn the workers and wait until every one has booted."""
+        if self._started is None:
+            self._started = asyncio.ensure_future(self._start())
+        await asyncio.shield(self._started)
+
+    async def _start(self):
+        self._loop = asyncio.get_running_loop()
+        self._pool = [_Worker(i) for i in range(self.workers)]
+        logger.info(f"👷 Starting {self.workers} task workers for {self.module}...")
+        atexit.register(self.stop)
+        try:
+            await asyncio.gather(*(self._spawn(worker) for worker in self._pool))
+        except BaseException:
+            self.stop()
+            raise
+        logger.info(f"👷 {self.workers} task workers ready")
+
+    async def _spawn(self, worker):
+        parent, child = Pipe()
+        env = dict(os.environ, **{WORKER_INDEX_ENV: str(worker.index)})
+        try:
+            worker.proc = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), self.module, self._root or os.getcwd(), str(child.fileno())],
+                env=env, pass_fds=(child.fileno(),),
+            )
+        finally:
+            child.close()
+        worker.conn = parent
+        worker.ready = self._loop.create_future()
+        threading.Thread(target=self._read, args=(worker, parent), name=f"task-worker-{worker.index}",
+                         daemon=True).start()
+        await worker.ready
+
+    def _read(self, worker, conn):
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            self._loop.call_soon_threadsafe(self._deliver, worker, message)
+        try:
+            self._loop.call_soon_threadsafe(self._lost, worker, conn)
+        except RuntimeError:  # loop already closed at interpreter exit
+            pass
+
+    def _deliver(self, worker, message):
+        request_id, ok, value = message
+        if request_id is None:
+            if not worker.ready.done():
+                worker.ready.set_result(None)
+            return
+        future = worker.pending.pop(request_id, None)
+        if future is not None and not future.done():
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _lost(self, worker, conn):
+        if worker.conn is not conn:
+            return
+        conn.close()
+        worker.conn = None
+        code = worker.proc.wait()
+        error = WorkerLost(f"task worker {worker.index} exited with code {code}")
+        for future in worker.pending.values():
+            if not future.done():
+                future.set_exception(error)
+        worker.pending.clear()
+        booted = worker.ready.done() and worker.ready.exception() is None
+        if not worker.ready.done():
+            worker.ready.set_exception(error)
+        if self._stopping or not booted:
+            return
+        logger.error(f"💥 {error}; restarting in {self.restart_delay:g}s")
+        worker.ready = self._loop.create_future()
+        asyncio.ensure_future(self._restart(worker))
+
+    async def _restart(self, worker):
+        # Tasks for this worker's users wait on ``ready`` meanwhile.
+        waiting = worker.ready
+        while not self._stopping:
+            await asyncio.sleep(self.restart_delay)
+            worker.restarts += 1
+            try:
+                await self._spawn(worker)
+            except Exception as e:
+                logger.error(f"💥 Task worker {worker.index} failed to restart: {e}")
+                worker.ready = waiting
+                continue
+            if not waiting.done():
+                waiting.set_result(None)
+            return
+
+    def _pick(self, task):
+        user = task_user(task)
+        if user is None:
+            return min(self._pool, key=lambda worker: worker.in_flight)
+        return self._pool[zlib.crc32(str(user).encode()) % len(self._pool)]
+
+    async def submit(self, task):
+        """Run ``task`` on its worker and return the task the handler produced."""
+        await self.start()
+        worker = self._pick(task)
+        await asyncio.shield(worker.ready)
+        if worker.conn is None:
+            raise WorkerLost(f"task worker {worker.index} is restarting")
+        request_id = next(self._ids)
+        future = self._loop.create_future()
+        worker.pending[request_id] = future
+        worker.in_flight += 1
+        worker.dispatched += 1
+        try:
+            worker.conn.send((request_id, task))
+            return await future
+        except asyncio.CancelledError:
+            if worker.conn is not None:
+                try:
+                    worker.conn.send((request_id, None))  # cancel it in the worker too
+                except OSError:
+                    pass
+            raise
+        finally:
+            worker.pending.pop(request_id, None)
+            worker.in_flight -= 1
+
+    def stop(self, timeout=TASK_WORKER_STOP_TIMEOUT):
+        """Ask the workers to exit (SIGTERM) and reap them, killing any that hang."""
+        self._stopping = True
+        for worker in self._pool:
+            if worker.proc is not None and worker.proc.poll() is None:
+                worker.proc.terminate()
+        for worker in self._pool:
+            if worker.proc is None:
+                continue
+            try:
+                worker.proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                worker.proc.kill()
+                worker.proc.wait()
+
+    def stats(self):
+        return [
+            {"worker": w.index, "pid": w.proc.pid if w.proc else None, "in_flight": w.in_flight,
+             "dispatched": w.dispatched, "restarts": w.restarts}
+            for w in self._pool
+        ]
+
+
+def _module_of(handler):
+    """Importable name of the handler's module and the directory to import it from."""
+    module = sys.modules[handler.__module__]
+    if handler.__module__ != "__main__":
+        return handler.__module__, None
+    spec = getattr(module, "__spec__", None)
+    if spec is not None:  # python -m package.module
+        return spec.name, os.getcwd()
+    path = os.path.abspath(module.__file__)  # python xpander_handler.py
+    return os.path.splitext(os.path.basename(path))[0], os.path.dirname(path)
+
+
+workers = WorkerPool()
+
+
+# --- worker ---
+def _collector(into):
+    def decorator(fn=None, **kwargs):
+        if fn is None:
+            return decorator
+        into.append(fn)
+        return fn
+
+    return decorator
+
+
+def _portable(error):
+    """``error`` if the supervisor can unpickle it, else a RuntimeError with its text."""
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+async def _serve(conn, handler, boot_hooks):
+    for hook in boot_hooks:
+        result = hook()
+        if asyncio.iscoroutine(result):
+            await result
+
+    loop = asyncio.get_running_loop()
+    running = {}
+    closed = asyncio.Event()
+
+    async def run(request_id, task):
+        try:
+            message = (request_id, True, await handler(task))
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            message = (request_id, False, _portable(e))
+        finally:
+            running.pop(request_id, None)
+        try:
+            conn.send(message)
+        except Exception as e:  # unpicklable result or exception
+            conn.send((request_id, False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+    def receive(request_id, task):
+        if task is None:
+            if request_id in running:
+                running[request_id].cancel()
+        else:
+            running[request_id] = asyncio.ensure_future(run(request_id, task))
+
+    def read():
+        while True:
+            try:
+                request_id, task = conn.recv()
+            except (EOFError, OSError):
+                break
+            loop.call_soon_threadsafe(receive, request_id, task)
+        loop.call_soon_threadsafe(closed.set)
+
+    threading.Thread(target=read, name="task-worker-reader", daemon=True).start()
+    loop.add_signal_handler(signal.SIGTERM, closed.set)
+    conn.send((None, True, os.getpid()))
+    logger.info(f"👷 Task worker {worker_index()} ready (pid {os.getpid()})")
+    await closed.wait()
+    for task in list(running.values()):
+        task.cancel()
+
+
+def serve(module, root, fd):
+    """Worker entry point: boot ``module``'s handler and serve tasks sent over ``fd``."""
+    # Ctrl-C reaches the whole process group; exit on the supervisor's SIGTERM or when its pipe closes.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import xpander_sdk
+
+    handlers, boot_hooks = [], []
+    xpander_sdk.on_task = _collector(handlers)
+    xpander_sdk.on_boot = _collector(boot_hooks)
+    sys.path.insert(0, root)
+    importlib.import_module(module)
+    if len(handlers) != 1:
+        raise RuntimeError(f"{module} must register exactly one @on_task handler, found {len(handlers)}")
+    asyncio.run(_serve(Connection(fd), handlers[0], boot_hooks))
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1], sys.argv[2], int(sys.argv[3]))
@@ -1,19 +1,34 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from xpander_sdk import Task, Backend, on_task, OutputFormat, Tokens
+from xpander_sdk import Task, on_task, OutputFormat, on_boot
 from pydantic import BaseModel
-from agno.agent import Agent
-from agno.models.ollama import Ollama
+
+from admission import admission
+from agent_cache import agent_cache, imports_warmed, warm_imports
+from task_metrics import collect_metrics, run_agent
+from worker_pool import workers
+
+@on_boot
+@workers.boot
+async def warm_up():
+    # Agno and the Ollama client are imported per task; load them while idle
+    warm_imports("agno.agent", "agno.team", "agno.models.ollama", "httpcore")
 
 @on_task
+@workers.dispatch
+@admission.guard
 async def my_agent_handler(task: Task):
-    backend = Backend(configuration=task.configuration)
-    agno_agent = Agent(**backend.get_args(override={
+    await imports_warmed()
+    from agno.agent import Agent
+    from agno.models.ollama import Ollama
+
+    agno_agent = Agent(**await agent_cache.aget_args(task, override={
     'model': Ollama(id="gpt-oss:20b")
     }))
 
-    result = await agno_agent.arun(message=task.to_message())
+    with collect_metrics() as metrics:
+        result = await run_agent(agno_agent, task.to_message(), step="local-agent")
     
     # in case of structured output, return as stringified json
     if task.output_format == OutputFormat.Json and isinstance(result.content, BaseModel):
@@ -22,7 +37,6 @@ async def my_agent_handler(task: Task):
     task.result = result.content
     
     # report execution metrics
-    task.tokens = Tokens(prompt_tokens=sum(result.metrics['input_tokens']),completion_tokens=sum(result.metrics['completion_tokens']))
-    task.used_tools = [tool.tool_name for tool in result.tools]
+    metrics.apply(task)
     
     return task
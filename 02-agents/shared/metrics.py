@@ -0,0 +1,328 @@
+import functools
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as StackCounter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from loguru import logger
+
+# Seconds; covers in-memory cache hits up to slow LLM-driven tasks.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _label_str(names, values, extra=""):
+    pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+
+    def labels(self, *values):
+        """Return the child for ``values``; keep it around on hot paths."""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, values))
+        return lines
+
+
+class _Value:
+    """Counter or gauge value. Updated from the event loop thread only."""
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Compute the value when scraped instead of tracking it."""
+        self.function = function
+
+    def render(self, name, labelnames, values):
+        value = self.function() if self.function is not None else self.value
+        return [f"{name}{_label_str(labelnames, values)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labelnames, values):
+        lines, cumulative = [], 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            le = f'le="{bound}"'
+            lines.append(f"{name}_bucket{_label_str(labelnames, values, le)} {cumulative}")
+        lines.append(f"{name}_sum{_label_str(labelnames, values)} {self.sum}")
+        lines.append(f"{name}_count{_label_str(labelnames, values)} {self.count}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._metrics.get(name) or self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._metrics.get(name) or self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._metrics.get(name) or self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Timed:
+    """Histogram, gauge and counter children of one labelled operation."""
+    __slots__ = ("duration", "in_flight", "errors")
+
+    def __init__(self, duration, in_flight, errors):
+        self.duration = duration
+        self.in_flight = in_flight
+        self.errors = errors
+
+    def start(self):
+        self.in_flight.value += 1
+        return time.perf_counter()
+
+    def stop(self, started):
+        # _HistogramChild.observe inlined: this runs on every database call
+        elapsed = time.perf_counter() - started
+        duration = self.duration
+        duration.counts[bisect_left(duration.buckets, elapsed)] += 1
+        duration.sum += elapsed
+        duration.count += 1
+        self.in_flight.value -= 1
+
+    async def track(self, awaitable):
+        started = self.start()
+        try:
+            return await awaitable
+        except BaseException:
+            self.errors.value += 1
+            raise
+        finally:
+            self.stop(started)
+
+
+class Timer:
+    """Latency histogram, in-flight gauge and error counter for one operation kind.
+
+    ``Timer("travel_tool", "tool").wrap(fn, "ta_book_flight")`` records
+    ``travel_tool_duration_seconds``, ``travel_tool_in_flight`` and
+    ``travel_tool_errors_total`` labelled ``tool="ta_book_flight"``. Hot
+    paths resolve :meth:`child` once and reuse it instead of looking the
+    labels up on every call.
+    """
+
+    def __init__(self, prefix, label, registry=REGISTRY, buckets=DEFAULT_BUCKETS):
+        self.duration = registry.histogram(f"{prefix}_duration_seconds", f"Latency of {label} calls", (label,), buckets)
+        self.in_flight = registry.gauge(f"{prefix}_in_flight", f"{label} calls in progress", (label,))
+        self.errors = registry.counter(f"{prefix}_errors_total", f"{label} calls that raised", (label,))
+        self._children = {}
+
+    def child(self, name):
+        timed = self._children.get(name)
+        if timed is None:
+            timed = self._children[name] = _Timed(
+                self.duration.labels(name), self.in_flight.labels(name), self.errors.labels(name)
+            )
+        return timed
+
+    def track(self, name, awaitable):
+        """Await ``awaitable`` and record it under ``name``."""
+        return self.child(name).track(awaitable)
+
+    def wrap(self, fn, name=None):
+        """Instrument coroutine function ``fn``."""
+        timed = self.child(name or fn.__name__)
+        duration, in_flight, errors = timed.duration, timed.in_flight, timed.errors
+        counts, buckets = duration.counts, duration.buckets
+        perf_counter = time.perf_counter
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            in_flight.value += 1
+            started = perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            except BaseException:
+                errors.value += 1
+                raise
+            finally:
+                elapsed = perf_counter() - started
+                counts[bisect_left(buckets, elapsed)] += 1
+                duration.sum += elapsed
+                duration.count += 1
+                in_flight.value -= 1
+
+        return wrapper
+
+
+def instrumented(timer, name=None):
+    """Decorator form of :meth:`Timer.wrap`."""
+    return lambda fn: timer.wrap(fn, name)
+
+
+class SamplingProfiler:
+    """Samples the stack of a thread at ``hz`` and counts collapsed stacks.
+
+    ``collapsed()`` returns one ``frame;frame;frame count`` line per stack,
+    the input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, hz, thread_id=None):
+        self.interval = 1.0 / hz
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.stacks = StackCounter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        if stack:
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def collapsed(self):
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+
+profiler = None
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/metrics"):
+            body, content_type = self.registry.render(), "text/plain; version=0.0.4"
+        elif self.path.startswith("/debug/profile") and profiler is not None:
+            body, content_type = profiler.collapsed(), "text/plain"
+        else:
+            self.send_error(404)
+            return
+        payload = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def start_metrics_server(port, host="127.0.0.1", profile_hz=0):
+    """Serve ``/metrics`` (and ``/debug/profile`` when profiling) on a daemon thread.
+
+    A port of 0 disables the endpoint. Returns the server, or None.
+    """
+    global profiler
+    if profile_hz > 0 and profiler is None:
+        profiler = SamplingProfiler(profile_hz).start()
+        logger.info(f"🔬 Sampling profiler running at {profile_hz:g} Hz")
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning(f"⚠️ Metrics endpoint not started on {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"📈 Metrics at http://{host}:{server.server_address[1]}/metrics")
+    return server
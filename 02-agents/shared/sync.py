@@ -0,0 +1,66 @@
+"""Copy the shared agent modules into every example that vendors them.
+
+Each agent directory is built and deployed on its own (its Dockerfile does
+``COPY . .``), so it cannot import from this directory. The modules here are
+the single source; the copies carry a header pointing back here. Edit them
+here, then run:
+
+    python 02-agents/shared/sync.py           # rewrite the vendored copies
+    python 02-agents/shared/sync.py --check   # exit 1 if a copy has drifted
+"""
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+
+AGENTS = ["02-agents/travel-agent", "02-agents/devops", "02-agents/local-agent"]
+
+# module -> directories (relative to the repo root) that vendor it
+VENDORED = {
+    "admission.py": AGENTS,
+    "worker_pool.py": AGENTS,
+    "agent_cache.py": AGENTS,
+    "task_metrics.py": [*AGENTS, "03-framework-examples/nemo-agno-personal-finance-agent"],
+    "metrics.py": ["02-agents/travel-agent/core", "02-agents/devops"],
+}
+
+HEADER = "# Vendored from 02-agents/shared/{name}; edit it there and run `python 02-agents/shared/sync.py`.\n"
+
+
+def expected(name):
+    with open(os.path.join(HERE, name)) as f:
+        return HEADER.format(name=name) + f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="report drifted copies instead of rewriting them")
+    args = parser.parse_args()
+
+    drifted = []
+    for name, targets in VENDORED.items():
+        content = expected(name)
+        for target in targets:
+            path = os.path.join(ROOT, target, name)
+            try:
+                with open(path) as f:
+                    current = f.read()
+            except FileNotFoundError:
+                current = None
+            if current == content:
+                continue
+            if args.check:
+                drifted.append(os.path.relpath(path, ROOT))
+            else:
+                with open(path, "w") as f:
+                    f.write(content)
+                print(f"updated {os.path.relpath(path, ROOT)}")
+    for path in drifted:
+        print(f"out of sync: {path}")
+    sys.exit(1 if drifted else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# Vendored from 02-agents/shared/agent_cache.py; edit it there and run `python 02-agents/shared/sync.py`.
+import asyncio
+import importlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from loguru import logger
+from xpander_sdk import Agents, Backend, Task
+
+AGENT_CACHE_ENABLED = os.getenv("AGENT_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+AGENT_CACHE_TTL = float(os.getenv("AGENT_CACHE_TTL", "300"))
+AGENT_CACHE_SIZE = int(os.getenv("AGENT_CACHE_SIZE", "64"))
+
+
+async def fetch_agent(task: Task):
+    """Resolve the xpander agent definition for a task (one backend round-trip)."""
+    return await Agents(configuration=task.configuration).aget(
+        agent_id=task.agent_id, version=task.agent_version
+    )
+
+
+class AgentCache:
+    """Warm cache of resolved agent definitions keyed by organization/agent/version.
+
+    ``Backend.aget_args`` spends most of its time fetching the agent definition.
+    The definition is shared by every task of the same agent, so it is cached
+    here with TTL + LRU eviction and concurrent misses share one fetch. A
+    definition with a newer version than the cached unpinned ("latest") one
+    evicts it, so a redeploy is picked up before the TTL runs out.
+
+    The resolved args and Agno agents are deliberately not cached: the args
+    carry per-task state (session storage, the user's memories, task tools,
+    output schema, MCP sessions closed after each run) and an Agno agent
+    keeps per-run state, so reusing either across concurrent tasks would
+    leak one task's context into another.
+    """
+
+    def __init__(self, ttl=AGENT_CACHE_TTL, maxsize=AGENT_CACHE_SIZE,
+                 enabled=AGENT_CACHE_ENABLED, resolver=fetch_agent):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.enabled = enabled
+        self._resolver = resolver
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(task: Task):
+        configuration = task.configuration
+        organization_id = getattr(configuration, "organization_id", None) or getattr(task, "organization_id", None)
+        return (organization_id, task.agent_id, getattr(task, "agent_version", None))
+
+    async def get_agent(self, task: Task):
+        if not self.enabled:
+            return await self._resolver(task)
+        key = self.key_for(task)
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = self._inflight[key] = asyncio.ensure_future(self._resolver(task))
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        agent = await asyncio.shield(pending)
+        self._drop_stale_latest(key, agent)
+        self._entries[key] = (time.monotonic() + self.ttl, agent)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return agent
+
+    async def aget_args(self, task: Task, **kwargs):
+        """Drop-in for ``Backend(task.configuration).aget_args(task=task, ...)``."""
+        started = time.perf_counter()
+        agent = await self.get_agent(task)
+        args = await Backend(configuration=task.configuration).aget_args(agent=agent, task=task, **kwargs)
+        logger.info(
+            f"⏱️ Agent setup took {(time.perf_counter() - started) * 1000:.1f}ms "
+            f"(cache {'on' if self.enabled else 'off'}, hits={self.hits}, misses={self.misses})"
+        )
+        return args
+
+    def _drop_stale_latest(self, key, agent):
+        version = getattr(agent, "version", None)
+        latest_key = (*key[:2], None)
+        latest = self._entries.get(latest_key)
+        if key == latest_key or latest is None or version is None:
+            return
+        if version > (getattr(latest[1], "version", None) or 0):
+            logger.info(f"🔄 Agent {key[1]} v{version} is newer than the cached latest; refetching it")
+            del self._entries[latest_key]
+
+    def invalidate(self, agent_id=None):
+        """Drop cached definitions, e.g. after the agent is redeployed."""
+        if agent_id is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[1] == agent_id]:
+            del self._entries[key]
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "enabled": self.enabled}
+
+
+_warming = []
+
+
+def warm_imports(*modules):
+    """Import ``modules`` on a background thread and return immediately.
+
+    Handlers import heavy frameworks (``agno.agent`` alone takes ~0.3s) where
+    they are first needed rather than at module import, so the worker starts
+    listening sooner; calling this from ``@on_boot`` loads them while the
+    worker waits for its first task. Handlers should ``await imports_warmed()``
+    before their own imports.
+    """
+    def run():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                logger.warning(f"⚠️ Background import of {name} failed: {e!r}")
+
+    thread = threading.Thread(target=run, name="warm-imports", daemon=True)
+    thread.start()
+    _warming.append(thread)
+    return thread
+
+
+async def imports_warmed():
+    """Wait, off the event loop, for :func:`warm_imports` to finish.
+
+    Agno's packages import each other circularly, so a task importing them
+    while the warm-up thread is midway can fail with a partially initialized
+    module; this also keeps the loop free while the imports finish.
+    """
+    for thread in _warming:
+        if thread.is_alive():
+            await asyncio.to_thread(thread.join)
+
+
+agent_cache = AgentCache()
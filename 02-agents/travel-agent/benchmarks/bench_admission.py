@@ -0,0 +1,115 @@
+"""Task latency under overload, with and without the admission layer.
+
+A burst of tasks hits a simulated model endpoint that serves ``--capacity``
+concurrent calls at ``--service-ms`` each and slows down quadratically past
+that, failing calls that exceed ``--timeout``. One heavy user sends half of
+the tasks and a few scheduled tasks ride along. Reported per mode: completed,
+failed and shed tasks, p50/p99 latency overall and for light users, and
+the p99 of the low-priority scheduled lane.
+
+    python -m benchmarks.bench_admission --tasks 400 --capacity 8 --service-ms 200
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from admission import INTERACTIVE, SCHEDULED, AdmissionController, Overloaded
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--tasks", type=int, default=400)
+parser.add_argument("--users", type=int, default=20, help="light users besides the heavy one")
+parser.add_argument("--calls", type=int, default=3, help="model calls per task")
+parser.add_argument("--capacity", type=int, default=8, help="concurrent calls the endpoint serves at full speed")
+parser.add_argument("--service-ms", type=float, default=200)
+parser.add_argument("--timeout", type=float, default=10.0, help="per-call client timeout (s)")
+parser.add_argument("--arrival-ms", type=float, default=80, help="mean gap between task arrivals")
+parser.add_argument("--max-in-flight", type=int, default=8)
+parser.add_argument("--max-per-user", type=int, default=2)
+parser.add_argument("--max-queue", type=int, default=200)
+args = parser.parse_args()
+
+
+class Endpoint:
+    def __init__(self):
+        self.in_flight = 0
+
+    async def call(self):
+        self.in_flight += 1
+        try:
+            overload = max(1.0, self.in_flight / args.capacity)
+            await asyncio.wait_for(asyncio.sleep(args.service_ms / 1000 * overload ** 2), args.timeout)
+        finally:
+            self.in_flight -= 1
+
+
+def workload():
+    rng = random.Random(11)
+    tasks = []
+    for i in range(args.tasks):
+        if i % 25 == 0:
+            user, lane = None, SCHEDULED
+        else:
+            user, lane = "heavy" if i % 2 == 0 else f"light-{rng.randrange(args.users)}", INTERACTIVE
+        tasks.append((rng.expovariate(1000 / args.arrival_ms), user, lane))
+    return tasks
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000 if values else float("nan")
+
+
+async def run(admission):
+    endpoint = Endpoint()
+    results = []
+
+    async def task(user, lane):
+        started = time.perf_counter()
+        try:
+            if admission is not None:
+                await admission.acquire(user, lane)
+            try:
+                for _ in range(args.calls):
+                    await endpoint.call()
+            finally:
+                if admission is not None:
+                    admission.release(user)
+            status = "ok"
+        except Overloaded:
+            status = "shed"
+        except asyncio.TimeoutError:
+            status = "failed"
+        results.append((user, lane, status, time.perf_counter() - started))
+
+    running = []
+    for gap, user, lane in workload():
+        await asyncio.sleep(gap)
+        running.append(asyncio.create_task(task(user, lane)))
+    await asyncio.gather(*running)
+    return results
+
+
+def report(name, results):
+    ok = [r for r in results if r[2] == "ok"]
+    light = [r[3] for r in ok if (r[0] or "").startswith("light")]
+    scheduled = [r[3] for r in ok if r[1] == SCHEDULED]
+    print(f"{name:>10} {len(ok):>5} {sum(r[2] == 'failed' for r in results):>6} "
+          f"{sum(r[2] == 'shed' for r in results):>5} {pct([r[3] for r in ok], 0.5):>9.0f} "
+          f"{pct([r[3] for r in ok], 0.99):>9.0f} {pct(light, 0.99):>10.0f} {pct(scheduled, 0.99):>10.0f}")
+
+
+async def main():
+    print(f"{'mode':>10} {'ok':>5} {'failed':>6} {'shed':>5} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'light p99':>10} {'sched p99':>10}")
+    report("unbounded", await run(None))
+    admission = AdmissionController(
+        max_in_flight=args.max_in_flight, max_per_user=args.max_per_user,
+        max_queue=args.max_queue, queue_timeout=600,
+    )
+    report("admission", await run(admission))
+    print(f"admission stats: {admission.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
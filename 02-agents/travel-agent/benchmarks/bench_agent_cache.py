@@ -0,0 +1,59 @@
+"""Per-task agent setup latency with the warm agent cache on and off.
+
+The backend round-trip is simulated by a resolver that sleeps for
+``--backend-ms``; tasks are spread over ``--agents`` distinct agent IDs.
+
+    python -m benchmarks.bench_agent_cache --tasks 200 --backend-ms 150
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from agent_cache import AgentCache
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--tasks", type=int, default=200)
+parser.add_argument("--agents", type=int, default=3)
+parser.add_argument("--backend-ms", type=float, default=150)
+parser.add_argument("--concurrency", type=int, default=10)
+args = parser.parse_args()
+
+
+async def slow_resolver(task):
+    await asyncio.sleep(args.backend_ms / 1000)
+    return SimpleNamespace(id=task.agent_id)
+
+
+def make_task(i):
+    return SimpleNamespace(
+        agent_id=f"agent-{i % args.agents}",
+        agent_version=None,
+        configuration=SimpleNamespace(organization_id="org"),
+    )
+
+
+async def run(enabled):
+    cache = AgentCache(enabled=enabled, resolver=slow_resolver)
+    sem = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one(i):
+        async with sem:
+            start = time.perf_counter()
+            await cache.get_agent(make_task(i))
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(args.tasks)))
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"cache {'on ' if enabled else 'off'}: setup p50={p50:7.2f}ms p99={p99:7.2f}ms  {cache.stats()}")
+
+
+async def main():
+    await run(False)
+    await run(True)
+
+
+asyncio.run(main())
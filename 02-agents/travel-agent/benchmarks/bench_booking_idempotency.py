@@ -0,0 +1,73 @@
+"""Duplicate and retried booking calls against a slow stub AviationStack.
+
+Fires bursts of identical concurrent ``book_flight_impl``/``book_hotel_impl``
+calls followed by sequential retries, then reports rows written, upstream
+requests, coalesced calls and the latency of a fresh booking vs. a retry.
+
+    python -m benchmarks.bench_booking_idempotency --bookings 50 --duplicates 20 --latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.stub_servers import AIRPORTS, start_stub_server
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--bookings", type=int, default=50, help="distinct bookings")
+parser.add_argument("--duplicates", type=int, default=20, help="concurrent copies of each call")
+parser.add_argument("--retries", type=int, default=5, help="sequential retries of each call")
+parser.add_argument("--latency", type=float, default=0.2)
+args = parser.parse_args()
+
+server, base_url = start_stub_server(latency=args.latency)
+os.environ["AVIATIONSTACK_URL"] = f"{base_url}/v1/flights"
+os.environ["TRAVEL_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="travel-bench-"), "bookings.db")
+
+from core.storage import get_db  # noqa: E402
+from core.travel import book_flight_impl, book_hotel_impl, booking_flight, flight_schedule_cache  # noqa: E402
+
+
+def calls(i):
+    origin, destination = AIRPORTS[i % len(AIRPORTS)], AIRPORTS[(i + 1) % len(AIRPORTS)]
+    user, session = f"user-{i % 10}", f"session-{i}"
+    return (
+        lambda: book_flight_impl(origin, destination, "2025-09-15", 50000, user, session),
+        lambda: book_hotel_impl(destination, 1 + i % 3, 4000, user, session),
+    )
+
+
+async def main():
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        call() for i in range(args.bookings) for call in calls(i) for _ in range(args.duplicates)
+    ))
+    booked = sum(r["status"] == "booked" for r in results) // args.duplicates
+    burst = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.retries):
+        for i in range(args.bookings):
+            for call in calls(i):
+                await call()
+    retry = (time.perf_counter() - start) / (args.retries * args.bookings * 2)
+
+    # A fresh booking for comparison: new session, cached schedule.
+    start = time.perf_counter()
+    for i in range(args.bookings):
+        await book_flight_impl(AIRPORTS[0], AIRPORTS[1], "2025-09-15", 50000, "fresh", f"fresh-{i}")
+    fresh = (time.perf_counter() - start) / args.bookings
+
+    rows = sum(shard.fetchone_sync("SELECT COUNT(*) FROM bookings")[0] for shard in get_db().shards)
+    issued = args.bookings * 2 * (args.duplicates + args.retries)
+    print(f"calls issued:       {issued} ({args.bookings * 2} distinct) in {burst * 1000:.0f}ms burst")
+    print(f"rows written:       {rows - args.bookings} (expected {booked}; routes without flights book nothing)")
+    print(f"coalesced calls:    {booking_flight.coalesced}")
+    print(f"upstream requests:  {server.RequestHandlerClass.requests_seen['flights']}")
+    print(f"retry latency:      {retry * 1e6:8.1f}us per call")
+    print(f"fresh booking:      {fresh * 1e6:8.1f}us per call")
+    print(f"flight cache:       {flight_schedule_cache.stats()}")
+
+
+asyncio.run(main())
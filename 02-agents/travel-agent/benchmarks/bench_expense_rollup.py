@@ -0,0 +1,115 @@
+"""Summary and policy-check latency over a large seeded expense history.
+
+Compares the rollup/partial-index path with the original full-scan-and-fold
+queries on the same database. Then checks that the rollups, both maintained
+on insert and rebuilt by the schema backfill, match a plain SUM over the
+expenses, including rows with a NULL session, type or amount; exits 1 if not.
+
+    python -m benchmarks.bench_expense_rollup --rows 1000000 --sessions 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--rows", type=int, default=1_000_000)
+parser.add_argument("--sessions", type=int, default=200)
+parser.add_argument("--queries", type=int, default=200)
+args = parser.parse_args()
+
+os.environ["TRAVEL_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="travel-bench-"), "rollup.db")
+
+from core.policy import POLICY_LIMIT  # noqa: E402
+from core.storage import get_db  # noqa: E402
+from core.travel import (  # noqa: E402
+    _init_shard,
+    init_db,
+    insert_expenses,
+    summarize_expenses_impl,
+    check_policy_impl,
+)
+
+CATEGORIES = ["taxi", "meal", "hotel", "flight", "visa", "misc", "train", "fuel"]
+LEGACY_QUERY = (
+    "SELECT type, amount FROM expenses NOT INDEXED WHERE user_id = ? AND session_id = ?"
+)
+
+
+def seed():
+    rng = random.Random(42)
+    batch = []
+    for i in range(args.rows):
+        s = i % args.sessions
+        batch.append((f"user-{s % 50}", f"session-{s}", rng.choice(CATEGORIES),
+                      round(rng.expovariate(1 / 1500), 2), "2025-09-15"))
+        if len(batch) == 50_000:
+            get_db().transaction(insert_expenses, batch)
+            batch = []
+    if batch:
+        get_db().transaction(insert_expenses, batch)
+
+
+def legacy(user_id, session_id):
+    rows = get_db().fetchall_sync(LEGACY_QUERY, (user_id, session_id))
+    categories = {}
+    for t, a in rows:
+        categories[t] = categories.get(t, 0) + a
+    violations = [(t, a) for t, a in rows if a > POLICY_LIMIT]
+    return sum(a for _, a in rows), categories, violations
+
+
+async def main():
+    init_db()
+    start = time.perf_counter()
+    seed()
+    print(f"seeded {args.rows} expenses in {time.perf_counter() - start:.1f}s")
+
+    keys = [(f"user-{s % 50}", f"session-{s}") for s in range(args.sessions)]
+    start = time.perf_counter()
+    for i in range(args.queries):
+        legacy(*keys[i % len(keys)])
+    legacy_ms = (time.perf_counter() - start) * 1000 / args.queries
+
+    start = time.perf_counter()
+    for i in range(args.queries):
+        await summarize_expenses_impl(*keys[i % len(keys)])
+        await check_policy_impl(*keys[i % len(keys)])
+    rollup_ms = (time.perf_counter() - start) * 1000 / args.queries
+
+    print(f"full scan + fold:     {legacy_ms:8.2f}ms per summarize+check")
+    print(f"rollup + partial idx: {rollup_ms:8.2f}ms per summarize+check")
+
+    # Rows the baseline schema accepted: NULL session, type and amount.
+    get_db().transaction(insert_expenses, [
+        ("user-0", None, "taxi", 10.0, "2025-09-15"),
+        ("user-0", "session-0", None, 20.0, "2025-09-15"),
+        ("user-0", "session-0", "meal", None, "2025-09-15"),
+    ])
+    maintained = rollup_totals()
+    for shard in get_db().shards:
+        shard.execute_sync("DELETE FROM expense_rollups")
+        _init_shard(shard)
+    backfilled = rollup_totals()
+    expected = expense_totals()
+    ok = maintained == backfilled == expected
+    print(f"rollups vs SUM over expenses ({len(expected)} user/session/type groups): "
+          f"{'OK' if ok else 'FAILED'}")
+    if not ok:
+        raise SystemExit(1)
+
+
+def rollup_totals():
+    return sorted(row for shard in get_db().shards for row in shard.fetchall_sync(
+        "SELECT user_id, session_id, type, ROUND(total, 2), count FROM expense_rollups"))
+
+
+def expense_totals():
+    return sorted(row for shard in get_db().shards for row in shard.fetchall_sync(
+        "SELECT COALESCE(user_id, ''), COALESCE(session_id, ''), COALESCE(type, ''), "
+        "ROUND(COALESCE(SUM(amount), 0), 2), COUNT(*) FROM expenses GROUP BY 1, 2, 3"))
+
+
+asyncio.run(main())
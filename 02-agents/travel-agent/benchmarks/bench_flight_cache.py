@@ -0,0 +1,57 @@
+"""Flight lookups through FlightScheduleCache against a slow stub AviationStack.
+
+    python -m benchmarks.bench_flight_cache --lookups 500 --latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from benchmarks.stub_servers import start_stub_server, AIRPORTS
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--lookups", type=int, default=500)
+parser.add_argument("--latency", type=float, default=0.2)
+args = parser.parse_args()
+
+server, base_url = start_stub_server(latency=args.latency)
+os.environ["AVIATIONSTACK_URL"] = f"{base_url}/v1/flights"
+
+from core.travel import flight_schedule_cache  # noqa: E402
+
+
+async def main():
+    routes = [(a, b, "2025-09-15") for a in AIRPORTS for b in AIRPORTS if a != b]
+    rng = random.Random(7)
+    start = time.perf_counter()
+    # First wave is fully concurrent so every miss shares a single upstream fetch.
+    await asyncio.gather(*(
+        flight_schedule_cache.lookup(*rng.choice(routes)) for _ in range(args.lookups)
+    ))
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(args.lookups):
+        await flight_schedule_cache.lookup(*rng.choice(routes))
+    warm = time.perf_counter() - start
+    print(f"cold concurrent: {cold * 1000:8.1f}ms for {args.lookups} lookups")
+    print(f"warm sequential: {warm * 1e6 / args.lookups:8.1f}us per lookup")
+    print(f"upstream requests: {server.RequestHandlerClass.requests_seen['flights']}")
+    print(f"stats: {flight_schedule_cache.stats()}")
+
+    # A caller cancelled mid-fetch must not take down the callers sharing its fetch.
+    flight_schedule_cache.invalidate()
+    leader = asyncio.ensure_future(flight_schedule_cache.lookup(*routes[0]))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight_schedule_cache.lookup(*routes[0]))
+    await asyncio.sleep(args.latency / 2)
+    leader.cancel()
+    flights = await follower
+    ok = leader.cancelled() and not follower.cancelled() and bool(flights)
+    print(f"cancel check: leader cancelled={leader.cancelled()}, follower got {len(flights)} flights: "
+          f"{'OK' if ok else 'FAILED'}")
+    if not ok:
+        raise SystemExit(1)
+
+
+asyncio.run(main())
@@ -0,0 +1,58 @@
+"""Concurrent Slack/AviationStack calls against a slow local stub server.
+
+Reports wall time and the worst event-loop stall while the calls are in
+flight; with blocking HTTP the stall equals the total request time.
+
+    python -m benchmarks.bench_http --calls 50 --latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.stub_servers import start_stub_server
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--calls", type=int, default=50)
+parser.add_argument("--latency", type=float, default=0.2)
+args = parser.parse_args()
+
+server, base_url = start_stub_server(latency=args.latency)
+os.environ["TRAVEL_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="travel-bench-"), "http.db")
+os.environ["AVIATIONSTACK_URL"] = f"{base_url}/v1/flights"
+os.environ["SLACK_API_URL"] = f"{base_url}/api"
+os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-stub")
+os.environ.setdefault("SLACK_CHANNEL_ID", "C-stub")
+
+from core.travel import init_db, send_reminder_impl, book_flight_impl  # noqa: E402
+
+
+async def loop_lag_probe(stop, interval=0.01):
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run(label, make_call):
+    stop = asyncio.Event()
+    probe = asyncio.create_task(loop_lag_probe(stop))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(make_call(i) for i in range(args.calls)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lag = await probe
+    ok = sum(1 for r in results if r.get("status") in ("reminder_sent", "booked", "no flights found"))
+    print(f"{label:>10}: {args.calls} calls in {elapsed:6.2f}s  ok={ok}  worst loop stall={lag * 1000:6.1f}ms")
+
+
+async def main():
+    init_db()
+    await run("slack", lambda i: send_reminder_impl(f"user-{i}", "bench"))
+    await run("flights", lambda i: book_flight_impl("DEL", "BOM", "2025-09-15", 5000, f"user-{i}", "s"))
+
+
+asyncio.run(main())
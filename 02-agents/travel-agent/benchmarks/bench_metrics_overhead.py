@@ -0,0 +1,131 @@
+"""Overhead of the hot-path instrumentation (core.metrics).
+
+Measures the per-call cost of a Timer around a no-op coroutine, then the
+throughput of the expense tools with instrumentation on vs. swapped for a
+pass-through, optionally with the sampling profiler running. The modes run
+back to back in each of ``--rounds`` rounds; the overhead of each round is
+taken against that round's bare run, and the median with a bootstrap 95%
+confidence interval is reported, since single runs vary by several percent.
+Exits 1 when ``Timer.wrap`` adds more than ``--budget-ns`` per call. Run
+from the travel-agent directory:
+
+    python -m benchmarks.bench_metrics_overhead --calls 200000 --tasks 2000 --rounds 21
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--calls", type=int, default=200_000)
+parser.add_argument("--tasks", type=int, default=2000)
+parser.add_argument("--concurrency", type=int, default=50)
+parser.add_argument("--rounds", type=int, default=21, help="rounds per mode; the median overhead is reported")
+parser.add_argument("--micro-samples", type=int, default=20)
+parser.add_argument("--budget-ns", type=float, default=1500, help="fail if Timer.wrap adds more per call")
+parser.add_argument("--profile-hz", type=float, default=0, help="also run the sampling profiler")
+args = parser.parse_args()
+
+os.environ["TRAVEL_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="travel-bench-"), "metrics.db")
+
+import core.storage  # noqa: E402
+import tools.travel_tools as travel_tools  # noqa: E402
+from core.context import task_context  # noqa: E402
+from core.metrics import REGISTRY, SamplingProfiler, Timer  # noqa: E402
+
+
+async def bare_run(self, timed, fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+
+async def noop():
+    return None
+
+
+async def micro():
+    timer = Timer("bench", "op")
+    timed = timer.wrap(noop)
+    calls = (("bare", noop), ("wrap", timed), ("track", lambda: timer.track("noop", noop())))
+    samples = {name: [] for name, _ in calls}
+    for _ in range(args.micro_samples):
+        # Interleaved, and the fastest sample kept: on a busy host the other
+        # samples measure the host.
+        for name, call in calls:
+            start = time.perf_counter()
+            for _ in range(args.calls // args.micro_samples):
+                await call()
+            samples[name].append((time.perf_counter() - start) / (args.calls // args.micro_samples) * 1e9)
+    return {name: min(values) for name, values in samples.items()}
+
+
+def median_ci(values, resamples=2000):
+    """Median of ``values`` and a bootstrap 95% confidence interval around it."""
+    rng = random.Random(0)
+    medians = sorted(statistics.median(rng.choices(values, k=len(values))) for _ in range(resamples))
+    return statistics.median(values), medians[int(resamples * 0.025)], medians[int(resamples * 0.975)]
+
+
+async def tools_throughput(log_expense, summarize):
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def task(i):
+        async with sem:
+            with task_context(f"user-{i % 50}", f"session-{i % 200}"):
+                await log_expense("taxi", 100.0 + i % 7, "2025-01-01")
+                await summarize()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(task(i) for i in range(args.tasks)))
+    return args.tasks / (time.perf_counter() - start)
+
+
+async def main():
+    ns = await micro()
+    wrap_ns = ns["wrap"] - ns["bare"]
+    print(f"no-op coroutine: bare {ns['bare']:.0f}ns, Timer.wrap +{wrap_ns:.0f}ns, "
+          f"Timer.track +{ns['track'] - ns['bare']:.0f}ns per call (best of {args.micro_samples}); "
+          f"budget +{args.budget_ns:.0f}ns: {'OK' if wrap_ns <= args.budget_ns else 'FAILED'}")
+
+    raw_log = travel_tools.ta_log_expense.__wrapped__
+    raw_summarize = travel_tools.ta_summarize_expenses.__wrapped__
+    db_run = core.storage.Database._run
+
+    await tools_throughput(raw_log, raw_summarize)  # warm up the pool and schema
+    modes = ("instrumented", "profiled") if args.profile_hz else ("instrumented",)
+    overhead = {mode: [] for mode in modes}
+    throughput = {mode: [] for mode in ("bare", *modes)}
+    for i in range(args.rounds):
+        # Alternate the order so table growth within a round favours neither mode
+        for mode in ("bare", *modes) if i % 2 else (*modes, "bare"):
+            if mode == "bare":
+                core.storage.Database._run = bare_run
+                throughput[mode].append(await tools_throughput(raw_log, raw_summarize))
+                core.storage.Database._run = db_run
+                continue
+            profiler = SamplingProfiler(args.profile_hz).start() if mode == "profiled" else None
+            throughput[mode].append(await tools_throughput(travel_tools.ta_log_expense,
+                                                           travel_tools.ta_summarize_expenses))
+            if profiler is not None:
+                profiler.stop()
+        for mode in modes:
+            overhead[mode].append((throughput["bare"][-1] - throughput[mode][-1]) / throughput["bare"][-1] * 100)
+
+    bare = statistics.median(throughput["bare"])
+    for mode in modes:
+        label = f"{mode} ({args.profile_hz:g} Hz)" if mode == "profiled" else mode
+        median, low, high = median_ci(overhead[mode])
+        print(f"expense tools, {label}: {statistics.median(throughput[mode]):,.0f} tasks/s vs bare {bare:,.0f}; "
+              f"overhead median {median:+.1f}% (95% CI {low:+.1f}% to {high:+.1f}%, {args.rounds} rounds)")
+
+    start = time.perf_counter()
+    body = REGISTRY.render()
+    print(f"scrape: {len(body.splitlines())} lines rendered in {(time.perf_counter() - start) * 1000:.2f}ms")
+    if wrap_ns > args.budget_ns:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
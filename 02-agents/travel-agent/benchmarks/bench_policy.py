@@ -0,0 +1,169 @@
+"""Policy checks over a large expense history: Python row loop vs. compiled SQL.
+
+Seeds ``--rows`` expenses (plus hotel bookings) spread over many sessions,
+with one long-running session holding ``--session-rows`` of them, and
+evaluates a six-rule policy (two category caps, a seasonal cap, a trip budget,
+a nightly hotel rate and a fiscal-year date window) on that session three
+ways: fetching every row and applying the rules in Python, a full compiled-SQL
+evaluation, and an incremental check after new expenses arrive. Checks all
+three agree.
+
+    python -m benchmarks.bench_policy --rows 1000000 --session-rows 50000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--rows", type=int, default=1_000_000)
+parser.add_argument("--session-rows", type=int, default=50_000)
+parser.add_argument("--rounds", type=int, default=200, help="append-then-check rounds")
+parser.add_argument("--append", type=int, default=5, help="expenses logged per round")
+args = parser.parse_args()
+
+os.environ["TRAVEL_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="travel-bench-"), "policy.db")
+
+from core.policy import Policy, PolicyEngine  # noqa: E402
+from core.storage import get_db  # noqa: E402
+from core.travel import init_db, insert_expenses  # noqa: E402
+
+RULES = [
+    {"name": "meals", "kind": "cap", "max": 80, "categories": ["meal"]},
+    {"name": "taxis", "kind": "cap", "max": 150, "categories": ["taxi"]},
+    {"name": "summer-flights", "kind": "cap", "max": 1500, "categories": ["flight"],
+     "from": "2025-06-01", "to": "2025-08-31"},
+    {"name": "trip-budget", "kind": "trip_total", "max": 250_000},
+    {"name": "hotel-nightly", "kind": "nightly_rate", "max": 300, "destinations": ["NYC", "LON"]},
+    {"name": "fiscal-year", "kind": "date_window", "from": "2025-01-01", "to": "2025-12-31"},
+]
+CATEGORIES = ["meal", "taxi", "flight", "train", "conference"]
+DESTINATIONS = ["NYC", "LON", "PAR", "TLV"]
+USER, SESSION = "user-big", "session-big"
+
+INSERT_HOTEL = '''
+    INSERT INTO bookings (user_id, session_id, type, destination, nights, price)
+    VALUES (?, ?, 'hotel', ?, ?, ?)
+'''
+SELECT_ALL_EXPENSES = "SELECT type, amount, date FROM expenses WHERE user_id = ? AND session_id = ? ORDER BY id"
+SELECT_ALL_HOTELS = '''
+    SELECT destination, price, nights FROM bookings
+    WHERE user_id = ? AND session_id = ? AND type = 'hotel' ORDER BY id
+'''
+
+rng = random.Random(7)
+
+
+def expense(user, session):
+    # About 1% of expenses fall in December 2024, outside the fiscal year.
+    month = rng.randrange(-1, 96) // 8 + 1
+    date = f"2024-12-{rng.randrange(1, 29):02d}" if month < 1 else f"2025-{month:02d}-{rng.randrange(1, 29):02d}"
+    return user, session, rng.choice(CATEGORIES), round(rng.expovariate(1 / 120), 2), date
+
+
+def _hotels(conn, rows):
+    conn.executemany(INSERT_HOTEL, rows)
+
+
+def seed():
+    db = get_db()
+    batch = []
+    for i in range(args.rows - args.session_rows):
+        batch.append(expense(f"user-{i % 1000}", f"session-{i // 40}"))
+        if len(batch) == 100_000:
+            db.transaction(insert_expenses, batch)
+            batch = []
+    for _ in range(args.session_rows):
+        batch.append(expense(USER, SESSION))
+        if len(batch) == 100_000:
+            db.transaction(insert_expenses, batch)
+            batch = []
+    db.transaction(insert_expenses, batch)
+    db.transaction(_hotels, [
+        (USER, SESSION, rng.choice(DESTINATIONS), 1 + i % 4, round(rng.uniform(120, 450), 2))
+        for i in range(args.session_rows // 100)
+    ])
+
+
+def python_check(policy):
+    """Fetch the whole session and apply every rule per row in Python."""
+    db = get_db()
+    expenses = db.fetchall_sync(SELECT_ALL_EXPENSES, (USER, SESSION))
+    hotels = db.fetchall_sync(SELECT_ALL_HOTELS, (USER, SESSION))
+    violations = []
+    for t, amount, date in expenses:
+        for rule in policy.expense_rules:
+            if rule.categories and t not in rule.categories:
+                continue
+            if rule.kind == "cap":
+                hit = amount > rule.max and (not rule.start or date >= rule.start) \
+                    and (not rule.end or date <= rule.end)
+            else:
+                hit = (rule.start and date < rule.start) or (rule.end and date > rule.end)
+            if hit:
+                violations.append(rule.name)
+    for destination, price, nights in hotels:
+        for rule in policy.booking_rules:
+            if (not rule.destinations or destination in rule.destinations) and price > rule.max:
+                violations.append(rule.name)
+    for rule in policy.trip_rules:
+        if sum(a for t, a, _ in expenses if not rule.categories or t in rule.categories) > rule.max:
+            violations.append(rule.name)
+    return violations
+
+
+def names(result):
+    return [v["rule"] for v in result["violations"]]
+
+
+async def main():
+    init_db()
+    policy = Policy(RULES)
+    engine = PolicyEngine(policy)
+    db = get_db()
+    db.transaction(engine.install)
+    started = time.perf_counter()
+    seed()
+    print(f"seeded {args.rows:,} expenses ({args.session_rows:,} in one session) "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    reference = python_check(policy)
+    python_s = time.perf_counter() - started
+    started = time.perf_counter()
+    full = await PolicyEngine(policy).check(db, USER, SESSION)
+    sql_s = time.perf_counter() - started
+    await engine.check(db, USER, SESSION)
+    started = time.perf_counter()
+    warm = await engine.check(db, USER, SESSION)
+    warm_s = time.perf_counter() - started
+    print(f"one session, {len(reference)} violations:")
+    print(f"  python row loop        {python_s * 1e3:9.2f} ms")
+    print(f"  compiled SQL (cold)    {sql_s * 1e3:9.2f} ms")
+    print(f"  incremental (no new)   {warm_s * 1e3:9.2f} ms")
+
+    rounds = {"full re-check": [], "incremental": []}
+    mismatches = 0
+    for _ in range(args.rounds):
+        db.transaction(insert_expenses, [expense(USER, SESSION) for _ in range(args.append)])
+        started = time.perf_counter()
+        full = await PolicyEngine(policy).check(db, USER, SESSION)
+        rounds["full re-check"].append(time.perf_counter() - started)
+        started = time.perf_counter()
+        incremental = await engine.check(db, USER, SESSION)
+        rounds["incremental"].append(time.perf_counter() - started)
+        mismatches += Counter(names(full)) != Counter(names(incremental))
+    mismatches += Counter(python_check(policy)) != Counter(names(incremental))
+    print(f"{args.rounds} rounds of {args.append} new expenses then a check:")
+    for label, times in rounds.items():
+        times.sort()
+        print(f"  {label:<22} p50 {times[len(times) // 2] * 1e3:8.2f} ms  "
+              f"p99 {times[int(len(times) * 0.99)] * 1e3:8.2f} ms")
+    print(f"mismatches: {mismatches}; {engine.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
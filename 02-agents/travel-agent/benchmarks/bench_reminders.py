@@ -0,0 +1,47 @@
+"""Daily-reminder fan-out to many DB users against a stub Slack API.
+
+    python -m benchmarks.bench_reminders --users 20000 --rate 1000 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.stub_servers import spawn_stub_server
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--users", type=int, default=20000)
+parser.add_argument("--rate", type=float, default=500)
+parser.add_argument("--concurrency", type=int, default=20)
+parser.add_argument("--latency", type=float, default=0.05)
+args = parser.parse_args()
+
+stub, base_url = spawn_stub_server(latency=args.latency)
+os.environ["TRAVEL_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="travel-bench-"), "reminders.db")
+os.environ["SLACK_API_URL"] = f"{base_url}/api"
+os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-stub")
+os.environ.setdefault("SLACK_CHANNEL_ID", "C-stub")
+os.environ["TRAVEL_HTTP_PER_HOST_LIMIT"] = str(args.concurrency)
+
+from core.storage import get_db  # noqa: E402
+from core.travel import init_db, insert_expenses, list_reminder_recipients, send_reminders_impl  # noqa: E402
+
+
+async def main():
+    init_db()
+    get_db().transaction(insert_expenses, [
+        (f"user-{i}", "s", "taxi", 10.0, "2025-09-15") for i in range(args.users)
+    ])
+    start = time.perf_counter()
+    user_ids = await list_reminder_recipients()
+    result = await send_reminders_impl(user_ids, "bench", rate=args.rate, concurrency=args.concurrency)
+    elapsed = time.perf_counter() - start
+    print(f"{result['sent']} sent / {result['failed']} failed to {len(user_ids)} users "
+          f"in {elapsed:.1f}s ({result['sent'] / elapsed:.0f} msg/s, limit {args.rate:.0f}/s)")
+    serial = len(user_ids) * args.latency
+    print(f"serial loop at {args.latency * 1000:.0f}ms per call would take ~{serial:.0f}s")
+    stub.terminate()
+
+
+asyncio.run(main())
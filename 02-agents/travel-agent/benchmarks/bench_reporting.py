@@ -0,0 +1,148 @@
+"""Org-wide spend report and export over a large synthetic expenses table.
+
+Seeds ``--rows`` expenses (and a tenth as many bookings) into a fresh
+database, then compares one columnar pass of ``core.reporting.spend_report``
+(group by user, category, month, user+month) against the same chunks
+aggregated with a Python dict loop, checks both agree, and times CSV and
+Parquet exports. Reports rows/sec and peak RSS growth of each step (Linux, via
+``/proc/self/status``).
+
+    python -m benchmarks.bench_reporting --rows 10000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--rows", type=int, default=10_000_000)
+parser.add_argument("--users", type=int, default=5000)
+parser.add_argument("--chunk-rows", type=int, default=200_000)
+parser.add_argument("--shards", type=int, default=1)
+args = parser.parse_args()
+
+workdir = tempfile.mkdtemp(prefix="travel-report-")
+os.environ["TRAVEL_DB_PATH"] = os.path.join(workdir, "report.db")
+os.environ["TRAVEL_DB_SHARDS"] = str(args.shards)
+
+from core.reporting import export_table, spend_report, stream_rows  # noqa: E402
+from core.storage import get_db  # noqa: E402
+from core.travel import INSERT_EXPENSE, init_db  # noqa: E402
+
+CATEGORIES = ["flight", "hotel", "meal", "taxi", "train", "conference"]
+DESTINATIONS = ["LON", "NYC", "PAR", "TLV", "SFO", "BER", "TYO", "SIN"]
+GROUP_BYS = (("user",), ("category",), ("month",), ("user", "month"))
+
+INSERT_BOOKING = '''
+    INSERT INTO bookings (user_id, session_id, type, destination, date, nights, price)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def _insert(conn, sql, rows):
+    conn.executemany(sql, rows)
+
+
+def seed():
+    rng = random.Random(42)
+    db = get_db()
+    dates = [f"2025-{m:02d}-{d:02d}" for m in range(1, 13) for d in range(1, 29)]
+
+    def write(sql, n, make):
+        batch = {}
+        for i in range(n):
+            row = make(i)
+            batch.setdefault(db.for_user(row[0]), []).append(row)
+            if i % 100_000 == 99_999:
+                for shard, rows in batch.items():
+                    shard.transaction(_insert, sql, rows)
+                batch = {}
+        for shard, rows in batch.items():
+            shard.transaction(_insert, sql, rows)
+
+    write(INSERT_EXPENSE, args.rows, lambda i: (
+        f"user-{rng.randrange(args.users)}", f"session-{i // 20}", rng.choice(CATEGORIES),
+        round(rng.expovariate(1 / 150), 2), rng.choice(dates)))
+    write(INSERT_BOOKING, args.rows // 10, lambda i: (
+        f"user-{rng.randrange(args.users)}", f"session-{i // 2}", "hotel" if i % 2 else "flight",
+        rng.choice(DESTINATIONS), rng.choice(dates), 1 + i % 5 if i % 2 else None,
+        round(rng.uniform(80, 1200), 2)))
+
+
+def dict_loop_report():
+    """The summarize_expenses approach, applied to every row."""
+    groups = {by: {} for by in GROUP_BYS}
+    for rows in stream_rows("expenses", ("user", "category", "amount", "month"), args.chunk_rows):
+        for _, user, category, amount, month in rows:
+            values = {"user": user, "category": category, "month": month}
+            for by in GROUP_BYS:
+                key = tuple(values[name] for name in by)
+                group = groups[by].setdefault(key, [0.0, 0])
+                group[0] += amount
+                group[1] += 1
+    return groups
+
+
+def rss_mb(field):
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field)) / 1024
+
+
+def reset_peak_rss():
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+def timed(label, rows, fn):
+    reset_peak_rss()
+    before = rss_mb("VmRSS")
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<22} {elapsed:7.2f}s  {rows / elapsed:>12,.0f} rows/s  "
+          f"peak RSS +{rss_mb('VmHWM') - before:6.1f} MB")
+    return result
+
+
+def main():
+    init_db()
+    started = time.perf_counter()
+    seed()
+    db_mb = sum(os.path.getsize(os.path.join(workdir, f)) for f in os.listdir(workdir) if f.endswith(".db")) / 2**20
+    print(f"seeded {args.rows:,} expenses + {args.rows // 10:,} bookings over {args.shards} shard(s) "
+          f"in {time.perf_counter() - started:.1f}s ({db_mb:,.0f} MB)")
+
+    print(f"expenses report, {len(GROUP_BYS)} group-bys, {args.chunk_rows:,}-row chunks:")
+    columnar = timed("columnar (numpy)", args.rows,
+                     lambda: spend_report("expenses", GROUP_BYS, args.chunk_rows))
+    loop = timed("python dict loop", args.rows, dict_loop_report)
+    mismatches = 0
+    for by in GROUP_BYS:
+        got = {tuple(row[name] for name in by): (row["total"], row["count"])
+               for row in columnar["by"]["+".join(by)]}
+        want = loop[by]
+        mismatches += len(got.keys() ^ want.keys()) + sum(
+            got[k][1] != c or abs(got[k][0] - t) > 1e-6 * max(1.0, abs(t))
+            for k, (t, c) in want.items() if k in got)
+    print("  groups: " + ", ".join(f"{k} {len(v)}" for k, v in columnar["by"].items())
+          + f"; mismatches vs dict loop: {mismatches}")
+
+    bookings = timed("bookings by dest+month", args.rows // 10,
+                     lambda: spend_report("bookings", (("destination", "month"),), args.chunk_rows))
+    top = bookings["by"]["destination+month"][0]
+    print(f"  top destination/month: {top['destination']} {top['month']} {top['total']:,.0f}")
+
+    print("exports:")
+    for fmt in ("csv", "parquet"):
+        path = os.path.join(workdir, f"expenses.{fmt}")
+        try:
+            timed(f"expenses -> {fmt}", args.rows, lambda: export_table("expenses", path, chunk_rows=args.chunk_rows))
+        except ImportError as e:
+            print(f"  expenses -> {fmt:<11} skipped: {e}")
+            continue
+        print(f"  {'':<22} {os.path.getsize(path) / 2**20:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Expense write throughput vs. shard count, with several writer processes.
+
+Each writer process stands in for one worker container: it opens the same
+(sharded) database and logs expenses for users spread across all shards
+through ``log_expense_impl``. For every shard count the total commits/sec is
+reported, plus a cross-shard summary check. Shards only add throughput when
+the single-file write lock is the limit: with fewer cores than writer
+processes the run is CPU-bound and the curve stays flat.
+
+    python -m benchmarks.bench_sharding --shards 1,2,4,8 --processes 4 --writes 2000
+"""
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--shards", default="1,2,4,8", help="comma-separated shard counts")
+parser.add_argument("--processes", type=int, default=4, help="writer processes")
+parser.add_argument("--writes", type=int, default=2000, help="expenses per process")
+parser.add_argument("--concurrency", type=int, default=32, help="in-flight writes per process")
+parser.add_argument("--users", type=int, default=1000)
+parser.add_argument("--synchronous", default="NORMAL", help="SQLite synchronous pragma (FULL fsyncs every commit)")
+
+
+def configure(path, shards, synchronous):
+    os.environ["TRAVEL_DB_PATH"] = path
+    os.environ["TRAVEL_DB_SHARDS"] = str(shards)
+    os.environ["TRAVEL_DB_BACKEND"] = "sharded"
+    import core.storage
+    core.storage.PRAGMAS = tuple(
+        f"PRAGMA synchronous={synchronous}" if p.startswith("PRAGMA synchronous") else p
+        for p in core.storage.PRAGMAS
+    )
+
+
+def writer(worker, path, shards, options, start, done):
+    configure(path, shards, options.synchronous)
+    from core.travel import log_expense_impl
+
+    async def run():
+        sem = asyncio.Semaphore(options.concurrency)
+
+        async def one(i):
+            async with sem:
+                user = f"user-{(worker * options.writes + i) % options.users}"
+                await log_expense_impl("taxi", 100.0 + i % 50, "2025-09-15", user, "s1")
+
+        start.wait()
+        began = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(options.writes)))
+        done.put(time.perf_counter() - began)
+
+    asyncio.run(run())
+
+
+def measure(shards, options):
+    path = os.path.join(tempfile.mkdtemp(prefix="travel-shards-"), "travel.db")
+    ctx = mp.get_context("spawn")
+    start, done = ctx.Event(), ctx.Queue()
+    procs = [
+        ctx.Process(target=writer, args=(w, path, shards, options, start, done))
+        for w in range(options.processes)
+    ]
+    for proc in procs:
+        proc.start()
+    # Let every writer import and initialise its schema before the clock starts.
+    time.sleep(3)
+    began = time.perf_counter()
+    start.set()
+    for _ in procs:
+        done.get()
+    elapsed = time.perf_counter() - began
+    for proc in procs:
+        proc.join()
+    return path, options.processes * options.writes / elapsed
+
+
+def main():
+    options = parser.parse_args()
+    baseline = None
+    print(f"{options.processes} writer processes on {os.cpu_count()} CPUs, synchronous={options.synchronous}")
+    print(f"{'shards':>6} {'writes/s':>10} {'speedup':>8}")
+    for shards in (int(v) for v in options.shards.split(",")):
+        path, rate = measure(shards, options)
+        baseline = baseline or rate
+        print(f"{shards:>6} {rate:>10,.0f} {rate / baseline:>7.2f}x")
+
+    configure(path, shards, options.synchronous)
+    from core.travel import summarize_all_expenses_impl
+    summary = asyncio.run(summarize_all_expenses_impl())
+    expected = options.processes * options.writes
+    print(f"cross-shard summary over {summary['shards']} shards: {summary['count']} expenses "
+          f"(expected {expected}), {summary['users']} users, total ₹{summary['total']:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
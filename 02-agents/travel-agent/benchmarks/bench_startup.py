@@ -0,0 +1,192 @@
+"""Cold-start time of the travel agent: imports, boot and time to first task.
+
+Each run is a fresh interpreter with a fresh database, as in a scale-to-zero
+container. It imports ``xpander_handler`` (with the xpander decorators
+replaced so no event listener starts), runs the ``@on_boot`` hook, then
+serves two tasks through the real handler with a scripted model and the local
+AviationStack/Slack stubs. Times are measured from process launch, except the
+first task's latency, which starts when the task arrives. ``--idle`` inserts a
+pause between boot and the first task, as when a worker waits for work after
+starting. With ``--importtime``, it also lists the slowest top-level imports.
+
+    python -m benchmarks.bench_startup --runs 5 --json startup.json
+    # later: fail (exit 1) if import or first-task times rise by more than 20%
+    python -m benchmarks.bench_startup --runs 5 --baseline startup.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--runs", type=int, default=5)
+parser.add_argument("--idle", type=float, default=0.0,
+                    help="seconds between boot and the first task (left out of the times)")
+parser.add_argument("--importtime", action="store_true", help="show the slowest top-level imports")
+parser.add_argument("--json", help="write results to this file")
+parser.add_argument("--baseline", help="compare with results written by --json")
+parser.add_argument("--tolerance", type=float, default=0.2)
+parser.add_argument("--mode", choices=["child"], help=argparse.SUPPRESS)
+args = parser.parse_args()
+
+PHASES = ("sdk", "import", "boot", "first_task", "second_task", "first_task_latency")
+LABELS = {
+    "sdk": "python + xpander_sdk",
+    "import": "handler imported",
+    "boot": "boot hook done",
+    "first_task": "first task done",
+    "second_task": "second task done",
+    "first_task_latency": "first task latency",
+}
+
+
+def _passthrough(fn=None, **kwargs):
+    return fn if fn is not None else (lambda f: f)
+
+
+def child():
+    launched = float(os.environ["BENCH_LAUNCHED_AT"])
+    marks, excluded = {}, 0.0
+
+    def mark(phase):
+        marks[phase] = time.time() - launched - excluded
+
+    import xpander_sdk
+    xpander_sdk.on_task = xpander_sdk.on_boot = _passthrough
+    mark("sdk")
+    import xpander_handler
+    mark("import")
+
+    # Benchmark scaffolding, not part of the agent's own startup.
+    helpers_started = time.time()
+    from datetime import datetime, timezone
+    from typing import Optional
+
+    from loguru import logger
+    from xpander_sdk import Configuration, Task
+    from xpander_sdk.modules.tasks.models.task import AgentExecutionInput
+
+    from benchmarks.fake_model import FakeModel, plan_message
+    logger.remove()
+
+    class SyntheticTask(Task):
+        user_id: Optional[str] = None
+        session_id: Optional[str] = None
+
+    class FakeAgentCache:
+        async def aget_args(self, task, **kwargs):
+            return {"name": "travel-agent", "model": FakeModel(), "instructions": "", "tools": []}
+
+    xpander_handler.agent_cache = FakeAgentCache()
+    configuration = Configuration(api_key="offline", organization_id="startup")
+
+    def make_task(i):
+        calls = [
+            {"tool": "ta_book_flight", "args": {"origin": "DEL", "destination": "BOM",
+                                                "date": "2025-09-15", "budget": 60000}},
+            {"tool": "ta_log_expense", "args": {"expense_type": "taxi", "amount": 120, "date": "2025-09-15"}},
+            {"tool": "ta_check_policy_violations", "args": {}},
+            {"tool": "ta_summarize_expenses", "args": {}},
+        ]
+        return SyntheticTask(
+            id=f"task-{i}", agent_id="travel-agent", organization_id="startup",
+            created_at=datetime.now(timezone.utc), configuration=configuration,
+            input=AgentExecutionInput(text=plan_message("Plan my trip", calls)),
+            user_id=f"user-{i}", session_id=f"session-{i}",
+        )
+
+    tasks = [make_task(0), make_task(1)]
+    excluded += time.time() - helpers_started
+
+    async def run():
+        nonlocal excluded
+        await xpander_handler.initialize_travel_agent()
+        mark("boot")
+        await asyncio.sleep(args.idle)
+        excluded += args.idle
+        for phase, task in zip(("first_task", "second_task"), tasks):
+            task = await xpander_handler.my_agent_handler(task)
+            if not task.used_tools:
+                raise RuntimeError(f"task failed: {task.result}")
+            mark(phase)
+        marks["first_task_latency"] = marks["first_task"] - marks["boot"]
+
+    asyncio.run(run())
+    print(json.dumps(marks), flush=True)
+    os._exit(0)  # skip interpreter teardown; the scheduler and metrics threads are still up
+
+
+def launch(env, importtime=False):
+    env = dict(env, TRAVEL_DB_PATH=os.path.join(tempfile.mkdtemp(prefix="travel-start-"), "start.db"),
+               BENCH_LAUNCHED_AT=repr(time.time()))
+    command = [sys.executable, *(["-X", "importtime"] if importtime else []),
+               "-m", "benchmarks.bench_startup", "--mode", "child", "--idle", str(args.idle)]
+    proc = subprocess.run(command, env=env, capture_output=True, text=True)
+    if proc.returncode:
+        sys.exit(proc.stderr[-4000:])
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def slowest_imports(stderr, top=12):
+    """Top-level (directly imported) modules by cumulative import time."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):
+            rows.append((int(cumulative) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    if args.mode == "child":
+        child()
+        return
+
+    from benchmarks.stub_servers import spawn_stub_server
+    stub, base_url = spawn_stub_server(latency=0.005)
+    env = dict(os.environ,
+               TRAVEL_METRICS_PORT="0", AGNO_TELEMETRY="false",
+               AVIATIONSTACK_URL=f"{base_url}/v1/flights", AVIATIONSTACK_KEY="stub",
+               SLACK_API_URL=f"{base_url}/api", SLACK_BOT_TOKEN="xoxb-stub", SLACK_CHANNEL_ID="C-stub")
+    try:
+        runs = [launch(env)[0] for _ in range(args.runs)]
+        imports = slowest_imports(launch(env, importtime=True)[1]) if args.importtime else []
+    finally:
+        stub.terminate()
+
+    results = {}
+    print(f"{args.runs} cold starts, idle {args.idle:g}s before the first task, "
+          "seconds (median / min / max):")
+    for phase in PHASES:
+        values = sorted(run[phase] for run in runs)
+        results[phase] = values[len(values) // 2]
+        print(f"  {LABELS[phase]:<22} {results[phase]:6.3f}  {values[0]:6.3f}  {values[-1]:6.3f}")
+    if imports:
+        print("slowest top-level imports (cumulative ms):")
+        for ms, name in imports:
+            print(f"  {ms:8.1f}  {name}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = [
+            f"{LABELS[phase]}: {results[phase]:.3f}s > {baseline[phase]:.3f}s"
+            for phase in ("import", "first_task")
+            if phase in baseline and results[phase] > baseline[phase] * (1 + args.tolerance)
+        ]
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
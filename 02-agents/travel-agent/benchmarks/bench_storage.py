@@ -0,0 +1,91 @@
+"""Tasks/sec of the expense tools: connect-per-call (legacy) vs pooled WAL storage.
+
+Each mode runs uncontended (one task at a time) and with ``--concurrency``
+tasks in flight. Legacy calls block the event loop, so their latency never
+includes waiting; pooled calls under load queue for one of the
+``TRAVEL_DB_POOL_SIZE`` threads, so their p50 there is mostly that wait
+(about concurrency / throughput), not the cost of a call. Run from the
+travel-agent directory:
+
+    python -m benchmarks.bench_storage --tasks 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--tasks", type=int, default=2000)
+parser.add_argument("--concurrency", type=int, default=50)
+args = parser.parse_args()
+
+workdir = tempfile.mkdtemp(prefix="travel-bench-")
+os.environ["TRAVEL_DB_PATH"] = os.path.join(workdir, "pooled.db")
+
+from core.travel import (  # noqa: E402
+    init_db,
+    log_expense_impl,
+    summarize_expenses_impl,
+    INSERT_EXPENSE,
+)
+
+SELECT_SESSION_EXPENSES = "SELECT type, amount FROM expenses WHERE user_id = ? AND session_id = ?"
+
+LEGACY_DB = os.path.join(workdir, "legacy.db")
+
+
+def legacy_init():
+    conn = sqlite3.connect(LEGACY_DB)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS expenses (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "user_id TEXT, session_id TEXT, type TEXT, amount REAL, date TEXT)"
+    )
+    conn.commit()
+    conn.close()
+
+
+async def legacy_task(i):
+    # Mirrors the pre-pool implementation: connect/commit/close on the loop thread.
+    conn = sqlite3.connect(LEGACY_DB)
+    conn.execute(INSERT_EXPENSE, (f"user-{i % 20}", "s", "taxi", 100.0, "2025-01-01"))
+    conn.commit()
+    conn.close()
+    conn = sqlite3.connect(LEGACY_DB)
+    conn.execute(SELECT_SESSION_EXPENSES, (f"user-{i % 20}", "s")).fetchall()
+    conn.close()
+
+
+async def pooled_task(i):
+    await log_expense_impl("taxi", 100.0, "2025-01-01", f"user-{i % 20}", "s")
+    await summarize_expenses_impl(f"user-{i % 20}", "s")
+
+
+async def drive(task_fn, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with sem:
+            start = time.perf_counter()
+            await task_fn(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.tasks)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return args.tasks / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+
+
+async def main():
+    legacy_init()
+    init_db()
+    for concurrency in sorted({1, args.concurrency}):
+        for name, fn in (("legacy", legacy_task), ("pooled", pooled_task)):
+            tps, p50, p99 = await drive(fn, concurrency)
+            print(f"{name:>8} x{concurrency:<3}: {tps:8.1f} tasks/s  p50={p50 * 1000:7.2f}ms  p99={p99 * 1000:7.2f}ms")
+
+
+asyncio.run(main())
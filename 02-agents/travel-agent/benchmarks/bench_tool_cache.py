@@ -0,0 +1,74 @@
+"""Repeated summary/policy reads within a session, with and without the tool cache.
+
+Each simulated conversation logs a few expenses and calls
+``ta_summarize_expenses``/``ta_check_policy_violations`` several times
+between writes, the pattern the agent produces when it re-checks its work.
+Reports conversations/sec, per-read latency and hit rates, and checks that
+cached answers match uncached ones after every write.
+
+    python -m benchmarks.bench_tool_cache --sessions 500 --writes 4 --reads 5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--sessions", type=int, default=500)
+parser.add_argument("--writes", type=int, default=4, help="expenses logged per session")
+parser.add_argument("--reads", type=int, default=5, help="summary + policy reads after each write")
+parser.add_argument("--concurrency", type=int, default=20)
+args = parser.parse_args()
+
+os.environ["TRAVEL_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="travel-bench-"), "tool_cache.db")
+
+import tools.travel_tools as travel_tools  # noqa: E402
+from core.context import task_context  # noqa: E402
+from core.tool_cache import tool_cache  # noqa: E402
+from core.travel import check_policy_impl, summarize_expenses_impl  # noqa: E402
+
+
+async def conversation(i, prefix, read_times, mismatches):
+    user, session = f"user-{i % 50}", f"{prefix}-{i}"
+    with task_context(user, session):
+        for w in range(args.writes):
+            await travel_tools.ta_log_expense("meal", 1000.0 + 2500 * (w % 3), "2025-09-15")
+            for _ in range(args.reads):
+                started = time.perf_counter()
+                summary = await travel_tools.ta_summarize_expenses()
+                policy = await travel_tools.ta_check_policy_violations()
+                read_times.append(time.perf_counter() - started)
+            if summary != await summarize_expenses_impl(user, session) or \
+                    policy != await check_policy_impl(user, session):
+                mismatches.append(session)
+
+
+async def run(enabled):
+    tool_cache.enabled = enabled
+    sem = asyncio.Semaphore(args.concurrency)
+    read_times, mismatches = [], []
+    prefix = "cached" if enabled else "uncached"
+
+    async def one(i):
+        async with sem:
+            await conversation(i, prefix, read_times, mismatches)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.sessions)))
+    elapsed = time.perf_counter() - started
+    read_times.sort()
+    return args.sessions / elapsed, read_times[len(read_times) // 2] * 1e6, len(mismatches)
+
+
+async def main():
+    await run(False)  # warm up the pool and schema
+    for enabled in (False, True):
+        rate, p50, mismatches = await run(enabled)
+        print(f"cache {'on ' if enabled else 'off'}: {rate:8.1f} conversations/s, "
+              f"read pair p50 {p50:8.1f}us, stale answers {mismatches}")
+    print(f"stats: {tool_cache.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
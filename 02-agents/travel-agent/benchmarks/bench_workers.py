@@ -0,0 +1,185 @@
+"""Task throughput of the travel handler in one process vs. a pool of worker processes.
+
+Runs the real handler, tools, storage and HTTP client with a scripted model
+and the local AviationStack/Slack stubs, first through ``WorkerPool`` with
+each worker count in ``--workers`` (as the supervisor does under
+``TASK_WORKERS``), then in-process as a single-process baseline. Each task
+books a flight (parsing a 100-flight payload) and a hotel, logs an expense,
+checks policy and summarizes. ``--tasks`` tasks from ``--users`` users are
+kept ``--concurrency`` in flight. Reported per run: tasks/s, p50/p99 task
+latency, boot time and how many tasks each worker served. Throughput can
+only scale up to the number of usable CPUs, printed first.
+
+    python -m benchmarks.bench_workers --workers 1,2,4 --tasks 400 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from xpander_sdk import Configuration, Task
+from xpander_sdk.modules.tasks.models.task import AgentExecutionInput
+
+from benchmarks.fake_model import FakeModel, plan_message
+from benchmarks.stub_servers import AIRPORTS
+from worker_pool import WORKER_INDEX_ENV, WorkerPool
+
+CONFIGURATION = Configuration(api_key="offline", organization_id="bench-workers")
+
+
+class SyntheticTask(Task):
+    user_id: Optional[str] = None
+    session_id: Optional[str] = None
+
+
+class FakeAgentCache:
+    """Returns a fixed agent definition instead of calling the xpander backend."""
+
+    async def aget_args(self, task, **kwargs):
+        latency = float(os.environ.get("BENCH_MODEL_MS", "0")) / 1000
+        return {"name": "travel-agent", "model": FakeModel(latency=latency),
+                "instructions": "You are a travel assistant.", "tools": []}
+
+
+if WORKER_INDEX_ENV in os.environ:
+    # Imported by a pool worker as the handler module: registers the real
+    # travel handler and boot hook with the worker, minus the xpander backend.
+    import xpander_handler
+
+    xpander_handler.agent_cache = FakeAgentCache()
+
+
+def make_task(i, users):
+    origin, destination = AIRPORTS[i % len(AIRPORTS)], AIRPORTS[(i * 3 + 1) % len(AIRPORTS)]
+    # Spread dates so most flight lookups miss the schedule cache.
+    date = (datetime(2025, 1, 1) + timedelta(days=i % 365)).strftime("%Y-%m-%d")
+    calls = [
+        {"tool": "ta_book_flight", "args": {"origin": origin, "destination": destination,
+                                            "date": date, "budget": 60000}},
+        {"tool": "ta_book_hotel", "args": {"destination": destination, "nights": 1 + i % 4, "budget": 8000}},
+        {"tool": "ta_log_expense", "args": {"expense_type": "taxi", "amount": 100 + i % 900, "date": date}},
+        {"tool": "ta_check_policy_violations", "args": {}},
+        {"tool": "ta_summarize_expenses", "args": {}},
+    ]
+    return SyntheticTask(
+        id=f"task-{i}", agent_id="travel-agent", organization_id="bench-workers",
+        created_at=datetime.now(timezone.utc), configuration=CONFIGURATION,
+        input=AgentExecutionInput(text=plan_message(f"Plan my trip to {destination}", calls)),
+        user_id=f"user-{i % users}", session_id=f"session-{i % (users * 4)}",
+    )
+
+
+async def drive(submit, args, offset):
+    sem = asyncio.Semaphore(args.concurrency)
+    latencies, failures = [], 0
+
+    async def one(i):
+        nonlocal failures
+        async with sem:
+            started = time.perf_counter()
+            try:
+                task = await submit(make_task(offset + i, args.users))
+                failures += not task.used_tools
+            except Exception as e:
+                failures += 1
+                print(f"task {offset + i} failed: {e!r}", file=sys.stderr)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.tasks)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "throughput": args.tasks / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "failures": failures,
+    }
+
+
+def report(label, boot, row, spread="-"):
+    print(f"{label:<10} {row['throughput']:>9.1f} {row['p50_ms']:>9.1f} {row['p99_ms']:>9.1f} "
+          f"{boot:>7.2f} {row['failures']:>5}  {spread}")
+
+
+async def run_pool(workers, args, offset):
+    pool = WorkerPool(workers=workers, module="benchmarks.bench_workers", restart_delay=0.1)
+    started = time.perf_counter()
+    await pool.start()
+    boot = time.perf_counter() - started
+    try:
+        # Warm up every worker (Agno imports, DB, caches) with users routed to each.
+        await drive(pool.submit, argparse.Namespace(**{**vars(args), "tasks": 8 * workers}), offset + 10**6)
+        before = [w["dispatched"] for w in pool.stats()]
+        row = await drive(pool.submit, args, offset)
+        spread = "/".join(str(w["dispatched"] - b) for w, b in zip(pool.stats(), before))
+    finally:
+        pool.stop()
+    report(f"{workers} worker{'s' if workers > 1 else ''}", boot, row, spread)
+
+
+async def run_inline(args, offset):
+    # Importing the handler must not start the xpander event listener.
+    import xpander_sdk
+
+    xpander_sdk.on_task = xpander_sdk.on_boot = lambda fn=None, **kwargs: fn if fn is not None else (lambda f: f)
+    import xpander_handler
+
+    xpander_handler.agent_cache = FakeAgentCache()
+    started = time.perf_counter()
+    await xpander_handler.initialize_travel_agent()
+    boot = time.perf_counter() - started
+    await drive(xpander_handler.my_agent_handler, argparse.Namespace(**{**vars(args), "tasks": 8}), offset + 10**6)
+    report("in-process", boot, await drive(xpander_handler.my_agent_handler, args, offset))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--tasks", type=int, default=400, help="tasks per run")
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32, help="tasks in flight")
+    parser.add_argument("--model-ms", type=float, default=0, help="simulated LLM latency per model turn")
+    parser.add_argument("--stub-latency", type=float, default=0.005, help="AviationStack/Slack stub latency (s)")
+    args = parser.parse_args()
+
+    from loguru import logger
+
+    from benchmarks.stub_servers import spawn_stub_server
+    stub, base_url = spawn_stub_server(latency=args.stub_latency)
+    # Workers inherit this environment when they are spawned.
+    os.environ.update(
+        TRAVEL_DB_PATH=os.path.join(tempfile.mkdtemp(prefix="travel-workers-"), "workers.db"),
+        TRAVEL_METRICS_PORT="0", AGNO_TELEMETRY="false", TASK_WORKERS="1",
+        AVIATIONSTACK_URL=f"{base_url}/v1/flights", AVIATIONSTACK_KEY="stub",
+        SLACK_API_URL=f"{base_url}/api", SLACK_BOT_TOKEN="xoxb-stub", SLACK_CHANNEL_ID="C-stub",
+        BENCH_MODEL_MS=str(args.model_ms), LOGURU_LEVEL="WARNING",
+    )
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    print(f"{cpus} usable CPU(s); {args.tasks} tasks from {args.users} users, "
+          f"{args.concurrency} in flight, model {args.model_ms:g} ms/turn")
+    print(f"{'run':<10} {'tasks/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'boot s':>7} {'fail':>5}  tasks per worker")
+
+    async def run():
+        for n, workers in enumerate(int(v) for v in args.workers.split(",")):
+            await run_pool(workers, args, n * args.tasks)
+        await run_inline(args, 10**7)
+
+    try:
+        asyncio.run(run())
+    finally:
+        stub.terminate()
+    os._exit(0)  # skip teardown; the in-process scheduler and HTTP pools are still up
+
+
+if __name__ == "__main__":
+    # Run as the importable module so tasks pickle as benchmarks.bench_workers.SyntheticTask.
+    from benchmarks.bench_workers import main
+    main()
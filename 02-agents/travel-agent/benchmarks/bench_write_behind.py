@@ -0,0 +1,148 @@
+"""Expense logging commits/sec: one transaction per call vs. write-behind group commit.
+
+Logs ``--calls`` expenses from ``--concurrency`` concurrent callers with
+``TRAVEL_EXPENSE_WRITE_BEHIND`` off and on (each in a fresh process and
+database), optionally with ``synchronous=FULL`` so every commit fsyncs and
+``--fsync`` so the write-behind spool is fsynced before each acknowledgement.
+Then runs a crash check: a child process logs expenses in write-behind mode,
+commits only the first half and is SIGKILLed. The committed half must already
+be gone from the spool, and recovery on the next start must commit every
+acknowledged row exactly once.
+
+    python -m benchmarks.bench_write_behind --calls 5000 --synchronous FULL --fsync
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--calls", type=int, default=5000)
+parser.add_argument("--concurrency", type=int, default=50)
+parser.add_argument("--synchronous", default="NORMAL", help="SQLite synchronous pragma (FULL fsyncs every commit)")
+parser.add_argument("--fsync", action="store_true", help="fsync the write-behind spool before acknowledging")
+parser.add_argument("--crash-rows", type=int, default=500)
+parser.add_argument("--mode", choices=["bench", "crash-child"], help=argparse.SUPPRESS)
+args = parser.parse_args()
+
+
+def set_synchronous(level):
+    import core.storage
+    core.storage.PRAGMAS = tuple(
+        f"PRAGMA synchronous={level}" if p.startswith("PRAGMA synchronous") else p
+        for p in core.storage.PRAGMAS
+    )
+
+
+async def bench():
+    set_synchronous(args.synchronous)
+    from core.storage import get_db
+    from core.travel import expense_buffer, log_expense_impl, summarize_expenses_impl
+
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def one(i):
+        async with sem:
+            await log_expense_impl("taxi", 100.0 + i % 7, "2025-09-15", f"user-{i % 100}", "s1")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.calls)))
+    acked = time.perf_counter() - started
+    await expense_buffer.barrier()
+    durable = time.perf_counter() - started
+    summary = await summarize_expenses_impl("user-0", "s1")
+    rows = sum(shard.fetchone_sync("SELECT COUNT(*) FROM expenses")[0] for shard in get_db().shards)
+    print(json.dumps({
+        "acked_per_s": args.calls / acked,
+        "durable_per_s": args.calls / durable,
+        "commits": expense_buffer.commits or args.calls,
+        "fsyncs": expense_buffer.fsyncs,
+        "rows": rows,
+        "user0_count": summary["count"],
+    }))
+
+
+async def crash_child():
+    from core.travel import expense_buffer, log_expense_impl
+
+    expense_buffer.flush_interval = 3600  # never flush on its own
+    expense_buffer.flush_rows = 10**9
+    half = args.crash_rows // 2
+    for i in range(half):
+        await log_expense_impl("meal", float(i), "2025-09-15", f"user-{i % 10}", "s1")
+    # Commit the first half while the second half is being logged, so the
+    # spool still holds committed rows that recovery has to skip.
+    flushing = asyncio.create_task(expense_buffer.flush())
+    await asyncio.sleep(0)
+    for i in range(half, args.crash_rows):
+        await log_expense_impl("meal", float(i), "2025-09-15", f"user-{i % 10}", "s1")
+    await flushing
+    spooled = 0
+    for _, path in expense_buffer._segment_files():
+        with open(path) as f:
+            spooled += sum(1 for _ in f)
+    print(f"acked {spooled}", flush=True)
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def child(env, mode):
+    return subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_write_behind", "--mode", mode, *sys.argv[1:]],
+        env=env, capture_output=True, text=True,
+    )
+
+
+def main():
+    if args.mode == "bench":
+        asyncio.run(bench())
+        return
+    if args.mode == "crash-child":
+        asyncio.run(crash_child())
+        return
+
+    results = {}
+    for write_behind in ("false", "true"):
+        env = dict(os.environ,
+                   TRAVEL_DB_PATH=os.path.join(tempfile.mkdtemp(prefix="travel-wb-"), "wb.db"),
+                   TRAVEL_EXPENSE_WRITE_BEHIND=write_behind,
+                   TRAVEL_EXPENSE_SPOOL_FSYNC=str(args.fsync).lower())
+        proc = child(env, "bench")
+        if proc.returncode:
+            sys.exit(proc.stderr)
+        results[write_behind] = json.loads(proc.stdout.strip().splitlines()[-1])
+    print(f"{args.calls} expenses, concurrency {args.concurrency}, synchronous={args.synchronous}, "
+          f"spool fsync={args.fsync}")
+    for write_behind, r in results.items():
+        label = "write-behind" if write_behind == "true" else "per-call commit"
+        print(f"  {label:<16} acked {r['acked_per_s']:>9,.0f}/s  durable {r['durable_per_s']:>9,.0f}/s  "
+              f"{r['commits']:>6} commits  {r['fsyncs']:>5} fsyncs  rows {r['rows']}")
+
+    env = dict(os.environ,
+               TRAVEL_DB_PATH=os.path.join(tempfile.mkdtemp(prefix="travel-wb-"), "crash.db"),
+               TRAVEL_EXPENSE_WRITE_BEHIND="true")
+    proc = child(env, "crash-child")
+    killed = proc.returncode == -signal.SIGKILL and "acked" in proc.stdout
+    # Only the half logged after the flush started may still be spooled.
+    spooled = int(proc.stdout.split("acked")[-1].split()[0]) if killed else -1
+    from_env = dict(env, TRAVEL_EXPENSE_WRITE_BEHIND="false")
+    check = subprocess.run(
+        [sys.executable, "-c",
+         "import json; from core.travel import get_db; "
+         "print(json.dumps([sum(c) for c in zip(*(shard.fetchone_sync('SELECT COUNT(*), COUNT(DISTINCT amount), "
+         "(SELECT SUM(count) FROM expense_rollups) FROM expenses') for shard in get_db().shards))]))"],
+        env=from_env, capture_output=True, text=True,
+    )
+    rows, distinct, rollup = json.loads(check.stdout.strip().splitlines()[-1])
+    ok = killed and rows == distinct == rollup == args.crash_rows and spooled == args.crash_rows - args.crash_rows // 2
+    print(f"crash check: killed={killed}, {spooled} rows left in spool, {rows} rows ({distinct} distinct, rollups {rollup}) "
+          f"after recovery, expected {args.crash_rows}: {'OK' if ok else 'FAILED'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Deterministic stand-in for the LLM behind the Agno agent.
+
+The task message carries its own script after a ``PLAN:`` marker: a JSON
+list of ``{"tool": name, "args": {...}}`` calls. The first model turn
+requests all of them; once tool results are in, the model answers with a
+fixed summary. Token usage is estimated from message sizes so task
+accounting still has numbers to aggregate. No network access is needed.
+"""
+import asyncio
+import json
+from dataclasses import dataclass
+from uuid import uuid4
+
+from agno.metrics import MessageMetrics
+from agno.models.base import Model
+from agno.models.response import ModelResponse
+
+PLAN_MARKER = "PLAN:"
+
+
+def plan_message(text, calls):
+    """Build a task message for :class:`FakeModel` that runs ``calls``."""
+    return f"{text}\n{PLAN_MARKER} {json.dumps(calls)}"
+
+
+def _plan(messages):
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else ""
+        if message.role == "user" and PLAN_MARKER in content:
+            return json.loads(content.split(PLAN_MARKER, 1)[1].strip().splitlines()[0])
+    return []
+
+
+@dataclass
+class FakeModel(Model):
+    id: str = "fake-model"
+    name: str = "FakeModel"
+    provider: str = "Fake"
+    latency: float = 0.0  # seconds per model turn, to mimic LLM time
+
+    def _respond(self, messages, assistant_message):
+        assistant_message.metrics.start_timer()
+        response = ModelResponse(role="assistant")
+        tool_results = [m for m in messages if m.role == "tool"]
+        if tool_results:
+            response.content = f"Completed {len(tool_results)} actions."
+        else:
+            response.tool_calls = [
+                {
+                    "id": f"call_{uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {"name": call["tool"], "arguments": json.dumps(call.get("args", {}))},
+                }
+                for call in _plan(messages)
+            ] or None
+            if response.tool_calls is None:
+                response.content = "Nothing to do."
+        usage = MessageMetrics()
+        usage.input_tokens = sum(len(str(m.content or "")) for m in messages) // 4
+        usage.output_tokens = len(response.content or "") // 4 + 20 * len(response.tool_calls or [])
+        usage.total_tokens = usage.input_tokens + usage.output_tokens
+        response.response_usage = usage
+        assistant_message.metrics.stop_timer()
+        return response
+
+    async def ainvoke(self, messages, assistant_message, *args, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(messages, assistant_message)
+
+    def invoke(self, messages, assistant_message, *args, **kwargs):
+        return self._respond(messages, assistant_message)
+
+    async def ainvoke_stream(self, messages, assistant_message, *args, **kwargs):
+        yield await self.ainvoke(messages, assistant_message)
+
+    def invoke_stream(self, messages, assistant_message, *args, **kwargs):
+        yield self.invoke(messages, assistant_message)
+
+    def _parse_provider_response(self, response, **kwargs):
+        return response
+
+    def _parse_provider_response_delta(self, response, **kwargs):
+        return response
@@ -0,0 +1,213 @@
+"""Load test of the travel agent @on_task handler, fully offline.
+
+Synthetic tasks go through the real handler, Agno agent, tools, storage and
+HTTP client. The LLM is replaced by ``benchmarks.fake_model.FakeModel``, the
+xpander backend by a fixed agent definition, and AviationStack/Slack by the
+stub server (in a child process). For each concurrency level it reports
+throughput, p50/p99 task latency and memory.
+
+    python -m benchmarks.load_test --levels 1,10,50 --tasks 300 --model-ms 0
+
+``--json out.json`` writes the results; ``--baseline out.json`` compares
+against an earlier run and exits non-zero when throughput drops or p99
+rises by more than ``--tolerance`` (default 20%), for CI-style checks.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Optional
+
+from benchmarks.stub_servers import spawn_stub_server
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--levels", default="1,10,50", help="comma-separated concurrency levels")
+parser.add_argument("--tasks", type=int, default=300, help="tasks per level")
+parser.add_argument("--users", type=int, default=50)
+parser.add_argument("--model-ms", type=float, default=0, help="simulated LLM latency per model turn")
+parser.add_argument("--backend-ms", type=float, default=0, help="simulated agent setup latency")
+parser.add_argument("--stub-latency", type=float, default=0.005, help="AviationStack/Slack stub latency (s)")
+parser.add_argument("--trace-memory", action="store_true", help="report Python heap peak via tracemalloc (slow)")
+parser.add_argument("--json", help="write results to this file")
+parser.add_argument("--baseline", help="compare with results written by --json")
+parser.add_argument("--tolerance", type=float, default=0.2)
+args = parser.parse_args()
+
+stub, base_url = spawn_stub_server(latency=args.stub_latency)
+os.environ["TRAVEL_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="travel-load-"), "load.db")
+os.environ["TRAVEL_METRICS_PORT"] = "0"
+os.environ["AGNO_TELEMETRY"] = "false"
+os.environ["AVIATIONSTACK_URL"] = f"{base_url}/v1/flights"
+os.environ["AVIATIONSTACK_KEY"] = "stub"
+os.environ["SLACK_API_URL"] = f"{base_url}/api"
+os.environ["SLACK_BOT_TOKEN"] = "xoxb-stub"
+os.environ["SLACK_CHANNEL_ID"] = "C-stub"
+
+# Importing the handler must not start the xpander event listener.
+import xpander_sdk  # noqa: E402
+
+
+def _passthrough(fn=None, **kwargs):
+    return fn if fn is not None else (lambda f: f)
+
+
+xpander_sdk.on_task = xpander_sdk.on_boot = _passthrough
+
+from loguru import logger  # noqa: E402
+from xpander_sdk import Configuration, Task  # noqa: E402
+from xpander_sdk.modules.tasks.models.task import AgentExecutionInput  # noqa: E402
+
+import xpander_handler  # noqa: E402
+from benchmarks.fake_model import FakeModel, plan_message  # noqa: E402
+from benchmarks.stub_servers import AIRPORTS  # noqa: E402
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+
+class SyntheticTask(Task):
+    user_id: Optional[str] = None
+    session_id: Optional[str] = None
+
+
+class FakeAgentCache:
+    """Returns a fixed agent definition instead of calling the xpander backend."""
+
+    async def aget_args(self, task, **kwargs):
+        if args.backend_ms:
+            await asyncio.sleep(args.backend_ms / 1000)
+        return {
+            "name": "travel-agent",
+            "model": FakeModel(latency=args.model_ms / 1000),
+            "instructions": "You are a travel assistant.",
+            "tools": [],
+        }
+
+
+xpander_handler.agent_cache = FakeAgentCache()
+CONFIGURATION = Configuration(api_key="offline", organization_id="load-test")
+
+
+def make_task(i):
+    origin, destination = AIRPORTS[i % len(AIRPORTS)], AIRPORTS[(i * 3 + 1) % len(AIRPORTS)]
+    calls = [
+        {"tool": "ta_book_flight", "args": {"origin": origin, "destination": destination,
+                                            "date": "2025-09-15", "budget": 60000}},
+        {"tool": "ta_book_hotel", "args": {"destination": destination, "nights": 1 + i % 4, "budget": 8000}},
+        {"tool": "ta_log_expense", "args": {"expense_type": "taxi", "amount": 100 + i % 900, "date": "2025-09-15"}},
+        {"tool": "ta_check_policy_violations", "args": {}},
+        {"tool": "ta_summarize_expenses", "args": {}},
+    ]
+    if i % 10 == 0:
+        calls.append({"tool": "ta_send_reminder", "args": {"message": "Submit your receipts"}})
+    return SyntheticTask(
+        id=f"task-{i}",
+        agent_id="travel-agent",
+        organization_id="load-test",
+        created_at=datetime.now(timezone.utc),
+        input=AgentExecutionInput(text=plan_message(f"Plan my trip to {destination}", calls)),
+        configuration=CONFIGURATION,
+        user_id=f"user-{i % args.users}",
+        session_id=f"session-{i % (args.users * 4)}",
+    )
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+async def run_level(concurrency, offset):
+    sem = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one(i):
+        nonlocal failures
+        async with sem:
+            started = time.perf_counter()
+            try:
+                task = await xpander_handler.my_agent_handler(make_task(i))
+                if not task.result or not task.used_tools:
+                    failures += 1
+            except Exception as e:
+                failures += 1
+                logger.warning(f"task {i} failed: {e!r}")
+            latencies.append(time.perf_counter() - started)
+
+    gc.collect()
+    rss_before = rss_mb()
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(one(offset + i) for i in range(args.tasks)))
+    elapsed = time.perf_counter() - started
+    heap_peak = tracemalloc.get_traced_memory()[1] / 2**20 if args.trace_memory else None
+    if args.trace_memory:
+        tracemalloc.stop()
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "tasks": args.tasks,
+        "failures": failures,
+        "throughput": args.tasks / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "rss_mb": rss_mb(),
+        "rss_growth_mb": rss_mb() - rss_before,
+        "heap_peak_mb": heap_peak,
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {row["concurrency"]: row for row in json.load(f)}
+    regressions = []
+    for row in results:
+        base = baseline.get(row["concurrency"])
+        if base is None:
+            continue
+        if row["throughput"] < base["throughput"] * (1 - args.tolerance):
+            regressions.append(f"c={row['concurrency']}: throughput {row['throughput']:.1f} < {base['throughput']:.1f}")
+        if row["p99_ms"] > base["p99_ms"] * (1 + args.tolerance):
+            regressions.append(f"c={row['concurrency']}: p99 {row['p99_ms']:.1f}ms > {base['p99_ms']:.1f}ms")
+    return regressions
+
+
+async def main():
+    await run_level(4, offset=10**6)  # warm up imports, pool and caches
+    results = []
+    print(f"{'conc':>5} {'tasks/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'RSS MB':>8} {'+MB':>6} {'heap MB':>8} {'fail':>5}")
+    for n, level in enumerate(int(v) for v in args.levels.split(",")):
+        row = await run_level(level, offset=n * args.tasks)
+        results.append(row)
+        heap = f"{row['heap_peak_mb']:8.1f}" if row["heap_peak_mb"] is not None else f"{'-':>8}"
+        print(f"{row['concurrency']:>5} {row['throughput']:>9.1f} {row['p50_ms']:>9.1f} {row['p99_ms']:>9.1f} "
+              f"{row['rss_mb']:>8.1f} {row['rss_growth_mb']:>6.1f} {heap} {row['failures']:>5}")
+    print(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    status = 0
+    if args.baseline:
+        regressions = compare(results, args.baseline)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        status = 1 if regressions else 0
+    if any(row["failures"] for row in results):
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(asyncio.run(main()))
+    finally:
+        stub.terminate()
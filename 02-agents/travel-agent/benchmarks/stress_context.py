@@ -0,0 +1,58 @@
+"""Interleave hundreds of concurrent tasks and assert that no user/session IDs leak.
+
+Each task binds its own identity, yields to the loop at random points
+(including inside child tasks) and goes through the registered tools, then
+checks that every row the tools wrote landed under its own IDs.
+
+    python -m benchmarks.stress_context --tasks 500
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--tasks", type=int, default=500)
+parser.add_argument("--expenses", type=int, default=5)
+args = parser.parse_args()
+
+os.environ["TRAVEL_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="travel-bench-"), "ctx.db")
+
+from core.context import task_context, current_user_id, current_session_id  # noqa: E402
+from core.travel import init_db  # noqa: E402
+from tools.travel_tools import ta_log_expense, ta_summarize_expenses  # noqa: E402
+
+failures = []
+
+
+async def one_task(i):
+    user_id, session_id = f"user-{i}", f"session-{i}"
+    rng = random.Random(i)
+    with task_context(user_id, session_id):
+        for n in range(args.expenses):
+            await asyncio.sleep(rng.random() / 100)
+            # Child tasks inherit a copy of the context, like agno tool calls.
+            await asyncio.create_task(ta_log_expense(f"cat-{n}", float(i), "2025-09-15"))
+            if (current_user_id(), current_session_id()) != (user_id, session_id):
+                failures.append(f"task {i}: context changed to {current_user_id()}")
+        await asyncio.sleep(rng.random() / 100)
+        summary = await ta_summarize_expenses()
+    expected_total = float(i) * args.expenses
+    if summary["count"] != args.expenses or summary["total"] != expected_total:
+        failures.append(f"task {i}: expected {args.expenses} rows / {expected_total}, got {summary}")
+
+
+async def main():
+    init_db()
+    await asyncio.gather(*(one_task(i) for i in range(args.tasks)))
+    if current_user_id() != "default-user":
+        failures.append("identity leaked out of task_context")
+    if failures:
+        print(f"FAILED: {len(failures)} leaks", *failures[:20], sep="\n  ")
+        sys.exit(1)
+    print(f"OK: {args.tasks} interleaved tasks, {args.tasks * args.expenses} tool writes, no leaked IDs")
+
+
+asyncio.run(main())
@@ -0,0 +1,115 @@
+"""Local stand-ins for the AviationStack and Slack APIs.
+
+Point the travel core at them with ``AVIATIONSTACK_URL`` / ``SLACK_API_URL``
+(see :func:`start_stub_server`), so tools can be exercised without network access.
+"""
+import json
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+AIRPORTS = ["DEL", "BOM", "BLR", "MAA", "CCU", "HYD", "JFK", "SFO", "SVO", "LHR"]
+
+
+def make_flights(count=100, date="2025-09-15"):
+    base = datetime.strptime(date, "%Y-%m-%d")
+    flights = []
+    for i in range(count):
+        dep = base + timedelta(hours=i % 18)
+        flights.append({
+            "airline": {"name": "Stub Air"},
+            "flight": {"iata": f"SA{100 + i}"},
+            "departure": {"iata": AIRPORTS[i % len(AIRPORTS)], "scheduled": dep.isoformat()},
+            "arrival": {
+                "iata": AIRPORTS[(i * 3 + 1) % len(AIRPORTS)],
+                "scheduled": (dep + timedelta(hours=2)).isoformat(),
+            },
+        })
+    return flights
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.0
+    flights = make_flights()
+    requests_seen = {"flights": 0, "slack": 0}
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        path = urlsplit(self.path).path
+        if path.endswith("/flights"):
+            type(self).requests_seen["flights"] += 1
+            limit = int(parse_qs(urlsplit(self.path).query).get("limit", ["100"])[0])
+            self._reply({"data": self.flights[:limit]})
+        else:
+            self._reply({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        if self.latency:
+            time.sleep(self.latency)
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        if self.path.endswith("/chat.postMessage"):
+            type(self).requests_seen["slack"] += 1
+            self._reply({"ok": True, "ts": f"{time.time():.6f}"})
+        else:
+            self._reply({"ok": False, "error": "unknown_method"}, status=404)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def start_stub_server(latency=0.0, host="127.0.0.1", port=0):
+    """Start the stub server on a daemon thread and return ``(server, base_url)``.
+
+    Use ``f"{base_url}/v1/flights"`` for ``AVIATIONSTACK_URL`` and
+    ``f"{base_url}/api"`` for ``SLACK_API_URL``.
+    """
+    handler = type("Handler", (StubHandler,), {
+        "latency": latency,
+        "requests_seen": {"flights": 0, "slack": 0},
+    })
+    server = StubServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def spawn_stub_server(latency=0.0):
+    """Run the stub server in a child process so it does not compete with the
+    benchmark for the GIL. Returns ``(process, base_url)``; terminate when done."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_servers", "--latency", str(latency)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    return proc, proc.stdout.readline().strip()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the stub AviationStack/Slack APIs.")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=0)
+    cli = parser.parse_args()
+    server, url = start_stub_server(latency=cli.latency, port=cli.port)
+    print(url, flush=True)
+    threading.Event().wait()
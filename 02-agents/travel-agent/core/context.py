@@ -0,0 +1,31 @@
+import contextvars
+from contextlib import contextmanager
+
+DEFAULT_USER_ID = "default-user"
+DEFAULT_SESSION_ID = "default-session"
+
+# Task-scoped identity. asyncio copies the current context into every task it
+# creates, so values set around ``agent.arun`` are visible to the tools the
+# agent invokes while concurrent tasks keep their own copies.
+_user_id = contextvars.ContextVar("travel_user_id", default=None)
+_session_id = contextvars.ContextVar("travel_session_id", default=None)
+
+
+@contextmanager
+def task_context(user_id, session_id=None):
+    """Bind ``user_id``/``session_id`` for the duration of the block."""
+    user_token = _user_id.set(str(user_id) if user_id is not None else None)
+    session_token = _session_id.set(str(session_id) if session_id is not None else None)
+    try:
+        yield
+    finally:
+        _session_id.reset(session_token)
+        _user_id.reset(user_token)
+
+
+def current_user_id():
+    return _user_id.get() or DEFAULT_USER_ID
+
+
+def current_session_id():
+    return _session_id.get() or DEFAULT_SESSION_ID
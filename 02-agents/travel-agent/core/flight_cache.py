@@ -0,0 +1,73 @@
+import os
+import time
+
+from core.cache import SingleFlight, TTLCache
+
+FLIGHT_CACHE_TTL = float(os.environ.get("TRAVEL_FLIGHT_CACHE_TTL", "300"))
+FLIGHT_CACHE_SIZE = int(os.environ.get("TRAVEL_FLIGHT_CACHE_SIZE", "4096"))
+
+
+def date_only(dt_str):
+    return dt_str.split("T")[0] if dt_str else None
+
+
+def route_key(flight):
+    dep = flight.get("departure") or {}
+    arr = flight.get("arrival") or {}
+    return (dep.get("iata"), arr.get("iata"), date_only(dep.get("scheduled")))
+
+
+class FlightScheduleCache:
+    """Flight schedules indexed by (origin, destination, date).
+
+    A miss triggers one upstream fetch, shared by every concurrent caller,
+    and the returned page is indexed in a single pass so that all routes it
+    contains are served from memory until the TTL expires. Routes that are
+    absent from the page resolve to an empty result against the same snapshot.
+    """
+
+    def __init__(self, fetch, ttl=FLIGHT_CACHE_TTL, maxsize=FLIGHT_CACHE_SIZE):
+        self._fetch = fetch
+        self.ttl = ttl
+        self._routes = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._flight = SingleFlight()
+        self._snapshot = (0.0, {})
+        self.fetches = 0
+
+    async def _refresh(self):
+        self.fetches += 1
+        flights = await self._fetch()
+        index = {}
+        for flight in flights:
+            index.setdefault(route_key(flight), []).append(flight)
+        for key, matches in index.items():
+            self._routes.set(key, matches)
+        self._snapshot = (time.monotonic() + self.ttl, index)
+        return index
+
+    async def _index(self):
+        expires_at, index = self._snapshot
+        if expires_at > time.monotonic():
+            return index
+        return await self._flight.run("schedule", self._refresh)
+
+    async def lookup(self, origin, destination, date):
+        key = (origin, destination, date)
+        cached = self._routes.get(key)
+        if cached is not None:
+            return cached
+        index = await self._index()
+        matches = index.get(key, [])
+        if not matches:
+            self._routes.set(key, matches)
+        return matches
+
+    def invalidate(self):
+        self._routes.clear()
+        self._snapshot = (0.0, {})
+
+    def stats(self):
+        stats = self._routes.stats()
+        stats["upstream_fetches"] = self.fetches
+        stats["coalesced"] = self._flight.coalesced
+        return stats
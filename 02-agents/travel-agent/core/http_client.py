@@ -0,0 +1,166 @@
+import asyncio
+import os
+import random
+from urllib.parse import urlsplit
+
+import certifi
+import httpx
+
+from core.metrics import REGISTRY, Timer
+
+HTTP_TIMEOUT = float(os.environ.get("TRAVEL_HTTP_TIMEOUT", "10"))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("TRAVEL_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_PER_HOST_LIMIT = int(os.environ.get("TRAVEL_HTTP_PER_HOST_LIMIT", "10"))
+HTTP_RETRIES = int(os.environ.get("TRAVEL_HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.environ.get("TRAVEL_HTTP_BACKOFF", "0.5"))
+HTTP_MAX_BACKOFF = float(os.environ.get("TRAVEL_HTTP_MAX_BACKOFF", "30"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Failures where the request provably never reached the server, and the
+# status a server returns before acting; safe to retry for any method.
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+UNSAFE_RETRY_STATUSES = {429}
+
+HTTP_TIMER = Timer("travel_http", "host")
+HTTP_RESPONSES = REGISTRY.counter("travel_http_responses_total", "HTTP responses by status", ("host", "status"))
+HTTP_RETRIES_TOTAL = REGISTRY.counter("travel_http_retries_total", "HTTP attempts that were retried", ("host",))
+
+
+class HttpClient:
+    """Shared keep-alive HTTP client with per-host limits, timeouts and retries."""
+
+    def __init__(
+        self,
+        timeout=HTTP_TIMEOUT,
+        max_connections=HTTP_MAX_CONNECTIONS,
+        per_host_limit=HTTP_PER_HOST_LIMIT,
+        retries=HTTP_RETRIES,
+        backoff=HTTP_BACKOFF,
+        max_backoff=HTTP_MAX_BACKOFF,
+        verify=None,
+    ):
+        self.timeout = timeout
+        self.per_host_limit = per_host_limit
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            verify=verify if verify is not None else certifi.where(),
+        )
+        self._hosts = {}
+
+    def _host(self, host):
+        """Per-host semaphore and metric children, resolved once per host."""
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = (
+                asyncio.Semaphore(self.per_host_limit), HTTP_TIMER.child(host), HTTP_RETRIES_TOTAL.labels(host)
+            )
+        return state
+
+    def _delay(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                # A server asking for minutes would otherwise stall the task that long
+                return min(float(retry_after), self.max_backoff)
+        return min(self.backoff * (2 ** attempt) * (0.5 + random.random() / 2), self.max_backoff)
+
+    async def request(self, method, url, retry_unsafe=False, **kwargs):
+        """Send a request, retrying connection errors, timeouts and 429/5xx.
+
+        Non-idempotent methods (POST, PATCH) are only retried when the
+        request never reached the server or got a 429, since a timeout or
+        5xx may come after the server acted on it; pass ``retry_unsafe=True``
+        when the endpoint deduplicates retries itself.
+        """
+        host = urlsplit(url).netloc
+        limit, timed, retries = self._host(host)
+        safe = retry_unsafe or method.upper() in IDEMPOTENT_METHODS
+        started = timed.start()
+        try:
+            return await self._send(host, limit, retries, safe, method, url, **kwargs)
+        except BaseException:
+            timed.errors.value += 1
+            raise
+        finally:
+            timed.stop(started)
+
+    async def _send(self, host, limit, retries, safe, method, url, **kwargs):
+        retry_errors = (httpx.TimeoutException, httpx.TransportError) if safe else NOT_SENT_ERRORS
+        retry_statuses = RETRY_STATUSES if safe else UNSAFE_RETRY_STATUSES
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                # Hold a host slot only while a request is on the wire, not through the backoff
+                async with limit:
+                    response = await self._client.request(method, url, **kwargs)
+            except retry_errors:
+                if last:
+                    raise
+                retries.inc()
+                await asyncio.sleep(self._delay(attempt))
+                continue
+            HTTP_RESPONSES.labels(host, response.status_code).inc()
+            if response.status_code in retry_statuses and not last:
+                retries.inc()
+                await asyncio.sleep(self._delay(attempt, response))
+                continue
+            return response
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+_client = None
+
+
+def get_http_client():
+    """Return the process-wide :class:`HttpClient`, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = HttpClient()
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+class RateLimiter:
+    """Token bucket: at most ``rate`` acquisitions per second, bursting to ``burst``."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(1, rate))
+        self._tokens = self.burst
+        self._updated = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
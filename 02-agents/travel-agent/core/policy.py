@@ -0,0 +1,303 @@
+"""Declarative expense policy, compiled to SQL and evaluated incrementally.
+
+A policy is a list of rules (Python dicts, or a JSON file named by
+``TRAVEL_POLICY_FILE``)::
+
+    [
+        {"name": "meals", "kind": "cap", "max": 80, "categories": ["meal"]},
+        {"name": "summer-flights", "kind": "cap", "max": 1500, "categories": ["flight"],
+         "from": "2025-06-01", "to": "2025-08-31"},
+        {"name": "trip-budget", "kind": "trip_total", "max": 10000},
+        {"name": "hotel-nightly", "kind": "nightly_rate", "max": 300, "destinations": ["NYC"]},
+        {"name": "fiscal-year", "kind": "date_window", "from": "2025-01-01", "to": "2025-12-31"}
+    ]
+
+``cap`` and ``date_window`` rules check single expenses and compile into one
+SQL predicate, which also defines the partial index ``idx_expenses_policy``
+so only violating rows are ever read. ``nightly_rate`` compiles into a
+predicate over hotel bookings. ``ta_book_hotel`` records ``price`` as the
+nightly rate; set ``"price": "stay"`` on the rule when bookings carry the
+price of the whole stay, to compare ``price / nights`` instead. ``trip_total``
+compares the session's per-category rollups. Expenses and bookings are never
+updated, so the engine remembers per session the highest row ids it has
+evaluated and the violations found, and each check only reads rows added since.
+"""
+import datetime
+import hashlib
+import json
+import math
+import os
+from collections import OrderedDict
+
+POLICY_LIMIT = 5000
+
+POLICY_FILE = os.environ.get("TRAVEL_POLICY_FILE")
+# Sessions whose evaluation progress is kept in memory (LRU); an evicted
+# session is re-evaluated from scratch on its next check.
+POLICY_STATE_SIZE = int(os.environ.get("TRAVEL_POLICY_STATE_SIZE", "4096"))
+
+DEFAULT_POLICY = [
+    {"name": "limit", "kind": "cap", "max": POLICY_LIMIT, "reason": "Exceeds allowed limit"},
+]
+
+RULE_KINDS = ("cap", "date_window", "trip_total", "nightly_rate")
+
+SELECT_MAX_EXPENSE_ID = "SELECT MAX(id) FROM expenses"
+SELECT_MAX_BOOKING_ID = "SELECT MAX(id) FROM bookings"
+
+SELECT_SESSION_TOTALS = '''
+    SELECT type, total FROM expense_rollups
+    WHERE user_id = ? AND session_id = ?
+'''
+
+# Rows in (after, hwm] matching the compiled predicate; ``user_id``/``session_id``
+# plus the rowid range are served by idx_expenses_policy / idx_bookings_user_session.
+SELECT_EXPENSE_VIOLATIONS = '''
+    SELECT id, type, amount, date, {flags} FROM expenses
+    WHERE user_id = ? AND session_id = ? AND id > ? AND id <= ? AND ({predicate})
+    ORDER BY id
+'''
+
+SELECT_BOOKING_VIOLATIONS = '''
+    SELECT id, destination, price, nights, {flags} FROM bookings
+    WHERE user_id = ? AND session_id = ? AND id > ? AND id <= ?
+        AND type = 'hotel' AND nights > 0 AND ({predicate})
+    ORDER BY id
+'''
+
+SELECT_POLICY_INDEX = "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = 'idx_expenses_policy'"
+
+
+class PolicyError(ValueError):
+    """A policy rule is malformed."""
+
+
+def _literal(value):
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    value = float(value)
+    if not math.isfinite(value):
+        # repr() would give 'inf'/'nan', which SQLite reads as column names
+        raise PolicyError(f"{value} is not a finite number")
+    return repr(value)
+
+
+def _in(column, values):
+    return f"{column} IN ({', '.join(_literal(v) for v in values)})"
+
+
+def _date(spec, key):
+    value = spec.get(key)
+    if value is None:
+        return None
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):
+        raise PolicyError(f"rule '{spec.get('name')}': '{key}' must be a YYYY-MM-DD date") from None
+
+
+class Rule:
+    """One compiled policy rule."""
+
+    def __init__(self, spec, index):
+        if not isinstance(spec, dict):
+            raise PolicyError(f"rule #{index} must be an object")
+        self.name = str(spec.get("name") or f"rule-{index}")
+        self.kind = spec.get("kind")
+        if self.kind not in RULE_KINDS:
+            raise PolicyError(f"rule '{self.name}': kind must be one of {', '.join(RULE_KINDS)}")
+        self.categories = [str(c) for c in spec.get("categories") or ()]
+        self.destinations = [str(d) for d in spec.get("destinations") or ()]
+        self.start, self.end = _date(spec, "from"), _date(spec, "to")
+        self.price = spec.get("price", "nightly")
+        if self.price not in ("nightly", "stay"):
+            raise PolicyError(f"rule '{self.name}': 'price' must be 'nightly' or 'stay'")
+        self.max = spec.get("max")
+        if self.kind != "date_window":
+            if (isinstance(self.max, bool) or not isinstance(self.max, (int, float))
+                    or not math.isfinite(self.max) or self.max < 0):
+                raise PolicyError(f"rule '{self.name}': 'max' must be a finite non-negative number")
+            self.max = float(self.max)
+        elif self.start is None and self.end is None:
+            raise PolicyError(f"rule '{self.name}': date_window needs 'from' and/or 'to'")
+        self.reason = spec.get("reason") or self._default_reason()
+        self.predicate = self._compile()
+
+    def _default_reason(self):
+        if self.kind == "cap":
+            scope = f"{'/'.join(self.categories)} " if self.categories else ""
+            return f"Exceeds {scope}limit of {self.max:g}"
+        if self.kind == "date_window":
+            return f"Outside allowed dates {self.start or '…'} to {self.end or '…'}"
+        if self.kind == "trip_total":
+            return f"Trip total exceeds {self.max:g}"
+        return f"Nightly rate exceeds {self.max:g}"
+
+    def _compile(self):
+        """The rule as a SQL predicate over one expense/booking row, or None."""
+        if self.kind == "trip_total":
+            return None
+        if self.kind == "nightly_rate":
+            limit = _literal(self.max)
+            terms = [f"price > {limit} * nights" if self.price == "stay" else f"price > {limit}"]
+            if self.destinations:
+                terms.append(_in("destination", self.destinations))
+            return " AND ".join(terms)
+        terms = [_in("type", self.categories)] if self.categories else []
+        if self.kind == "cap":
+            terms.append(f"amount > {_literal(self.max)}")
+            if self.start:
+                terms.append(f"date >= {_literal(self.start)}")
+            if self.end:
+                terms.append(f"date <= {_literal(self.end)}")
+        else:
+            outside = []
+            if self.start:
+                outside.append(f"date < {_literal(self.start)}")
+            if self.end:
+                outside.append(f"date > {_literal(self.end)}")
+            terms.append(f"({' OR '.join(outside)})")
+        return " AND ".join(terms)
+
+
+class Policy:
+    """A list of rules compiled into the SQL that evaluates them."""
+
+    def __init__(self, rules):
+        if not isinstance(rules, list):
+            raise PolicyError("a policy is a list of rules")
+        self.rules = [Rule(spec, i) for i, spec in enumerate(rules)]
+        names = [r.name for r in self.rules]
+        if len(set(names)) != len(names):
+            raise PolicyError("rule names must be unique")
+        self.expense_rules = [r for r in self.rules if r.kind in ("cap", "date_window")]
+        self.booking_rules = [r for r in self.rules if r.kind == "nightly_rate"]
+        self.trip_rules = [r for r in self.rules if r.kind == "trip_total"]
+        self.version = hashlib.sha256(json.dumps(rules, sort_keys=True).encode()).hexdigest()[:12]
+
+        self.expense_predicate = " OR ".join(f"({r.predicate})" for r in self.expense_rules)
+        self.select_expenses = self._select(SELECT_EXPENSE_VIOLATIONS, self.expense_rules)
+        self.select_bookings = self._select(SELECT_BOOKING_VIOLATIONS, self.booking_rules)
+        self.create_index = (
+            "CREATE INDEX idx_expenses_policy ON expenses (user_id, session_id) "
+            f"WHERE {self.expense_predicate}"
+        ) if self.expense_rules else None
+
+    @staticmethod
+    def _select(template, rules):
+        if not rules:
+            return None
+        return template.format(
+            flags=", ".join(f"({r.predicate})" for r in rules),
+            predicate=" OR ".join(f"({r.predicate})" for r in rules),
+        )
+
+
+def load_policy(path=POLICY_FILE):
+    """The policy in JSON file ``path``, or :data:`DEFAULT_POLICY` without one."""
+    if not path:
+        return Policy(DEFAULT_POLICY)
+    with open(path) as f:
+        return Policy(json.load(f))
+
+
+class PolicyEngine:
+    """Evaluates a :class:`Policy` per (user, session), reading only new rows."""
+
+    def __init__(self, policy, maxsize=POLICY_STATE_SIZE):
+        self.policy = policy
+        self.maxsize = maxsize
+        # (user_id, session_id) -> (expense_hwm, booking_hwm, expense_violations, booking_violations)
+        self._state = OrderedDict()
+        self.rows_scanned = 0
+
+    def install(self, conn):
+        """Create the partial index for this policy, replacing one for another policy."""
+        conn.execute("DROP INDEX IF EXISTS idx_expenses_over_limit")  # pre-policy-engine index
+        row = conn.execute(SELECT_POLICY_INDEX).fetchone()
+        if row and row[0] == self.policy.create_index:
+            return
+        conn.execute("DROP INDEX IF EXISTS idx_expenses_policy")
+        if self.policy.create_index:
+            conn.execute(self.policy.create_index)
+
+    def _scan(self, conn, user_id, session_id, expense_after, booking_after):
+        # Bound the scan by ids committed before it starts; rows committed later
+        # get higher ids and are picked up by the next check.
+        policy = self.policy
+        expense_hwm = conn.execute(SELECT_MAX_EXPENSE_ID).fetchone()[0] or 0
+        booking_hwm = conn.execute(SELECT_MAX_BOOKING_ID).fetchone()[0] or 0
+        expenses = conn.execute(
+            policy.select_expenses, (user_id, session_id, expense_after, expense_hwm)
+        ).fetchall() if policy.select_expenses and expense_hwm > expense_after else []
+        bookings = conn.execute(
+            policy.select_bookings, (user_id, session_id, booking_after, booking_hwm)
+        ).fetchall() if policy.select_bookings and booking_hwm > booking_after else []
+        totals = conn.execute(
+            SELECT_SESSION_TOTALS, (user_id, session_id)
+        ).fetchall() if policy.trip_rules else []
+        return expense_hwm, booking_hwm, expenses, bookings, totals
+
+    def _expense_violations(self, rows):
+        rules = self.policy.expense_rules
+        return [
+            {"type": t, "reason": rule.reason, "amount": amount, "rule": rule.name, "date": date}
+            for _, t, amount, date, *flags in rows
+            for rule, flag in zip(rules, flags) if flag
+        ]
+
+    def _booking_violations(self, rows):
+        rules = self.policy.booking_rules
+        return [
+            {"type": "hotel", "reason": rule.reason,
+             "amount": round(price / nights, 2) if rule.price == "stay" else price,
+             "rule": rule.name, "destination": destination, "nights": nights}
+            for _, destination, price, nights, *flags in rows
+            for rule, flag in zip(rules, flags) if flag
+        ]
+
+    def _trip_violations(self, totals):
+        violations = []
+        for rule in self.policy.trip_rules:
+            categories = set(rule.categories)
+            total = sum(t for category, t in totals if not categories or category in categories)
+            if total > rule.max:
+                violations.append({"type": "/".join(rule.categories) or "total",
+                                   "reason": rule.reason, "amount": total, "rule": rule.name})
+        return violations
+
+    async def check(self, db, user_id, session_id):
+        """Violations for the session, evaluating only rows added since its last check."""
+        key = (user_id, session_id)
+        state = self._state.get(key)
+        expense_hwm, booking_hwm, expenses, bookings = state or (0, 0, [], [])
+        new_expense_hwm, new_booking_hwm, expense_rows, booking_rows, totals = await db.run_read(
+            self._scan, user_id, session_id, expense_hwm, booking_hwm
+        )
+        self.rows_scanned += len(expense_rows) + len(booking_rows)
+        if expense_rows:
+            expenses = expenses + self._expense_violations(expense_rows)
+        if booking_rows:
+            bookings = bookings + self._booking_violations(booking_rows)
+        # A concurrent check of the same session may have advanced it already.
+        if self._state.get(key) is state:
+            self._state[key] = (new_expense_hwm, new_booking_hwm, expenses, bookings)
+            self._state.move_to_end(key)
+            while len(self._state) > self.maxsize:
+                self._state.popitem(last=False)
+        return {"violations": [*expenses, *bookings, *self._trip_violations(totals)]}
+
+    def reset(self):
+        """Forget all evaluation progress, e.g. after rows were deleted or rewritten."""
+        self._state.clear()
+
+    def stats(self):
+        return {
+            "policy": self.policy.version,
+            "rules": len(self.policy.rules),
+            "sessions": len(self._state),
+            "rows_scanned": self.rows_scanned,
+        }
+
+
+policy_engine = PolicyEngine(load_policy())
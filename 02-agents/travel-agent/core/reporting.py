@@ -0,0 +1,263 @@
+"""Org-wide spend reporting over the expenses and bookings tables.
+
+Tables are streamed from every shard in keyset-paginated chunks and turned
+into columnar NumPy arrays, with string columns dictionary-encoded to int32
+codes. Group-bys are folded into running per-group arrays chunk by chunk with
+``np.unique``/``np.bincount``, so memory stays bounded by the chunk size and
+the number of groups, not the table size. Exports stream the same chunks to
+CSV or Parquet (Parquet needs ``pyarrow``).
+
+The agent reaches both through the ``ta_spend_report`` and ``ta_export_table``
+tools, which commit write-behind expenses before reading.
+"""
+import asyncio
+import csv
+import os
+import time
+
+import numpy as np
+
+from core.storage import get_db
+from core.travel import expense_buffer
+
+REPORT_CHUNK_ROWS = int(os.environ.get("TRAVEL_REPORT_CHUNK_ROWS", "200000"))
+REPORT_DIR = os.environ.get("TRAVEL_REPORT_DIR", "reports")
+
+MONTH = "CAST(substr(date, 1, 4) AS INTEGER) * 100 + CAST(substr(date, 6, 2) AS INTEGER)"
+
+# Per table: column name -> SQL expression, and which columns are
+# dictionary-encoded strings (the rest are numeric). ``id`` is the keyset
+# pagination key and always comes first.
+TABLES = {
+    "expenses": (
+        {"id": "id", "user": "user_id", "session": "session_id", "category": "type",
+         "amount": "amount", "date": "date", "month": MONTH},
+        ("user", "session", "category", "date"),
+    ),
+    "bookings": (
+        {"id": "id", "user": "user_id", "session": "session_id", "category": "type",
+         "destination": "destination", "amount": "price", "nights": "nights", "date": "date",
+         "month": MONTH},
+        ("user", "session", "category", "destination", "date"),
+    ),
+}
+
+SELECT_CHUNK = "SELECT {columns} FROM {table} WHERE id > ? ORDER BY id LIMIT ?"
+
+# Group keys pack up to three columns into one int64, 21 bits each: enough
+# for yyyymm months and for up to ~2M distinct users/destinations. Larger
+# codes or values raise instead of colliding.
+GROUP_KEY_BITS = 21
+GROUP_KEY_LIMIT = 1 << GROUP_KEY_BITS
+
+
+class Dictionary(dict):
+    """String -> int32 code, assigning the next code to unseen values."""
+
+    def __init__(self):
+        super().__init__()
+        self.by_code = []
+
+    def __missing__(self, value):
+        code = self[value] = len(self.by_code)
+        self.by_code.append(value)
+        return code
+
+    def encode(self, column):
+        return np.fromiter(map(self.__getitem__, column), dtype=np.int32, count=len(column))
+
+
+def _select(table, columns):
+    expressions = TABLES[table][0]
+    names = ["id", *(c for c in columns or expressions if c != "id")]
+    for name in names:
+        if name not in expressions:
+            raise ValueError(f"unknown {table} column '{name}'")
+    return names, SELECT_CHUNK.format(table=table, columns=", ".join(expressions[n] for n in names))
+
+
+def _fetch_chunk(conn, sql, after, limit):
+    return conn.execute(sql, (after, limit)).fetchall()
+
+
+def stream_rows(table, columns=None, chunk_rows=REPORT_CHUNK_ROWS):
+    """Yield lists of raw rows from ``table`` on every shard, ``chunk_rows`` at a time.
+
+    Rows hold ``id`` followed by ``columns`` (default: all). Each chunk is its
+    own short read, so no connection or snapshot is held across the whole scan.
+    """
+    _, sql = _select(table, columns)
+    for shard in get_db().shards:
+        after = 0
+        while True:
+            rows = shard.read(_fetch_chunk, sql, after, chunk_rows)
+            if not rows:
+                break
+            yield rows
+            after = rows[-1][0]
+
+
+def stream_columns(table, columns=None, dictionaries=None, chunk_rows=REPORT_CHUNK_ROWS):
+    """Yield each chunk of ``table`` as ``{column: ndarray}``.
+
+    String columns become int32 codes into ``dictionaries[column]``, which
+    is shared across chunks; missing numbers become 0 (NaN for amounts).
+    """
+    names, _ = _select(table, columns)
+    encoded = TABLES[table][1]
+    dictionaries = dictionaries if dictionaries is not None else {}
+    for rows in stream_rows(table, names, chunk_rows):
+        chunk = {}
+        for name, values in zip(names, zip(*rows)):
+            if name in encoded:
+                chunk[name] = dictionaries.setdefault(name, Dictionary()).encode(values)
+            elif name == "amount":
+                chunk[name] = np.array(values, dtype=np.float64)
+            else:
+                chunk[name] = np.array([v or 0 for v in values], dtype=np.int64)
+        yield chunk
+
+
+class GroupBy:
+    """Sum and count of ``amount`` grouped by up to three code/int columns."""
+
+    def __init__(self, by):
+        if not 1 <= len(by) <= 3:
+            raise ValueError("group by one to three columns")
+        self.by = tuple(by)
+        self.keys = np.empty(0, dtype=np.int64)
+        self.totals = np.empty(0, dtype=np.float64)
+        self.counts = np.empty(0, dtype=np.float64)
+
+    def update(self, chunk):
+        if len(self.by) > 1:
+            for name in self.by:
+                column = chunk[name]
+                if len(column) and (column.min() < 0 or column.max() >= GROUP_KEY_LIMIT):
+                    raise ValueError(
+                        f"cannot group by {'+'.join(self.by)}: '{name}' has values outside "
+                        f"[0, {GROUP_KEY_LIMIT}) (more than {GROUP_KEY_LIMIT} distinct values?)"
+                    )
+        key = chunk[self.by[0]].astype(np.int64)
+        for name in self.by[1:]:
+            key = (key << GROUP_KEY_BITS) | chunk[name].astype(np.int64)
+        # Fold the chunk into the running groups in one vectorized reduction.
+        unique, inverse = np.unique(np.concatenate((self.keys, key)), return_inverse=True)
+        amounts = np.concatenate((self.totals, np.nan_to_num(chunk["amount"])))
+        counts = np.concatenate((self.counts, np.ones(len(key))))
+        self.keys = unique
+        self.totals = np.bincount(inverse, weights=amounts, minlength=len(unique))
+        self.counts = np.bincount(inverse, weights=counts, minlength=len(unique))
+
+    def rows(self, dictionaries):
+        """Groups as dicts with decoded keys, ``total`` and ``count``, by total spend."""
+        order = np.argsort(-self.totals, kind="stable")
+        keys = self.keys[order]
+        mask = GROUP_KEY_LIMIT - 1
+        columns = []
+        for i, name in enumerate(reversed(self.by)):
+            codes = ((keys >> (GROUP_KEY_BITS * i)) & mask).tolist()
+            values = dictionaries[name].by_code if name in dictionaries else None
+            columns.insert(0, [values[c] for c in codes] if values is not None else codes)
+        columns.append(self.totals[order].tolist())
+        columns.append(self.counts[order].astype(np.int64).tolist())
+        names = (*self.by, "total", "count")
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def spend_report(table="expenses", group_bys=(("user",), ("category",), ("month",)),
+                 chunk_rows=REPORT_CHUNK_ROWS):
+    """One pass over ``table`` computing every group-by in ``group_bys``.
+
+    Returns ``{"rows": n, "total": sum, "by": {"category": [...], ...}}``,
+    each group list sorted by total spend. Only the grouped columns and
+    ``amount`` are read.
+    """
+    dictionaries = {}
+    aggregates = [GroupBy(by) for by in group_bys]
+    columns = ["amount", *dict.fromkeys(name for by in group_bys for name in by)]
+    rows, total = 0, 0.0
+    for chunk in stream_columns(table, columns, dictionaries, chunk_rows):
+        rows += len(chunk["id"])
+        total += float(np.nansum(chunk["amount"]))
+        for aggregate in aggregates:
+            aggregate.update(chunk)
+    return {
+        "rows": rows,
+        "total": total,
+        "by": {"+".join(a.by): a.rows(dictionaries) for a in aggregates},
+    }
+
+
+async def spend_report_impl(table="expenses", group_bys=(("user",), ("category",), ("month",)), top=None):
+    """:func:`spend_report` on a worker thread, for use from the event loop.
+
+    Buffered expenses are committed first so the report includes them; ``top``
+    keeps only the biggest groups of each group-by.
+    """
+    if table not in TABLES:
+        return {"error": f"unknown table '{table}' (expected {' or '.join(TABLES)})"}
+    await expense_buffer.barrier()
+    try:
+        report = await asyncio.to_thread(spend_report, table, group_bys)
+    except ValueError as e:
+        return {"error": str(e)}
+    if top is not None:
+        report["by"] = {by: groups[:top] for by, groups in report["by"].items()}
+    return report
+
+
+async def export_table_impl(table="expenses", fmt="csv"):
+    """:func:`export_table` to a new timestamped file in ``REPORT_DIR``."""
+    if table not in TABLES:
+        return {"error": f"unknown table '{table}' (expected {' or '.join(TABLES)})"}
+    if fmt not in ("csv", "parquet"):
+        return {"error": f"unsupported export format '{fmt}' (expected csv or parquet)"}
+    await expense_buffer.barrier()
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    path = os.path.abspath(os.path.join(REPORT_DIR, f"{table}-{time.strftime('%Y%m%d-%H%M%S')}.{fmt}"))
+    try:
+        rows = await asyncio.to_thread(export_table, table, path, fmt)
+    except ImportError as e:
+        return {"error": str(e)}
+    return {"status": "exported", "path": path, "rows": rows}
+
+
+def export_table(table, path, fmt=None, chunk_rows=REPORT_CHUNK_ROWS):
+    """Stream ``table`` to ``path`` as CSV or Parquet (by extension unless
+    ``fmt`` is given) one chunk at a time; returns the number of rows."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    names, _ = _select(table, None)
+    written = 0
+    if fmt == "csv":
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(names)
+            for rows in stream_rows(table, names, chunk_rows):
+                writer.writerows(rows)
+                written += len(rows)
+        return written
+    if fmt != "parquet":
+        raise ValueError(f"unsupported export format '{fmt}' (expected csv or parquet)")
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from None
+
+    encoded = TABLES[table][1]
+    schema = pa.schema([
+        (name, pa.dictionary(pa.int32(), pa.string()) if name in encoded
+         else pa.float64() if name == "amount" else pa.int64())
+        for name in names
+    ])
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for rows in stream_rows(table, names, chunk_rows):
+            arrays = [
+                pa.array(column, type=field.type.value_type).dictionary_encode()
+                if pa.types.is_dictionary(field.type) else pa.array(column, type=field.type)
+                for column, field in zip(zip(*rows), schema)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            written += len(rows)
+    return written
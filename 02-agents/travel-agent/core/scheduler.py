@@ -0,0 +1,206 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from loguru import logger
+
+from core.storage import get_db
+
+JOB_RETRIES = int(os.environ.get("TRAVEL_JOB_RETRIES", "2"))
+JOB_RETRY_DELAY = float(os.environ.get("TRAVEL_JOB_RETRY_DELAY", "60"))
+
+SELECT_LAST_RUN = "SELECT last_run FROM scheduler_runs WHERE job = ?"
+UPSERT_LAST_RUN = '''
+    INSERT INTO scheduler_runs (job, last_run) VALUES (?, ?)
+    ON CONFLICT (job) DO UPDATE SET last_run = excluded.last_run
+'''
+
+
+def _parse_field(field, low, high):
+    values = set()
+    for part in field.split(","):
+        expr, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if expr == "*":
+            start, end = low, high
+        elif "-" in expr:
+            start, end = (int(v) for v in expr.split("-", 1))
+        else:
+            start = end = int(expr)
+            if step > 1:
+                end = high
+        if start < low or end > high or start > end:
+            raise ValueError(f"cron field '{field}' out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """Five-field cron expression (minute hour day month weekday) in a timezone.
+
+    Supports ``*``, lists, ranges and steps. Weekdays use cron numbering
+    (0 or 7 = Sunday). As in cron, when both day-of-month and weekday are
+    restricted a time matches if either one does.
+    """
+
+    def __init__(self, expression, tz="UTC"):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"expected 5 cron fields, got '{expression}'")
+        self.expression = expression
+        self.tz = ZoneInfo(tz) if isinstance(tz, str) else tz
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12)
+        self.weekdays = frozenset(d % 7 for d in _parse_field(fields[4], 0, 7))
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, dt):
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.isoweekday() % 7) in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, ts):
+        """Return the first fire time strictly after epoch ``ts``, as epoch seconds."""
+        local = datetime.fromtimestamp(ts, self.tz).replace(tzinfo=None, second=0, microsecond=0)
+        dt = local + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(dt):
+                dt = (dt + timedelta(days=1)).replace(hour=0, minute=0)
+            elif dt.hour not in self.hours:
+                dt = (dt + timedelta(hours=1)).replace(minute=0)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                fire = dt.replace(tzinfo=self.tz).timestamp()
+                if fire > ts:
+                    return fire
+                dt += timedelta(minutes=1)
+        raise ValueError(f"cron expression '{self.expression}' never fires")
+
+    def previous_fire(self, since, until):
+        """Return the latest fire time in ``(since, until]``, or None."""
+        latest = None
+        fire = self.next_after(since)
+        while fire <= until:
+            latest = fire
+            fire = self.next_after(fire)
+        return latest
+
+
+class Job:
+    def __init__(self, name, schedule, fn, catch_up=True, retries=JOB_RETRIES, retry_delay=JOB_RETRY_DELAY):
+        self.name = name
+        self.schedule = schedule
+        self.fn = fn
+        self.catch_up = catch_up
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.next_fire = None
+        self.running = None
+
+
+class Scheduler:
+    """Min-heap scheduler for cron jobs with persisted last-run catch-up.
+
+    Next fire times are derived from the schedule, not from "now + interval",
+    so a slow job or a late wake-up never drifts the slot. A failed run is
+    retried ``retries`` times, ``retry_delay`` seconds apart. Each job's last
+    slot is stored in ``scheduler_runs`` only once a run succeeds, so a
+    restart never repeats a completed slot and never forgets one that failed
+    or was cut short: the latest missed slot since the last success fires
+    immediately when ``catch_up`` is set.
+    """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._heap = []
+        self._jobs = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def add_job(self, name, cron, fn, tz="UTC", catch_up=True, retries=JOB_RETRIES, retry_delay=JOB_RETRY_DELAY):
+        job = Job(name, CronSchedule(cron, tz), fn, catch_up, retries, retry_delay)
+        self._jobs[name] = job
+        self._schedule(job, job.schedule.next_after(self._clock()))
+        self._wakeup.set()
+        return job
+
+    def _push(self, job, fire_at):
+        heapq.heappush(self._heap, (fire_at, next(self._seq), job.name))
+
+    def _schedule(self, job, fire_at):
+        """Queue ``fire_at`` as the job's next regular slot unless it is already queued."""
+        if job.next_fire is not None and fire_at <= job.next_fire:
+            return
+        job.next_fire = fire_at
+        self._push(job, fire_at)
+
+    async def _catch_up(self):
+        now = self._clock()
+        for job in self._jobs.values():
+            row = await get_db().fetchone(SELECT_LAST_RUN, (job.name,))
+            if not job.catch_up or row is None:
+                continue
+            missed = job.schedule.previous_fire(row[0], now)
+            if missed is not None:
+                logger.warning(f"⏰ Catching up missed run of '{job.name}' scheduled for "
+                               f"{datetime.fromtimestamp(missed, timezone.utc).isoformat()}")
+                self._push(job, missed)
+
+    async def _fire(self, job, fire_at):
+        row = await get_db().fetchone(SELECT_LAST_RUN, (job.name,))
+        if row is not None and row[0] >= fire_at:
+            return
+        for attempt in range(job.retries + 1):
+            started = time.perf_counter()
+            try:
+                await job.fn()
+            except Exception as e:
+                if attempt == job.retries:
+                    logger.error(f"❌ Job '{job.name}' failed after {attempt + 1} attempts: {e}")
+                    return
+                logger.error(f"❌ Job '{job.name}' failed: {e}; retrying in {job.retry_delay:g}s")
+                await asyncio.sleep(job.retry_delay)
+                continue
+            await get_db().execute(UPSERT_LAST_RUN, (job.name, fire_at))
+            logger.info(f"📅 Job '{job.name}' finished in {time.perf_counter() - started:.1f}s")
+            return
+
+    async def run(self):
+        await self._catch_up()
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            fire_at, _, name = self._heap[0]
+            delay = fire_at - self._clock()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    # Sleep in bounded slices so wall-clock jumps are noticed.
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(delay, 60))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._heap)
+            job = self._jobs.get(name)
+            if job is None:
+                continue
+            self._schedule(job, job.schedule.next_after(max(fire_at, self._clock())))
+            if job.running is not None and not job.running.done():
+                logger.warning(f"⏭️ Skipping '{name}': previous run still in progress")
+                continue
+            job.running = asyncio.create_task(self._fire(job, fire_at))
@@ -0,0 +1,374 @@
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from core.metrics import REGISTRY, Timer
+
+DB_PATH = os.environ.get("TRAVEL_DB_PATH", "travel_expenses.db")
+POOL_SIZE = int(os.environ.get("TRAVEL_DB_POOL_SIZE", "4"))
+DB_SHARDS = int(os.environ.get("TRAVEL_DB_SHARDS", "1"))
+DB_BACKEND = os.environ.get("TRAVEL_DB_BACKEND", "sharded" if DB_SHARDS > 1 else "sqlite")
+
+# WAL lets readers run alongside the single writer; NORMAL sync is durable
+# across application crashes and only fsyncs on checkpoint.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA foreign_keys=ON",
+)
+
+# Statements are kept as module constants so every pooled connection
+# reuses the same prepared statement from sqlite3's per-connection cache.
+STATEMENT_CACHE_SIZE = 256
+
+DB_TIMER = Timer("travel_db", "op")
+DB_EXECUTE, DB_EXECUTEMANY, DB_FETCHALL, DB_FETCHONE = (
+    DB_TIMER.child(op) for op in ("execute", "executemany", "fetchall", "fetchone")
+)
+DB_QUEUE_DEPTH = REGISTRY.gauge("travel_db_queue_depth", "Database calls waiting for a pool thread", ("db",))
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared by all worker threads."""
+
+    def __init__(self, path=DB_PATH, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=5.0,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+        return self._idle.get()
+
+    def release(self, conn):
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class Storage:
+    """Interface every storage backend implements.
+
+    Per-user data is read and written through ``for_user(user_id)``, which
+    returns the :class:`Database` holding that user. The plain ``execute``/
+    ``fetch*``/``run_*`` calls address the backend's ``primary`` database,
+    where data that belongs to no user (scheduler state) lives; a backend
+    only has to provide ``primary``, ``shards`` and ``for_user``. ``shards``
+    lists every database, for schema setup and cross-shard queries.
+    """
+
+    shards = ()
+    primary = None
+
+    def for_user(self, user_id):
+        raise NotImplementedError
+
+    # --- sync API, on the primary database ---
+    def transaction(self, fn, *args):
+        return self.primary.transaction(fn, *args)
+
+    def read(self, fn, *args):
+        return self.primary.read(fn, *args)
+
+    def execute_sync(self, sql, params=()):
+        return self.primary.execute_sync(sql, params)
+
+    def executemany_sync(self, sql, rows):
+        return self.primary.executemany_sync(sql, rows)
+
+    def fetchall_sync(self, sql, params=()):
+        return self.primary.fetchall_sync(sql, params)
+
+    def fetchone_sync(self, sql, params=()):
+        return self.primary.fetchone_sync(sql, params)
+
+    def executescript_sync(self, script):
+        return self.primary.executescript_sync(script)
+
+    # --- async API, on the primary database ---
+    async def execute(self, sql, params=()):
+        return await self.primary.execute(sql, params)
+
+    async def executemany(self, sql, rows):
+        return await self.primary.executemany(sql, rows)
+
+    async def fetchall(self, sql, params=()):
+        return await self.primary.fetchall(sql, params)
+
+    async def fetchone(self, sql, params=()):
+        return await self.primary.fetchone(sql, params)
+
+    async def run_transaction(self, fn, *args):
+        return await self.primary.run_transaction(fn, *args)
+
+    async def run_read(self, fn, *args):
+        return await self.primary.run_read(fn, *args)
+
+    async def fetchall_shards(self, sql, params=()):
+        """Run a read on every shard concurrently and concatenate the rows."""
+        results = await asyncio.gather(*(shard.fetchall(sql, params) for shard in self.shards))
+        return [row for rows in results for row in rows]
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+
+class Database(Storage):
+    """Async facade over the pool: every call runs on a dedicated thread pool
+    so SQLite I/O never blocks the event loop. An uncontended call pays one
+    executor hop; under load, calls queue for one of ``pool_size`` threads
+    (see ``travel_db_queue_depth``), which trades per-call latency for
+    throughput."""
+
+    def __init__(self, path=DB_PATH, pool_size=POOL_SIZE):
+        self.path = path
+        self.pool = ConnectionPool(path, pool_size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="travel-db"
+        )
+        # SQLite allows one writer at a time; queueing writers here is
+        # cheaper than letting them spin on SQLITE_BUSY.
+        self._write_lock = threading.Lock()
+        # Calls submitted to the executor and not yet returned; beyond the
+        # pool size they are waiting for a thread.
+        self._calls = 0
+        DB_QUEUE_DEPTH.labels(os.path.basename(path)).set_function(
+            lambda: max(self._calls - pool_size, 0))
+
+    @property
+    def shards(self):
+        return (self,)
+
+    @property
+    def primary(self):
+        return self
+
+    def for_user(self, user_id):
+        return self
+
+    # --- sync API (runs on the calling thread) ---
+    def transaction(self, fn, *args):
+        """Run ``fn(conn, *args)`` inside a single write transaction."""
+        with self._write_lock, self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn, *args)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+
+    def read(self, fn, *args):
+        """Run ``fn(conn, *args)`` on a pooled connection without a write lock."""
+        with self.pool.connection() as conn:
+            return fn(conn, *args)
+
+    def execute_sync(self, sql, params=()):
+        return self.transaction(lambda conn: conn.execute(sql, params).lastrowid)
+
+    def executemany_sync(self, sql, rows):
+        return self.transaction(lambda conn: conn.executemany(sql, rows).rowcount)
+
+    def fetchall_sync(self, sql, params=()):
+        return self.read(lambda conn: conn.execute(sql, params).fetchall())
+
+    def fetchone_sync(self, sql, params=()):
+        return self.read(lambda conn: conn.execute(sql, params).fetchone())
+
+    def executescript_sync(self, script):
+        with self._write_lock, self.pool.connection() as conn:
+            conn.executescript(script)
+
+    # --- async API ---
+    async def _run(self, timed, fn, *args):
+        # Timed inline: awaiting through timed.track() would add a coroutine per call
+        started = timed.start()
+        self._calls += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except BaseException:
+            timed.errors.value += 1
+            raise
+        finally:
+            self._calls -= 1
+            timed.stop(started)
+
+    async def execute(self, sql, params=()):
+        """Execute a single write statement and return ``lastrowid``."""
+        return await self._run(DB_EXECUTE, self.execute_sync, sql, params)
+
+    async def executemany(self, sql, rows):
+        return await self._run(DB_EXECUTEMANY, self.executemany_sync, sql, list(rows))
+
+    async def fetchall(self, sql, params=()):
+        return await self._run(DB_FETCHALL, self.fetchall_sync, sql, params)
+
+    async def fetchone(self, sql, params=()):
+        return await self._run(DB_FETCHONE, self.fetchone_sync, sql, params)
+
+    async def run_transaction(self, fn, *args):
+        return await self._run(DB_TIMER.child(fn.__name__), self.transaction, fn, *args)
+
+    async def run_read(self, fn, *args):
+        return await self._run(DB_TIMER.child(fn.__name__), self.read, fn, *args)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+
+
+def shard_paths(path, count):
+    """``travel_expenses.db`` -> ``travel_expenses.shard0.db`` ... for ``count`` shards."""
+    root, ext = os.path.splitext(path)
+    return [f"{root}.shard{i}{ext or '.db'}" for i in range(count)]
+
+
+def shard_index(user_id, count):
+    """Stable shard of ``user_id``; calls without a user go to shard 0."""
+    if user_id is None or count == 1:
+        return 0
+    return zlib.crc32(str(user_id).encode()) % count
+
+
+class ShardedDatabase(Storage):
+    """Users partitioned across ``count`` SQLite files by hashed ``user_id``.
+
+    Each shard has its own pool, executor and write lock, so writes for users
+    on different shards commit in parallel. The shard count is part of the
+    data layout: changing it for an existing dataset needs a re-partition.
+    """
+
+    def __init__(self, path=DB_PATH, count=DB_SHARDS, pool_size=POOL_SIZE):
+        if count < 1:
+            raise ValueError("shard count must be at least 1")
+        self.path = path
+        self._shards = tuple(Database(p, pool_size) for p in shard_paths(path, count))
+        self.primary = self._shards[0]
+
+    @property
+    def shards(self):
+        return self._shards
+
+    def for_user(self, user_id):
+        return self._shards[shard_index(user_id, len(self._shards))]
+
+
+# TRAVEL_DB_BACKEND picks one of these; register_backend() adds others.
+BACKENDS = {
+    "sqlite": lambda: Database(),
+    "sharded": lambda: ShardedDatabase(),
+}
+
+
+def register_backend(name, factory):
+    """Make ``factory()`` (returning a :class:`Storage`) selectable by name."""
+    BACKENDS[name] = factory
+
+
+_db = None
+_db_ready = False
+_db_initializing = False
+_db_lock = threading.RLock()
+_initializers = []
+
+
+def on_first_use(fn):
+    """Run ``fn()`` (e.g. schema setup) once, the first time :func:`get_db` is called.
+
+    Hooks must be idempotent: they run again for a storage installed with
+    :func:`set_db`, and registering one after storage was first used re-runs
+    all of them on the next call. They may call :func:`get_db` themselves;
+    other threads wait until they finish.
+    """
+    global _db_ready
+    with _db_lock:
+        _initializers.append(fn)
+        _db_ready = False
+    return fn
+
+
+def get_db():
+    """Return the process-wide :class:`Storage`, creating and initializing it on first use."""
+    global _db, _db_ready, _db_initializing
+    if _db_ready:
+        return _db
+    with _db_lock:
+        if _db is None:
+            try:
+                factory = BACKENDS[DB_BACKEND]
+            except KeyError:
+                raise ValueError(
+                    f"unknown TRAVEL_DB_BACKEND '{DB_BACKEND}' (expected one of {', '.join(BACKENDS)})"
+                ) from None
+            _db = factory()
+        if not _db_ready and not _db_initializing:
+            _db_initializing = True
+            try:
+                for fn in _initializers:
+                    fn()
+                _db_ready = True
+            finally:
+                _db_initializing = False
+    return _db
+
+
+def set_db(db):
+    """Install ``db`` as the process-wide storage; returns the previous one."""
+    global _db, _db_ready
+    with _db_lock:
+        previous, _db = _db, db
+        _db_ready = False
+    return previous
@@ -0,0 +1,115 @@
+import functools
+import os
+import time
+from collections import OrderedDict
+
+from core.cache import SingleFlight
+from core.context import current_session_id, current_user_id
+from core.metrics import REGISTRY
+
+TOOL_CACHE_ENABLED = os.environ.get("TRAVEL_TOOL_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+TOOL_CACHE_SIZE = int(os.environ.get("TRAVEL_TOOL_CACHE_SIZE", "1024"))
+# Upper bound on staleness for writes made by other worker processes,
+# which do not invalidate this process's cache.
+TOOL_CACHE_TTL = float(os.environ.get("TRAVEL_TOOL_CACHE_TTL", "60"))
+
+TOOL_CACHE_REQUESTS = REGISTRY.counter(
+    "travel_tool_cache_requests_total", "Cached tool calls by result (hit/miss)", ("tool", "result")
+)
+
+
+class ToolResultCache:
+    """Results of read-only tools, scoped to the (user, session) they read.
+
+    Entries live in one dict per scope and scopes are LRU-bounded by
+    ``maxsize``. A write to a scope drops its dict, so the next read
+    recomputes; a read that was in flight across the write is not stored.
+    Concurrent identical reads share one computation.
+    """
+
+    def __init__(self, maxsize=TOOL_CACHE_SIZE, ttl=TOOL_CACHE_TTL, enabled=TOOL_CACHE_ENABLED):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled
+        self._scopes = OrderedDict()
+        self._flight = SingleFlight()
+        self._counters = {}
+        self.hits = {}
+        self.misses = {}
+        self.invalidations = 0
+        self.evictions = 0
+
+    def _scope_entries(self, scope):
+        item = self._scopes.get(scope)
+        if item is not None and item[0] > time.monotonic():
+            self._scopes.move_to_end(scope)
+            return item[1]
+        entries = {}
+        self._scopes[scope] = (time.monotonic() + self.ttl, entries)
+        self._scopes.move_to_end(scope)
+        while len(self._scopes) > self.maxsize:
+            self._scopes.popitem(last=False)
+            self.evictions += 1
+        return entries
+
+    def _count(self, tool, result, counts):
+        counts[tool] = counts.get(tool, 0) + 1
+        counter = self._counters.get((tool, result))
+        if counter is None:
+            counter = self._counters[(tool, result)] = TOOL_CACHE_REQUESTS.labels(tool, result)
+        counter.value += 1
+
+    async def get_or_call(self, tool, scope, args, call):
+        if not self.enabled:
+            return await call()
+        entries = self._scope_entries(scope)
+        if args in entries:
+            self._count(tool, "hit", self.hits)
+            return entries[args]
+        self._count(tool, "miss", self.misses)
+
+        async def compute():
+            result = await call()
+            item = self._scopes.get(scope)
+            if item is not None and item[1] is entries:
+                entries[args] = result
+            return result
+
+        return await self._flight.run((tool, scope, args, id(entries)), compute)
+
+    def cached(self, fn, name=None):
+        """Cache tool ``fn`` per (current user, current session, arguments)."""
+        tool = name or fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            scope = (current_user_id(), current_session_id())
+            key = (tool, args, tuple(sorted(kwargs.items())))
+            return await self.get_or_call(tool, scope, key, lambda: fn(*args, **kwargs))
+
+        return wrapper
+
+    def invalidate(self, user_id, session_id):
+        """Forget every cached result read from ``(user_id, session_id)``."""
+        if self._scopes.pop((user_id, session_id), None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self._scopes.clear()
+
+    def stats(self):
+        tools = {}
+        for tool in {*self.hits, *self.misses}:
+            hits, misses = self.hits.get(tool, 0), self.misses.get(tool, 0)
+            tools[tool] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses)}
+        return {
+            "tools": tools,
+            "scopes": len(self._scopes),
+            "maxsize": self.maxsize,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "enabled": self.enabled,
+        }
+
+
+tool_cache = ToolResultCache()
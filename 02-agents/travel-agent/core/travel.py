@@ -1,19 +1,91 @@
-import sqlite3
-import os
-import requests
-import certifi
+import asyncio
+import hashlib
 import json
+import math
+import os
+
+from core.cache import SingleFlight
+from core.flight_cache import FlightScheduleCache, date_only
+from core.http_client import RateLimiter, get_http_client
+from core.policy import policy_engine
+from core.storage import DB_PATH, get_db, on_first_use
+from core.tool_cache import tool_cache
+from core.write_behind import WriteBehindBuffer
+
+# Optional write-behind expense logging: acknowledge after a spool append and
+# group-commit in the background. Each worker process needs its own spool, so
+# pooled workers (TASK_WORKER_INDEX, see worker_pool.py) suffix theirs.
+EXPENSE_WRITE_BEHIND = os.environ.get("TRAVEL_EXPENSE_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+EXPENSE_FLUSH_ROWS = int(os.environ.get("TRAVEL_EXPENSE_FLUSH_ROWS", "256"))
+EXPENSE_FLUSH_MS = float(os.environ.get("TRAVEL_EXPENSE_FLUSH_MS", "20"))
+EXPENSE_SPOOL_WORKER = f".worker{os.environ['TASK_WORKER_INDEX']}" if "TASK_WORKER_INDEX" in os.environ else ""
+EXPENSE_SPOOL = os.environ.get("TRAVEL_EXPENSE_SPOOL", f"{DB_PATH}.expenses.spool") + EXPENSE_SPOOL_WORKER
+EXPENSE_SPOOL_FSYNC = os.environ.get("TRAVEL_EXPENSE_SPOOL_FSYNC", "false").lower() in ("1", "true", "yes")
+
+# --- SQL ---
+# Bookings made by the agent carry an idempotency key; a retried or
+# concurrent duplicate call resolves to the row that is already there.
+CLAIM_BOOKING = '''
+    INSERT INTO bookings (user_id, session_id, type, destination, date, nights, price, idempotency_key, details)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (idempotency_key) WHERE idempotency_key IS NOT NULL DO NOTHING
+'''
+
+SELECT_BOOKING_BY_KEY = '''
+    SELECT details FROM bookings WHERE idempotency_key = ?
+'''
 
-os.environ["CURL_CA_BUNDLE"] = certifi.where()
-os.environ["SSL_CERT_FILE"] = certifi.where()
+INSERT_EXPENSE = '''
+    INSERT INTO expenses (user_id, session_id, type, amount, date)
+    VALUES (?, ?, ?, ?, ?)
+'''
 
-DB_PATH = "travel_expenses.db"
+# Rollup keys are NOT NULL, so expenses with a NULL user, session or type
+# roll up under '' (and a NULL amount adds 0, as SUM() skips it).
+UPSERT_EXPENSE_ROLLUP = '''
+    INSERT INTO expense_rollups (user_id, session_id, type, total, count)
+    VALUES (COALESCE(?, ''), COALESCE(?, ''), COALESCE(?, ''), COALESCE(?, 0), 1)
+    ON CONFLICT (user_id, session_id, type) DO UPDATE SET
+        total = total + excluded.total,
+        count = count + 1
+'''
+
+SELECT_SESSION_ROLLUPS = '''
+    SELECT type, total, count FROM expense_rollups
+    WHERE user_id = ? AND session_id = ?
+'''
+
+# Per-shard partial aggregates, merged in summarize_all_expenses_impl().
+SELECT_CATEGORY_TOTALS = '''
+    SELECT type, SUM(total), SUM(count), COUNT(DISTINCT NULLIF(user_id, '')) FROM expense_rollups
+    GROUP BY type
+'''
+
+SELECT_USER_COUNT = '''
+    SELECT COUNT(DISTINCT NULLIF(user_id, '')) FROM expense_rollups
+'''
+
+SELECT_REMINDER_RECIPIENTS = '''
+    SELECT user_id FROM expenses WHERE user_id IS NOT NULL
+    UNION
+    SELECT user_id FROM bookings WHERE user_id IS NOT NULL
+'''
 
 # --- INIT DB ---
+@on_first_use
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
+    """Create or migrate the schema on every shard and replay spooled expenses.
+
+    Runs on the first get_db() call rather than at import, so importing the
+    module stays cheap and processes that never touch storage skip it."""
+    for shard in get_db().shards:
+        _init_shard(shard)
+    # Also run with write-behind off, so rows spooled before a switch-off are kept.
+    expense_buffer.recover()
+
+
+def _init_shard(db):
+    db.executescript_sync('''
         CREATE TABLE IF NOT EXISTS bookings (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id TEXT,
@@ -23,9 +95,7 @@ def init_db():
             date TEXT,
             nights INTEGER,
             price REAL
-        )
-    ''')
-    cursor.execute('''
+        );
         CREATE TABLE IF NOT EXISTS expenses (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id TEXT,
@@ -33,36 +103,135 @@ def init_db():
             type TEXT,
             amount REAL,
             date TEXT
-        )
+        );
+        CREATE INDEX IF NOT EXISTS idx_expenses_user_session
+            ON expenses (user_id, session_id, type);
+        CREATE INDEX IF NOT EXISTS idx_bookings_user_session
+            ON bookings (user_id, session_id);
+        CREATE TABLE IF NOT EXISTS scheduler_runs (
+            job TEXT PRIMARY KEY,
+            last_run REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_expenses_user
+            ON expenses (user_id);
+        CREATE INDEX IF NOT EXISTS idx_bookings_user
+            ON bookings (user_id);
+        CREATE TABLE IF NOT EXISTS expense_rollups (
+            user_id TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            type TEXT NOT NULL,
+            total REAL NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, session_id, type)
+        ) WITHOUT ROWID;
+        -- One-time backfill for databases created before rollups existed.
+        INSERT INTO expense_rollups (user_id, session_id, type, total, count)
+            SELECT COALESCE(user_id, ''), COALESCE(session_id, ''), COALESCE(type, ''),
+                   COALESCE(SUM(amount), 0), COUNT(*) FROM expenses
+            WHERE NOT EXISTS (SELECT 1 FROM expense_rollups)
+            GROUP BY 1, 2, 3;
+    ''')
+    db.transaction(_migrate_bookings)
+    db.transaction(policy_engine.install)
+
+
+BOOKING_COLUMNS = {"idempotency_key": "TEXT", "details": "TEXT"}
+
+
+def _migrate_bookings(conn):
+    """Add the idempotency columns to databases created before they existed."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(bookings)")}
+    for column, decl in BOOKING_COLUMNS.items():
+        if column not in columns:
+            conn.execute(f"ALTER TABLE bookings ADD COLUMN {column} {decl}")
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_bookings_idempotency
+            ON bookings (idempotency_key) WHERE idempotency_key IS NOT NULL
     ''')
-    conn.commit()
-    conn.close()
+
+
+def insert_expenses(conn, rows):
+    """Insert ``(user_id, session_id, type, amount, date)`` rows and keep the
+    per-category rollups in step, inside the caller's transaction."""
+    conn.executemany(INSERT_EXPENSE, rows)
+    conn.executemany(
+        UPSERT_EXPENSE_ROLLUP,
+        [(user_id, session_id, t, amount) for user_id, session_id, t, amount, _ in rows]
+    )
+
+
+expense_buffer = WriteBehindBuffer(
+    f"expenses{EXPENSE_SPOOL_WORKER}", insert_expenses, EXPENSE_SPOOL,
+    flush_rows=EXPENSE_FLUSH_ROWS, flush_interval=EXPENSE_FLUSH_MS / 1000, fsync=EXPENSE_SPOOL_FSYNC,
+)
 
 AVIATIONSTACK_KEY = os.environ.get("AVIATIONSTACK_KEY")
+AVIATIONSTACK_URL = os.environ.get("AVIATIONSTACK_URL", "http://api.aviationstack.com/v1/flights")
+SLACK_API_URL = os.environ.get("SLACK_API_URL", "https://slack.com/api")
+SLACK_RATE_LIMIT = float(os.environ.get("SLACK_RATE_LIMIT", "50"))
+SLACK_CONCURRENCY = int(os.environ.get("SLACK_CONCURRENCY", "20"))
+# Reminders go to the user as a DM (user ids are Slack member ids) instead of a
+# post in SLACK_CHANNEL_ID that mentions them.
+SLACK_REMINDER_DM = os.environ.get("SLACK_REMINDER_DM", "false").lower() in ("1", "true", "yes")
+
+async def fetch_flight_schedule():
+    response = await get_http_client().get(
+        AVIATIONSTACK_URL,
+        params={"access_key": AVIATIONSTACK_KEY, "limit": 100}
+    )
+    response.raise_for_status()
+    return response.json().get("data", [])
+
 
-def date_only(dt_str):
-    return dt_str.split("T")[0] if dt_str else None
+flight_schedule_cache = FlightScheduleCache(fetch_flight_schedule)
 
 import random
 from datetime import datetime, timedelta
 
+booking_flight = SingleFlight()
+
+
+def booking_key(user_id, session_id, kind, destination, date):
+    """Idempotency key of a booking. ``date`` is the travel date for flights
+    and the number of nights for hotels, which take no date."""
+    parts = (user_id, session_id, kind, (destination or "").strip().upper(), date)
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode()).hexdigest()[:32]
+
+
+def _claim_booking(conn, row, key, result):
+    """Insert the booking unless ``key`` is already taken; return the result
+    stored under ``key`` either way."""
+    conn.execute(CLAIM_BOOKING, row + (key, json.dumps(result)))
+    (details,) = conn.execute(SELECT_BOOKING_BY_KEY, (key,)).fetchone()
+    return json.loads(details)
+
+
+async def _book_once(key, user_id, book):
+    """Run ``book()`` at most once per ``key``: concurrent duplicates share the
+    in-flight call and later retries read back the stored booking."""
+    async def run():
+        row = await get_db().for_user(user_id).fetchone(SELECT_BOOKING_BY_KEY, (key,))
+        if row is not None:
+            return dict(json.loads(row[0]), duplicate=True)
+        return await book()
+    return await booking_flight.run(key, run)
+
+
 async def book_flight_impl(origin, destination, date, budget, user_id, session_id):
-    url = "http://api.aviationstack.com/v1/flights"
-    params = {
-        "access_key": AVIATIONSTACK_KEY,
-        "limit": 100
-    }
+    key = booking_key(user_id, session_id, "flight", destination, date_only(date))
 
     def generate_realistic_flight_data():
+        # Seeded by the key so a retried fallback booking is the same flight.
+        rng = random.Random(key)
         airline_names = [
             ("IndiGo", "6E"), ("Air India", "AI"), ("SpiceJet", "SG"),
             ("Vistara", "UK"), ("Akasa Air", "QP")
         ]
-        airline, code = random.choice(airline_names)
-        flight_number = f"{code}{random.randint(100, 999)}"
-        dep_hour = random.randint(6, 20)
+        airline, code = rng.choice(airline_names)
+        flight_number = f"{code}{rng.randint(100, 999)}"
+        dep_hour = rng.randint(6, 20)
         departure_time = datetime.strptime(date, "%Y-%m-%d") + timedelta(hours=dep_hour)
-        arrival_time = departure_time + timedelta(hours=random.randint(1, 3))
+        arrival_time = departure_time + timedelta(hours=rng.randint(1, 3))
 
         return {
             "airline": airline,
@@ -71,166 +240,260 @@ async def book_flight_impl(origin, destination, date, budget, user_id, session_i
             "arrival_time": arrival_time.isoformat()
         }
 
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        flights = response.json().get("data", [])
-    except Exception:
-        # Simulate real tool behavior with realistic dummy booking
-        flight = generate_realistic_flight_data()
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO bookings (user_id, session_id, type, destination, date, price)
-            VALUES (?, ?, 'flight', ?, ?, ?)
-        ''', (user_id, session_id, destination, flight["departure_time"], float(budget)))
-        conn.commit()
-        conn.close()
-        return {
-            "status": "booked",
-            "message": (
-                f"✅ Your flight has been booked (offline fallback).\n\n"
-                f"✈️ **{flight['airline']} {flight['flight_number']}**\n"
-                f"📍 From: {origin} → To: {destination}\n"
-                f"🕒 Departure: {flight['departure_time']}\n"
-                f"🕓 Arrival: {flight['arrival_time']}\n"
-                f"💰 Price: ₹{budget}"
-            ),
-            "flight": {
-                "airline": flight["airline"],
-                "flight_number": flight["flight_number"],
-                "from": origin,
-                "to": destination,
-                "departure_time": flight["departure_time"],
-                "arrival_time": flight["arrival_time"],
-                "price": budget
-            }
-        }
-
-    # Normal flow if API worked
-    for flight in flights:
-        dep = flight.get("departure", {})
-        arr = flight.get("arrival", {})
-        flight_date = date_only(dep.get("scheduled"))
-        if (
-            dep.get("iata") == origin and
-            arr.get("iata") == destination and
-            flight_date == date
-        ):
-            airline = flight["airline"]["name"]
-            flight_number = flight["flight"]["iata"]
-            departure_time = dep["scheduled"]
-            arrival_time = arr["scheduled"]
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO bookings (user_id, session_id, type, destination, date, price)
-                VALUES (?, ?, 'flight', ?, ?, ?)
-            ''', (user_id, session_id, destination, departure_time, float(budget)))
-            conn.commit()
-            conn.close()
-            return {
+    async def book():
+        try:
+            flights = await flight_schedule_cache.lookup(origin, destination, date)
+        except Exception:
+            # Simulate real tool behavior with realistic dummy booking
+            flight = generate_realistic_flight_data()
+            result = {
                 "status": "booked",
                 "message": (
-                    f"✅ Your flight has been booked!\n\n"
-                    f"✈️ **{airline} {flight_number}**\n"
+                    f"✅ Your flight has been booked (offline fallback).\n\n"
+                    f"✈️ **{flight['airline']} {flight['flight_number']}**\n"
                     f"📍 From: {origin} → To: {destination}\n"
-                    f"🕒 Departure: {departure_time}\n"
-                    f"🕓 Arrival: {arrival_time}\n"
+                    f"🕒 Departure: {flight['departure_time']}\n"
+                    f"🕓 Arrival: {flight['arrival_time']}\n"
                     f"💰 Price: ₹{budget}"
                 ),
                 "flight": {
-                    "airline": airline,
-                    "flight_number": flight_number,
+                    "airline": flight["airline"],
+                    "flight_number": flight["flight_number"],
                     "from": origin,
                     "to": destination,
-                    "departure_time": departure_time,
-                    "arrival_time": arrival_time,
+                    "departure_time": flight["departure_time"],
+                    "arrival_time": flight["arrival_time"],
                     "price": budget
                 }
             }
+            row = (user_id, session_id, "flight", destination, flight["departure_time"], None, float(budget))
+            return await get_db().for_user(user_id).run_transaction(_claim_booking, row, key, result)
 
-    return {"status": "no flights found"}
+        # Normal flow if API worked
+        if not flights:
+            return {"status": "no flights found"}
+        flight = flights[0]
+        dep = flight["departure"]
+        arr = flight["arrival"]
+        airline = flight["airline"]["name"]
+        flight_number = flight["flight"]["iata"]
+        departure_time = dep["scheduled"]
+        arrival_time = arr["scheduled"]
+        result = {
+            "status": "booked",
+            "message": (
+                f"✅ Your flight has been booked!\n\n"
+                f"✈️ **{airline} {flight_number}**\n"
+                f"📍 From: {origin} → To: {destination}\n"
+                f"🕒 Departure: {departure_time}\n"
+                f"🕓 Arrival: {arrival_time}\n"
+                f"💰 Price: ₹{budget}"
+            ),
+            "flight": {
+                "airline": airline,
+                "flight_number": flight_number,
+                "from": origin,
+                "to": destination,
+                "departure_time": departure_time,
+                "arrival_time": arrival_time,
+                "price": budget
+            }
+        }
+        row = (user_id, session_id, "flight", destination, departure_time, None, float(budget))
+        return await get_db().for_user(user_id).run_transaction(_claim_booking, row, key, result)
+
+    return await _book_once(key, user_id, book)
 
 
 async def book_hotel_impl(destination, nights, budget, user_id, session_id):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO bookings (user_id, session_id, type, destination, nights, price)
-        VALUES (?, ?, 'hotel', ?, ?, ?)
-    ''', (user_id, session_id, destination, nights, budget))
-    conn.commit()
-    conn.close()
-    return {"status": "booked", "hotel": {
-        "location": destination, "nights": nights, "price_per_night": budget
-    }}
+    key = booking_key(user_id, session_id, "hotel", destination, nights)
+
+    async def book():
+        result = {"status": "booked", "hotel": {
+            "location": destination, "nights": nights, "price_per_night": budget
+        }}
+        row = (user_id, session_id, "hotel", destination, None, nights, budget)
+        return await get_db().for_user(user_id).run_transaction(_claim_booking, row, key, result)
+
+    result = await _book_once(key, user_id, book)
+    tool_cache.invalidate(user_id, session_id)  # nightly-rate policy rules read hotel bookings
+    return result
 
 async def log_expense_impl(expense_type, amount, date, user_id, session_id):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO expenses (user_id, session_id, type, amount, date)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (user_id, session_id, expense_type, amount, date))
-    conn.commit()
-    conn.close()
+    row = (user_id, session_id, expense_type, amount, date)
+    if EXPENSE_WRITE_BEHIND:
+        await expense_buffer.append(row)
+    else:
+        await get_db().for_user(user_id).run_transaction(insert_expenses, [row])
+    tool_cache.invalidate(user_id, session_id)
     return {"status": "logged", "expense": {
         "type": expense_type, "amount": amount, "date": date
     }}
 
-async def check_policy_impl(user_id, session_id):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT type, amount FROM expenses
-        WHERE user_id = ? AND session_id = ?
-    ''', (user_id, session_id))
-    rows = cursor.fetchall()
-    conn.close()
-    violations = [
-        {"type": t, "reason": "Exceeds allowed limit", "amount": a}
-        for t, a in rows if a > 5000
+def _validate_batch_item(item):
+    """Return the normalized row for one batch item, or raise ValueError."""
+    if not isinstance(item, dict):
+        raise ValueError("item must be an object")
+    kind = item.get("kind", "expense")
+    if kind == "expense":
+        expense_type = item.get("type") or item.get("expense_type")
+        if not isinstance(expense_type, str) or not expense_type.strip():
+            raise ValueError("expense type is required")
+        amount = float(item["amount"]) if "amount" in item else None
+        if amount is None or not math.isfinite(amount) or amount < 0:
+            raise ValueError("amount must be a non-negative number")
+        date = item.get("date")
+        datetime.strptime(date or "", "%Y-%m-%d")
+        return kind, (expense_type.strip(), amount, date)
+    if kind in ("flight", "hotel"):
+        destination = item.get("destination")
+        if not isinstance(destination, str) or not destination.strip():
+            raise ValueError("destination is required")
+        price = float(item.get("price", item.get("budget", 0)))
+        if not math.isfinite(price) or price < 0:
+            raise ValueError("price must be a non-negative number")
+        if kind == "flight":
+            date = item.get("date")
+            datetime.strptime((date or "")[:10], "%Y-%m-%d")
+            return kind, (destination.strip(), date, price)
+        nights = int(item.get("nights", 0))
+        if nights <= 0:
+            raise ValueError("nights must be a positive integer")
+        return kind, (destination.strip(), nights, price)
+    raise ValueError(f"unknown kind '{kind}' (expected expense, flight or hotel)")
+
+
+def _batch_booking(user_id, session_id, kind, values):
+    """``(row, key, result)`` of a batch booking, keyed like ta_book_flight/ta_book_hotel."""
+    if kind == "flight":
+        destination, date, price = values
+        key = booking_key(user_id, session_id, kind, destination, date_only(date))
+        row = (user_id, session_id, kind, destination, date, None, price)
+        result = {"status": "booked", "flight": {"to": destination, "departure_time": date, "price": price}}
+    else:
+        destination, nights, price = values
+        key = booking_key(user_id, session_id, kind, destination, nights)
+        row = (user_id, session_id, kind, destination, None, nights, price)
+        result = {"status": "booked", "hotel": {"location": destination, "nights": nights, "price_per_night": price}}
+    return row, key, result
+
+
+def _insert_batch(conn, expenses, bookings):
+    """Write the batch; return, per booking, whether its key was already taken."""
+    if expenses:
+        insert_expenses(conn, expenses)
+    return [
+        conn.execute(CLAIM_BOOKING, row + (key, json.dumps(result))).rowcount == 0
+        for row, key, result in bookings
     ]
-    return {"violations": violations}
+
+
+async def log_batch_impl(items, user_id, session_id):
+    """Validate a list of expenses/bookings in one pass and write every valid
+    row in a single transaction. Invalid rows are reported, not written, and
+    bookings that already exist are reported as duplicates."""
+    expenses, bookings, booking_results = [], [], []
+    results = []
+    for index, item in enumerate(items or []):
+        try:
+            kind, values = _validate_batch_item(item)
+        except (KeyError, TypeError, ValueError) as e:
+            results.append({"index": index, "status": "invalid", "error": str(e)})
+            continue
+        result = {"index": index, "status": "logged", "kind": kind}
+        if kind == "expense":
+            expenses.append((user_id, session_id) + values)
+        else:
+            # Bookings carry the same idempotency key as ta_book_flight/ta_book_hotel,
+            # so a retried batch (or one repeating a booking) does not book twice.
+            bookings.append(_batch_booking(user_id, session_id, kind, values))
+            booking_results.append(result)
+        results.append(result)
+
+    written = len(expenses) + len(bookings)
+    duplicates = 0
+    if written:
+        try:
+            taken = await get_db().for_user(user_id).run_transaction(_insert_batch, expenses, bookings)
+            for result, duplicate in zip(booking_results, taken):
+                if duplicate:
+                    result["status"] = "duplicate"
+                    duplicates += 1
+            written -= duplicates
+            if written:
+                tool_cache.invalidate(user_id, session_id)
+        except Exception as e:
+            for result in results:
+                if result["status"] == "logged":
+                    result.update(status="error", error=str(e))
+            written = 0
+    return {
+        "status": "logged" if written + duplicates == len(results) else "partial" if written + duplicates else "error",
+        "written": written,
+        "duplicates": duplicates,
+        "rejected": len(results) - written - duplicates,
+        "results": results,
+    }
+
+async def check_policy_impl(user_id, session_id):
+    await expense_buffer.barrier(user_id, session_id)
+    return await policy_engine.check(get_db().for_user(user_id), user_id, session_id)
 
 async def summarize_expenses_impl(user_id, session_id):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT type, amount FROM expenses
-        WHERE user_id = ? AND session_id = ?
-    ''', (user_id, session_id))
-    rows = cursor.fetchall()
-    conn.close()
-    total = sum(a for _, a in rows)
+    await expense_buffer.barrier(user_id, session_id)
+    rows = await get_db().for_user(user_id).fetchall(SELECT_SESSION_ROLLUPS, (user_id, session_id))
+    total = sum(t for _, t, _ in rows)
+    categories = {category or None: t for category, t, _ in rows}
+    return {"total": total, "categories": categories, "count": sum(c for _, _, c in rows)}
+
+async def summarize_all_expenses_impl():
+    """Expense totals by category across every user, merged from each shard.
+
+    A user lives on exactly one shard, so per-shard distinct user counts add up.
+    """
+    await expense_buffer.barrier()
+    db = get_db()
+    rows, users = await asyncio.gather(
+        db.fetchall_shards(SELECT_CATEGORY_TOTALS), db.fetchall_shards(SELECT_USER_COUNT)
+    )
     categories = {}
-    for t, a in rows:
-        categories[t] = categories.get(t, 0) + a
-    return {"total": total, "categories": categories, "count": len(rows)}
+    for category, total, count, category_users in rows:
+        merged = categories.setdefault(category or None, {"total": 0.0, "count": 0, "users": 0})
+        merged["total"] += total
+        merged["count"] += count
+        merged["users"] += category_users
+    return {
+        "total": sum(c["total"] for c in categories.values()),
+        "count": sum(c["count"] for c in categories.values()),
+        "users": sum(n for (n,) in users),
+        "categories": categories,
+        "shards": len(db.shards),
+    }
 
-async def send_reminder_impl(user_id, message):
+async def send_reminder_impl(user_id, message, direct=SLACK_REMINDER_DM):
+    """Remind ``user_id`` on Slack: a DM when ``direct``, else a post in
+    ``SLACK_CHANNEL_ID`` that mentions them."""
     slack_token = os.environ.get("SLACK_BOT_TOKEN")
-    slack_channel = os.environ.get("SLACK_CHANNEL_ID")
+    slack_channel = user_id if direct else os.environ.get("SLACK_CHANNEL_ID")
     if not slack_token or not slack_channel:
         return {
             "status": "error",
             "message": "Slack credentials not set in environment variables."
         }
     headers = {
-        "Authorization": f"Bearer {slack_token}",
-        "Content-Type": "application/json"
+        "Authorization": f"Bearer {slack_token}"
     }
+    text = message or f"Reminder for user {user_id}: Please take the required action (e.g., upload receipts)."
     payload = {
         "channel": slack_channel,
-        "text": message or f"Reminder for user {user_id}: Please take the required action (e.g., upload receipts).",
+        "text": text if direct else f"<@{user_id}> {text}",
         "unfurl_links": False
     }
     try:
-        response = requests.post(
-            "https://slack.com/api/chat.postMessage",
+        response = await get_http_client().post(
+            f"{SLACK_API_URL}/chat.postMessage",
             headers=headers,
-            data=json.dumps(payload)
+            json=payload
         )
         result = response.json()
         if result.get("ok"):
@@ -240,5 +503,27 @@ async def send_reminder_impl(user_id, message):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-# Initialize DB on import
-init_db() 
+async def list_reminder_recipients():
+    """Every user with at least one booking or expense on record."""
+    await expense_buffer.barrier()
+    rows = await get_db().fetchall_shards(SELECT_REMINDER_RECIPIENTS)
+    return [user_id for (user_id,) in rows]
+
+async def send_reminders_impl(user_ids, message, rate=SLACK_RATE_LIMIT, concurrency=SLACK_CONCURRENCY):
+    """Fan a reminder out to many users concurrently, bounded by ``concurrency``
+    in-flight requests and ``rate`` Slack messages per second."""
+    limiter = RateLimiter(rate)
+    sem = asyncio.Semaphore(concurrency)
+
+    async def send(user_id):
+        async with sem:
+            await limiter.acquire()
+            return await send_reminder_impl(user_id, message)
+
+    results = await asyncio.gather(*(send(u) for u in user_ids), return_exceptions=True)
+    failed = [
+        {"user": u, "error": str(r) if isinstance(r, Exception) else r.get("message")}
+        for u, r in zip(user_ids, results)
+        if isinstance(r, Exception) or r.get("status") != "reminder_sent"
+    ]
+    return {"sent": len(results) - len(failed), "failed": len(failed), "errors": failed[:20]}
@@ -0,0 +1,280 @@
+import asyncio
+import json
+import os
+from collections import Counter
+
+from loguru import logger
+
+from core.storage import get_db
+
+CREATE_STATE = '''
+    CREATE TABLE IF NOT EXISTS write_behind_state (
+        spool TEXT PRIMARY KEY,
+        last_seq INTEGER NOT NULL
+    )
+'''
+
+SELECT_LAST_SEQ = '''
+    SELECT last_seq FROM write_behind_state WHERE spool = ?
+'''
+
+UPSERT_LAST_SEQ = '''
+    INSERT INTO write_behind_state (spool, last_seq) VALUES (?, ?)
+    ON CONFLICT (spool) DO UPDATE SET last_seq = MAX(last_seq, excluded.last_seq)
+'''
+
+
+def _commit_rows(conn, write_rows, spool, rows, last_seq):
+    write_rows(conn, rows)
+    conn.execute(UPSERT_LAST_SEQ, (spool, last_seq))
+
+
+def _ensure_state(conn):
+    conn.execute(CREATE_STATE)
+
+
+def _fsync_all(spools):
+    for spool in spools:
+        os.fsync(spool.fileno())
+
+
+class WriteBehindBuffer:
+    """Acknowledge row writes immediately and group-commit them in the background.
+
+    ``append()`` assigns the row a sequence number, appends it to a spool file
+    and queues it; a flusher commits the queue when it reaches ``flush_rows``
+    rows or ``flush_interval`` seconds after the first queued row, one
+    transaction per shard. Each transaction also records the highest sequence
+    number it contains in ``write_behind_state``, so ``recover()`` can replay
+    exactly the spooled rows a crash left uncommitted. ``barrier()`` flushes a
+    user/session's pending rows, for reads that must see them.
+
+    The spool is a series of segment files (``<spool_path>.<n>``): each flush
+    starts a new segment, and segments whose rows are all committed (and
+    synced) are deleted, so the spool stays bounded under sustained load.
+
+    Rows are tuples whose first two items are user and session id; the user
+    picks the shard. The spool survives a process crash once written; set
+    ``fsync`` to also survive power loss. Appends then wait for an fsync that
+    covers every row written since the previous one, run off the event loop.
+    Each worker process needs its own spool path.
+    """
+
+    def __init__(self, name, write_rows, spool_path, flush_rows=256, flush_interval=0.02, fsync=False):
+        self.name = name
+        self.spool_path = spool_path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._write_rows = write_rows
+        self._queue = []
+        self._pending = Counter()
+        self._seq = 0
+        self._spool = None
+        self._segments = {}  # path -> [file, last seq written], oldest first
+        self._segment_no = 0
+        self._flushing = None  # first seq of the batch being committed
+        self._sync_waiters = []
+        self._sync_round = []
+        self._syncer = None
+        self._flusher = None
+        self._wakeup = None
+        self._lock = None
+        self.commits = 0
+        self.rows_committed = 0
+        self.max_batch = 0
+        self.fsyncs = 0
+
+    def _segment_files(self):
+        """Spool files on disk, including a pre-segment ``spool_path`` file."""
+        directory, base = os.path.split(os.path.abspath(self.spool_path))
+        found = []
+        for entry in os.listdir(directory or "."):
+            suffix = entry[len(base) + 1:] if entry.startswith(base + ".") else None
+            if entry == base or (suffix and suffix.isdigit()):
+                found.append((int(suffix) if suffix else 0, os.path.join(directory, entry)))
+        return sorted(found)
+
+    # --- recovery (sync, at startup) ---
+    def recover(self):
+        """Commit spooled rows that never reached the database; returns their count."""
+        db = get_db()
+        last_seq = {}
+        for shard in db.shards:
+            shard.transaction(_ensure_state)
+            row = shard.fetchone_sync(SELECT_LAST_SEQ, (self.name,))
+            last_seq[shard] = row[0] if row else 0
+        self._seq = max([self._seq, *last_seq.values()])
+        # Rows this process already queued are in the spool too; the flusher commits them.
+        queued = {seq for seq, _ in self._queue}
+
+        replay = {}
+        on_disk = self._segment_files()
+        for number, path in on_disk:
+            self._segment_no = max(self._segment_no, number)
+            with open(path) as f:
+                for line in f:
+                    try:
+                        seq, *row = json.loads(line)
+                    except ValueError:
+                        break  # torn final line from the crash; nothing after it was acknowledged
+                    self._seq = max(self._seq, seq)
+                    shard = db.for_user(row[0])
+                    if seq > last_seq[shard] and seq not in queued:
+                        replay.setdefault(shard, []).append((seq, tuple(row)))
+        for shard, records in replay.items():
+            records.sort()
+            shard.transaction(_commit_rows, self._write_rows, self.name,
+                              [row for _, row in records], records[-1][0])
+        recovered = sum(len(records) for records in replay.values())
+        if recovered:
+            logger.warning(f"♻️ Recovered {recovered} uncommitted {self.name} rows from {self.spool_path}")
+        for _, path in on_disk:
+            if path not in self._segments:
+                os.unlink(path)
+        return recovered
+
+    # --- write path ---
+    def _start(self):
+        self._rotate()
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._flusher = asyncio.create_task(self._run())
+
+    def _rotate(self):
+        """Start a new spool segment; the previous one only receives no more rows."""
+        self._segment_no += 1
+        path = f"{os.path.abspath(self.spool_path)}.{self._segment_no}"
+        self._spool = open(path, "a")
+        self._segments[path] = [self._spool, self._seq]
+
+    def _release_segments(self):
+        """Delete old segments whose rows are all committed and synced."""
+        unsettled = [self._queue[0][0]] if self._queue else []
+        if self._flushing is not None:
+            unsettled.append(self._flushing)
+        for waiters in (self._sync_round, self._sync_waiters):
+            if waiters:
+                unsettled.append(waiters[0][0])
+        oldest = min(unsettled, default=self._seq + 1)
+        for path, (spool, last) in list(self._segments.items()):
+            if spool is self._spool or last >= oldest:
+                break
+            spool.close()
+            os.unlink(path)
+            del self._segments[path]
+
+    async def append(self, row):
+        if self._flusher is None:
+            # Recovery (an on_first_use hook) replays and deletes the spool,
+            # so it must run before this process first appends to it.
+            get_db()
+            self._start()
+        self._seq += 1
+        seq = self._seq
+        self._spool.write(json.dumps([seq, *row]) + "\n")
+        self._spool.flush()
+        self._segments[self._spool.name][1] = seq
+        self._queue.append((seq, row))
+        self._pending[row[:2]] += 1
+        if len(self._queue) == 1 or len(self._queue) >= self.flush_rows:
+            self._wakeup.set()
+        if self.fsync:
+            synced = asyncio.get_running_loop().create_future()
+            self._sync_waiters.append((seq, self._spool, synced))
+            if self._syncer is None or self._syncer.done():
+                self._syncer = asyncio.create_task(self._sync())
+            await synced
+
+    async def _sync(self):
+        # Group commit: one fsync per segment covers every row appended while
+        # the previous fsync ran.
+        while self._sync_waiters:
+            self._sync_round, self._sync_waiters = self._sync_waiters, []
+            spools = list({id(spool): spool for _, spool, _ in self._sync_round}.values())
+            try:
+                await asyncio.to_thread(_fsync_all, spools)
+                error = None
+                self.fsyncs += 1
+            except OSError as e:
+                error = e
+            for _, _, synced in self._sync_round:
+                if synced.done():
+                    continue
+                if error is None:
+                    synced.set_result(None)
+                else:
+                    synced.set_exception(error)
+            self._sync_round = []
+            self._release_segments()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if len(self._queue) < self.flush_rows:
+                await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Write-behind flush of {self.name} failed, retrying: {e}")
+                await asyncio.sleep(self.flush_interval)
+                self._wakeup.set()
+
+    async def flush(self):
+        """Commit every queued row now."""
+        if self._lock is None:
+            return
+        async with self._lock:
+            batch, self._queue = self._queue, []
+            if not batch:
+                return
+            # Rows appended from here on go to a new segment, so the current
+            # one can be deleted once this batch is committed.
+            self._rotate()
+            self._flushing = batch[0][0]
+            by_shard = {}
+            for seq, row in batch:
+                by_shard.setdefault(get_db().for_user(row[0]), []).append((seq, row))
+            shards = list(by_shard.items())
+            results = await asyncio.gather(*(
+                shard.run_transaction(_commit_rows, self._write_rows, self.name,
+                                      [row for _, row in records], records[-1][0])
+                for shard, records in shards
+            ), return_exceptions=True)
+            failed = []
+            for (shard, records), result in zip(shards, results):
+                if isinstance(result, BaseException):
+                    failed.extend(records)
+                    continue
+                self.commits += 1
+                self.rows_committed += len(records)
+                self.max_batch = max(self.max_batch, len(records))
+                for _, row in records:
+                    scope = row[:2]
+                    self._pending[scope] -= 1
+                    if not self._pending[scope]:
+                        del self._pending[scope]
+            self._flushing = None
+            if failed:
+                # Keep sequence order so per-shard last_seq stays monotonic.
+                self._queue = sorted(failed) + self._queue
+            self._release_segments()
+            if failed:
+                raise next(r for r in results if isinstance(r, BaseException))
+
+    async def barrier(self, user_id=None, session_id=None):
+        """Return once rows buffered for this user/session (or all, by default) are committed."""
+        if self._pending[(user_id, session_id)] if user_id is not None else self._pending:
+            await self.flush()
+
+    def stats(self):
+        return {
+            "queued": len(self._queue),
+            "commits": self.commits,
+            "rows_committed": self.rows_committed,
+            "rows_per_commit": self.rows_committed / self.commits if self.commits else 0.0,
+            "max_batch": self.max_batch,
+            "spool_segments": len(self._segments),
+            "fsyncs": self.fsyncs,
+        }
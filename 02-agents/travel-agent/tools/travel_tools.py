@@ -1,70 +1,126 @@
-import os
 from xpander_sdk import register_tool
+from core.context import current_user_id, current_session_id
+from core.metrics import Timer, instrumented
+from core.tool_cache import tool_cache
 from core.travel import (
     book_flight_impl,
     book_hotel_impl,
     log_expense_impl,
+    log_batch_impl,
     check_policy_impl,
     summarize_expenses_impl,
     send_reminder_impl
 )
 
+TOOL_TIMER = Timer("travel_tool", "tool")
+
 @register_tool
+@instrumented(TOOL_TIMER)
 async def ta_book_flight(origin: str, destination: str, date: str, budget: float) -> dict:
     """
     Book a flight from one airport to a destination on a given date within a budget.
     IMPORTANT: Convert origin and destination to IATA codes (e.g., Sheremetyevo airport -> SVO).
     User/session are inferred from the current conversation context.
     """
-    uid = os.getenv("AGENT_USER_ID") or "default-user"
-    sid = os.getenv("AGENT_SESSION_ID") or "default-session"
+    uid = current_user_id()
+    sid = current_session_id()
     return await book_flight_impl(origin, destination, date, budget, uid, sid)
 
 @register_tool
+@instrumented(TOOL_TIMER)
 async def ta_book_hotel(destination: str, nights: int, budget: float) -> dict:
     """
     Reserve a hotel at the specified location for a given number of nights within a nightly budget.
     User/session are inferred from the current conversation context.
     """
-    uid = os.getenv("AGENT_USER_ID") or "default-user"
-    sid = os.getenv("AGENT_SESSION_ID") or "default-session"
+    uid = current_user_id()
+    sid = current_session_id()
     return await book_hotel_impl(destination, nights, budget, uid, sid)
 
 @register_tool
+@instrumented(TOOL_TIMER)
 async def ta_log_expense(expense_type: str, amount: float, date: str) -> dict:
     """
     Log an expense entry by type, amount, and date for a given user and session.
     User/session are inferred from the current conversation context.
     """
-    uid = os.getenv("AGENT_USER_ID") or "default-user"
-    sid = os.getenv("AGENT_SESSION_ID") or "default-session"
+    uid = current_user_id()
+    sid = current_session_id()
     return await log_expense_impl(expense_type, amount, date, uid, sid)
 
 @register_tool
+@instrumented(TOOL_TIMER)
+async def ta_log_batch(items: list[dict]) -> dict:
+    """
+    Log many expenses and/or bookings in one call. Prefer this over repeated ta_log_expense calls.
+    Each item is an object with a "kind" of "expense" (default), "flight" or "hotel":
+      - expense: {"kind": "expense", "type": "taxi", "amount": 300, "date": "YYYY-MM-DD"}
+      - flight:  {"kind": "flight", "destination": "JFK", "date": "YYYY-MM-DD", "price": 50000}
+      - hotel:   {"kind": "hotel", "destination": "New York", "nights": 3, "price": 8000}
+    Returns a per-item status; invalid items are reported and skipped, bookings already made are reported as duplicate.
+    User/session are inferred from the current conversation context.
+    """
+    uid = current_user_id()
+    sid = current_session_id()
+    return await log_batch_impl(items, uid, sid)
+
+@register_tool
+@instrumented(TOOL_TIMER)
+@tool_cache.cached
 async def ta_check_policy_violations() -> dict:
     """
-    Check all logged expenses for policy violations (e.g., exceeding set limits).
+    Check logged expenses and hotel bookings against the expense policy
+    (category caps, trip totals, nightly hotel rates, allowed dates).
     User/session are inferred from the current conversation context.
     """
-    uid = os.getenv("AGENT_USER_ID") or "default-user"
-    sid = os.getenv("AGENT_SESSION_ID") or "default-session"
+    uid = current_user_id()
+    sid = current_session_id()
     return await check_policy_impl(uid, sid)
 
 @register_tool
+@instrumented(TOOL_TIMER)
+@tool_cache.cached
 async def ta_summarize_expenses() -> dict:
     """
     Generate a summary of total expenses, breakdown by category, and number of entries.
     User/session are inferred from the current conversation context.
     """
-    uid = os.getenv("AGENT_USER_ID") or "default-user"
-    sid = os.getenv("AGENT_SESSION_ID") or "default-session"
+    uid = current_user_id()
+    sid = current_session_id()
     return await summarize_expenses_impl(uid, sid)
 
 @register_tool
+@instrumented(TOOL_TIMER)
 async def ta_send_reminder(message: str | None = None) -> dict:
     """
     Send a reminder notification to the user to take action (e.g., upload receipts).
     User is inferred from the current conversation context.
     """
-    uid = os.getenv("AGENT_USER_ID") or "default-user"
+    uid = current_user_id()
     return await send_reminder_impl(uid, message)
+
+@register_tool
+@instrumented(TOOL_TIMER)
+async def ta_spend_report(table: str = "expenses", group_by: list[str] | None = None, top: int = 10) -> dict:
+    """
+    Org-wide spend report across all users: row count, total, and the top groups by total spend.
+    table is "expenses" (default) or "bookings". Each group_by entry is one or more of
+    user, category, month (yyyymm) and, for bookings, destination, joined with "+"
+    (e.g. ["category", "user+month"]); default ["user", "category", "month"].
+    Returns the `top` biggest groups of each group-by.
+    """
+    from core.reporting import spend_report_impl  # deferred: keeps NumPy out of startup
+
+    group_bys = tuple(tuple(g.split("+")) for g in group_by or ("user", "category", "month"))
+    return await spend_report_impl(table, group_bys, top)
+
+@register_tool
+@instrumented(TOOL_TIMER)
+async def ta_export_table(table: str = "expenses", fmt: str = "csv") -> dict:
+    """
+    Export every row of the expenses or bookings table, across all users, to a new file.
+    fmt is "csv" (default) or "parquet". Returns the file path and number of rows written.
+    """
+    from core.reporting import export_table_impl  # deferred: keeps NumPy out of startup
+
+    return await export_table_impl(table, fmt)
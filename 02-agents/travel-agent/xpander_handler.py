@@ -1,21 +1,31 @@
 import asyncio
 import os
-import time
 from dotenv import load_dotenv
 from uuid import uuid4
 from loguru import logger
 from pydantic import BaseModel
 
-from agno.agent import Agent
-from xpander_sdk import Backend, Task, on_task, OutputFormat, on_boot
-
+from xpander_sdk import Task, on_task, OutputFormat, on_boot
+
+from admission import SCHEDULED, admission
+from agent_cache import agent_cache, imports_warmed, warm_imports
+from core.context import task_context
+from core.metrics import REGISTRY, Timer, instrumented, start_metrics_server
+from core.scheduler import Scheduler
+from core.storage import get_db
+from core.travel import list_reminder_recipients, send_reminders_impl
+from task_metrics import collect_metrics, run_agent
+from worker_pool import workers
 from tools.travel_tools import (
     ta_book_flight,
     ta_book_hotel,
     ta_log_expense,
+    ta_log_batch,
     ta_check_policy_violations,
     ta_summarize_expenses,
-    ta_send_reminder
+    ta_send_reminder,
+    ta_spend_report,
+    ta_export_table
 )
 
 load_dotenv()
@@ -24,69 +34,113 @@ load_dotenv()
 DEFAULT_USER_ID = os.getenv("DEFAULT_USER_ID") or f"user-{uuid4().hex[:8]}"
 DEFAULT_SESSION_ID = os.getenv("DEFAULT_SESSION_ID") or f"session-{uuid4().hex[:12]}"
 
+TRAVEL_TOOLS = (
+    ta_book_flight,
+    ta_book_hotel,
+    ta_log_expense,
+    ta_log_batch,
+    ta_check_policy_violations,
+    ta_summarize_expenses,
+    ta_send_reminder,
+    ta_spend_report,
+    ta_export_table
+)
+
 # Global agent instance
 travel_agent = None
 reminder_task = None
+# Storage setup started at boot; the first task waits for it
+storage_init = None
+
+METRICS_HOST = os.getenv("TRAVEL_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("TRAVEL_METRICS_PORT", "9464"))
+PROFILE_HZ = float(os.getenv("TRAVEL_PROFILE_HZ", "0"))
+
+REMINDER_CRON = os.getenv("REMINDER_CRON", "0 17 * * *")
+REMINDER_TIMEZONE = os.getenv("REMINDER_TIMEZONE", "Asia/Kolkata")
+REMINDER_MESSAGE = "Daily reminder: Please submit your pending travel expenses."
+
+scheduler = Scheduler()
+
+TASK_TIMER = Timer("travel_task", "handler")
+
+REGISTRY.gauge("travel_admission_in_flight", "Tasks admitted and running").labels().set_function(
+    lambda: admission.in_flight)
+REGISTRY.gauge("travel_admission_queued", "Tasks waiting for an admission slot").labels().set_function(
+    lambda: admission.queued)
+REGISTRY.gauge("travel_admission_pressure", "Admission queue fill ratio (1 = shedding)").labels().set_function(
+    admission.pressure)
+REGISTRY.counter("travel_admission_shed_total", "Tasks shed on a full queue or wait timeout").labels().set_function(
+    lambda: admission.rejected + admission.timed_out)
 
 @on_boot
+@workers.boot
 async def initialize_travel_agent():
     """Initialize travel agent on boot"""
-    global travel_agent, reminder_task
+    global travel_agent, reminder_task, storage_init
     logger.info("🚀 Initializing Travel Agent on boot...")
     
     try:
         # The agent will be initialized per task with proper backend configuration
         logger.info("✅ Travel Agent initialized successfully on boot!")
         
-        # Start the daily reminder scheduler
-        reminder_task = asyncio.create_task(daily_reminder_scheduler())
-        logger.info("📅 Daily reminder scheduler started")
+        # Serve latency/in-flight/error metrics for this worker
+        start_metrics_server(workers.port(METRICS_PORT), METRICS_HOST, PROFILE_HZ)
+
+        # Start the daily reminder scheduler (in one worker only when pooled)
+        if workers.primary:
+            scheduler.add_job("daily-expense-reminder", REMINDER_CRON, send_daily_reminders, tz=REMINDER_TIMEZONE)
+            reminder_task = asyncio.create_task(scheduler.run())
+            logger.info(f"📅 Daily reminder scheduled ({REMINDER_CRON} {REMINDER_TIMEZONE})")
+
+        # Load Agno and set up the schema in the background while waiting for
+        # the first task, instead of at import
+        warm_imports("agno.agent", "agno.team", "httpcore")
+        storage_init = asyncio.get_running_loop().run_in_executor(None, get_db)
+        storage_init.add_done_callback(_log_storage_init)
         
     except Exception as e:
         logger.error(f"❌ Failed to initialize Travel Agent: {e}")
 
-async def daily_reminder_scheduler():
-    """Send reminders daily at 17:00 IST"""
-    logger.info("📅 Daily reminder scheduler started")
-    while True:
-        try:
-            now = time.localtime()
-            if now.tm_hour == 17 and now.tm_min == 0:
-                # Send reminders to predefined users
-                for user_id in ["user123", "user456"]:
-                    os.environ["AGENT_USER_ID"] = user_id
-                    await ta_send_reminder(message="Daily reminder: Please submit your pending travel expenses.")
-                    logger.info(f"📨 Sent reminder to user: {user_id}")
-                await asyncio.sleep(86400)  # Wait a day
-            else:
-                await asyncio.sleep(60)  # Check every minute
-        except Exception as e:
-            logger.error(f"❌ Error in reminder scheduler: {e}")
-            await asyncio.sleep(60)
+def _log_storage_init(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"❌ Storage initialization failed (retried on first use): {future.exception()!r}")
+
+async def storage_ready():
+    """Wait for the boot-time storage setup, so tasks never block the loop on it.
+
+    A failed setup was logged and is retried by the next get_db() call.
+    """
+    if storage_init is not None and not storage_init.done():
+        await asyncio.wait([storage_init])
+
+async def send_daily_reminders():
+    """Send the daily reminder to every user with travel data on record"""
+    await storage_ready()
+    async with admission.slot(lane=SCHEDULED):
+        user_ids = await list_reminder_recipients()
+        result = await send_reminders_impl(user_ids, REMINDER_MESSAGE)
+    logger.info(f"📨 Sent {result['sent']}/{len(user_ids)} reminders ({result['failed']} failed)")
 
 @on_task
+@workers.dispatch
+@admission.guard
+@instrumented(TASK_TIMER, "travel-agent")
 async def my_agent_handler(task: Task):
     """Handles incoming Xpander tasks using Agno Agent"""
     logger.info(f"🎯 Processing travel agent task: {task.to_message()}")
     
-    backend = Backend(configuration=task.configuration)
-    agno_args = await backend.aget_args(task=task)
+    await imports_warmed()
+    await storage_ready()
+    agno_args = await agent_cache.aget_args(task)
 
     # Add travel tools to the agent
-    if "tools" not in agno_args:
-        agno_args["tools"] = []
-        
-    agno_args["tools"].extend([
-        ta_book_flight,
-        ta_book_hotel,
-        ta_log_expense,
-        ta_check_policy_violations,
-        ta_summarize_expenses,
-        ta_send_reminder
-    ])
+    agno_args["tools"] = [*(agno_args.get("tools") or []), *TRAVEL_TOOLS]
     
     logger.info("🔧 Processing task with travel tools")
 
+    from agno.agent import Agent  # deferred: ~0.15s after this module's imports, warmed on boot
+
     agno_agent = Agent(**agno_args)
 
     # Extract user and session IDs
@@ -104,18 +158,19 @@ async def my_agent_handler(task: Task):
         or (getattr(task, "context", {}) or {}).get("session_id")
     ) or DEFAULT_SESSION_ID
 
-    # Set environment variables for tools
-    os.environ["AGENT_USER_ID"] = str(user_id)
-    os.environ["AGENT_SESSION_ID"] = str(session_id)
-
     logger.info(f"👤 User ID: {user_id}, Session ID: {session_id}")
 
-    result = await agno_agent.arun(message=task.to_message())
+    # Bind IDs to this task only; tools read them via core.context
+    with task_context(user_id, session_id), collect_metrics() as metrics:
+        result = await run_agent(agno_agent, task.to_message(), step="travel-agent")
 
     # Handle structured output
     if task.output_format == OutputFormat.Json and isinstance(result.content, BaseModel):
         result.content = result.content.model_dump_json()
 
     task.result = result.content
+
+    # report execution metrics
+    metrics.apply(task)
     logger.info("✅ Task processed successfully")
     return task
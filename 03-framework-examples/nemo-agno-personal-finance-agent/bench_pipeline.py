@@ -0,0 +1,58 @@
+"""Time-to-first-token and end-to-end latency of the batch vs. streaming pipeline.
+
+Loads the workflow in-process once per mode (``streaming: false`` / ``true``
+patched into a copy of the config) and runs the same input sequentially,
+reading the timings the workflow records for each run.
+
+    python bench_pipeline.py --runs 3 --input "I'm 30, earn $80k, want to retire by 55"
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+
+import yaml
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--config", default="nemo_config.yml")
+parser.add_argument("--runs", type=int, default=3)
+parser.add_argument("--input", default="I'm 30, earn $80k, want to retire by 55")
+args = parser.parse_args()
+
+
+def config_for(streaming):
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    config["workflow"]["streaming"] = streaming
+    tmp = tempfile.NamedTemporaryFile("w", suffix=".yml", delete=False)
+    yaml.safe_dump(config, tmp)
+    tmp.close()
+    return tmp.name
+
+
+async def run_mode(streaming):
+    from nat.runtime.loader import load_workflow
+    import xpander_nemo_agent
+
+    xpander_nemo_agent.pipeline_timings.clear()
+    async with load_workflow(config_for(streaming)) as workflow:
+        for _ in range(args.runs):
+            async with workflow.run(args.input) as runner:
+                await runner.result(to_type=str)
+    return list(xpander_nemo_agent.pipeline_timings)
+
+
+def report(name, timings):
+    ttft = [t["time_to_first_token"] for t in timings if t["time_to_first_token"] is not None]
+    total = [t["end_to_end_seconds"] for t in timings]
+    print(f"{name:9}  first token p50 {statistics.median(ttft):6.2f}s   "
+          f"end-to-end p50 {statistics.median(total):6.2f}s   ({len(timings)} runs)")
+
+
+async def main():
+    report("batch", await run_mode(streaming=False))
+    report("streaming", await run_mode(streaming=True))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""Sequential vs. concurrent search fan-out against a local stub search tool.
+
+The stub answers in the same format as NAT's serp_api_tool after a fixed
+latency, with overlapping URLs across queries, so the run also shows the
+URL deduplication, top-N trimming and research compaction.
+
+    python bench_search_fanout.py --queries 3 --latency 1.0
+"""
+import argparse
+import asyncio
+import time
+
+from compaction import CHARS_PER_TOKEN, compact_results
+from search_fanout import fan_out_search
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--queries", type=int, default=3)
+parser.add_argument("--results", type=int, default=5, help="results per query")
+parser.add_argument("--latency", type=float, default=1.0, help="seconds per stub search")
+parser.add_argument("--concurrency", type=int, default=3)
+args = parser.parse_args()
+
+
+def stub_search(latency):
+    async def search(query):
+        await asyncio.sleep(latency)
+        q = int(query.rsplit(" ", 1)[-1])
+        docs = []
+        for rank in range(args.results):
+            # Every query shares its first two pages with the next query
+            page = q * (args.results - 2) + rank
+            scheme = "https://www." if rank % 2 else "http://"
+            docs.append(f'<Document href="{scheme}example.com/finance/{page}/"/>\n'
+                        f'# Result {page}\n\nSnippet for page {page} from {query}\n</Document>')
+        return "\n\n---\n\n".join(docs)
+    return search
+
+
+async def run(concurrency):
+    queries = [f"personal finance query {i}" for i in range(args.queries)]
+    start = time.perf_counter()
+    results, stats = await fan_out_search(stub_search(args.latency), queries, concurrency=concurrency)
+    return time.perf_counter() - start, results, stats
+
+
+async def main():
+    sequential, _, _ = await run(1)
+    parallel, results, stats = await run(args.concurrency)
+    print(f"sequential: {sequential:.2f}s   concurrent ({args.concurrency}): {parallel:.2f}s")
+    print(f"{stats['raw_results']} results -> {stats['unique_results']} unique URLs -> kept {stats['kept']}")
+    for r in results[:3]:
+        print(f"  {r['score']:.2f}  {r['link']}  (from {len(r['queries'])} queries)")
+    _, compaction = compact_results(results)
+    print(f"research tokens: {stats['raw_chars'] // CHARS_PER_TOKEN} raw search output, "
+          f"{compaction['uncompacted_tokens']} uncompacted prompt -> {compaction['tokens']} compacted "
+          f"({compaction['duplicates']} near-duplicates dropped)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""Per-task overhead of the NeMo worker pool vs. spawning `nat run` per task.
+
+Runs the same input through both execution models and reports wall time per
+task. Use a cheap prompt so the LLM time does not dominate the comparison.
+
+    python bench_worker_pool.py --tasks 10 --workers 2 --input "Hello"
+"""
+import argparse
+import asyncio
+import time
+
+from nemo_worker_pool import NemoWorkerPool
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--config", default="nemo_config.yml")
+parser.add_argument("--tasks", type=int, default=10)
+parser.add_argument("--workers", type=int, default=2)
+parser.add_argument("--input", default="Hello, what can you do?")
+args = parser.parse_args()
+
+
+async def run_spawn():
+    async def one():
+        proc = await asyncio.create_subprocess_exec(
+            "nat", "run", "--config_file", args.config, "--input", args.input,
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+        )
+        await proc.wait()
+
+    sem = asyncio.Semaphore(args.workers)
+
+    async def bounded():
+        async with sem:
+            await one()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded() for _ in range(args.tasks)))
+    return time.perf_counter() - start
+
+
+async def run_pool():
+    pool = NemoWorkerPool(args.config, workers=args.workers)
+    start = time.perf_counter()
+    await pool.start()
+    boot = time.perf_counter() - start
+    start = time.perf_counter()
+    await asyncio.gather(*(pool.submit(args.input) for _ in range(args.tasks)))
+    elapsed = time.perf_counter() - start
+    await pool.close()
+    return boot, elapsed
+
+
+async def main():
+    spawn = await run_spawn()
+    boot, pool = await run_pool()
+    print(f"spawn: {spawn / args.tasks * 1000:8.1f}ms per task ({args.tasks} tasks, {args.workers} parallel)")
+    print(f"pool:  {pool / args.tasks * 1000:8.1f}ms per task (one-time worker boot {boot:.1f}s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""Shrink search results before they go into the planner prompt.
+
+Near-duplicate snippets (syndicated articles, the same page under two
+URLs) are dropped, the best-ranked results are kept and the whole block is
+cut to a token budget.
+"""
+import re
+
+CHARS_PER_TOKEN = 4
+RESEARCH_TOKEN_BUDGET = 1500
+DUPLICATE_THRESHOLD = 0.8
+
+WORD_RE = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return -(-len(text or "") // CHARS_PER_TOKEN)
+
+
+def _shingles(text, size=3):
+    words = WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _similarity(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _format(index, result, snippet):
+    return f"{index}. {result['title']}\n   {result['link']}\n   {snippet}"
+
+
+def compact_results(results, max_results=10, token_budget=RESEARCH_TOKEN_BUDGET,
+                    threshold=DUPLICATE_THRESHOLD):
+    """Return ``(text, stats)`` for ``results`` ranked best first.
+
+    A result whose title+snippet overlaps an already kept one by at least
+    ``threshold`` (Jaccard similarity of word 3-grams) is dropped. Results
+    are added in rank order until ``token_budget`` is reached; the last one
+    that does not fit has its snippet cut at a word boundary and the rest
+    are left out. ``stats["uncompacted_tokens"]`` is the size of the top
+    ``max_results`` results as they were prompted before compaction.
+    """
+    kept, seen = [], []
+    duplicates = 0
+    for result in results:
+        shingles = _shingles(f"{result['title']} {result['snippet']}")
+        if any(_similarity(shingles, other) >= threshold for other in seen):
+            duplicates += 1
+            continue
+        kept.append(result)
+        seen.append(shingles)
+        if len(kept) == max_results:
+            break
+
+    blocks, used = [], 0
+    for result in kept:
+        block = _format(len(blocks) + 1, result, result["snippet"])
+        cost = estimate_tokens(block) + 1
+        if used + cost > token_budget:
+            room = (token_budget - used - estimate_tokens(_format(len(blocks) + 1, result, "")) - 2) * CHARS_PER_TOKEN
+            if room > 80:
+                blocks.append(_format(len(blocks) + 1, result, result["snippet"][:room].rsplit(" ", 1)[0] + "…"))
+            break
+        blocks.append(block)
+        used += cost
+
+    text = "\n\n".join(blocks)
+    uncompacted = "\n\n".join(_format(i, r, r["snippet"]) for i, r in enumerate(results[:max_results], 1))
+    return text, {
+        "duplicates": duplicates,
+        "kept": len(blocks),
+        "over_budget": len(kept) - len(blocks),
+        "tokens": estimate_tokens(text),
+        "uncompacted_tokens": estimate_tokens(uncompacted),
+    }
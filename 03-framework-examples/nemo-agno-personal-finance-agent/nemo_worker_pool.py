@@ -0,0 +1,224 @@
+"""Long-lived NeMo workflow workers fed over local pipes.
+
+Each worker process loads the workflow from ``nemo_config.yml`` once (config
+parsing, LLM/tool builders, plugin discovery) and then runs inputs sent by
+the parent until it exits. The parent keeps a bounded queue in front of the
+workers for backpressure and replaces any worker that crashes or times out.
+
+Workers run this file as their main script (``python nemo_worker_pool.py
+<config> <fd>``), never the handler module, so starting them does not
+re-run the handler's ``@on_task`` registration or build another pool.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from multiprocessing.connection import Connection, Pipe
+
+from loguru import logger
+
+NEMO_WORKERS = int(os.getenv("NEMO_WORKERS", "2"))
+NEMO_QUEUE_SIZE = int(os.getenv("NEMO_QUEUE_SIZE", "32"))
+NEMO_TASK_TIMEOUT = float(os.getenv("NEMO_TASK_TIMEOUT", "900"))
+NEMO_STARTUP_TIMEOUT = float(os.getenv("NEMO_STARTUP_TIMEOUT", "300"))
+
+
+class WorkerCrashed(RuntimeError):
+    pass
+
+
+def _worker_main(config_file, conn):
+    from dotenv import load_dotenv
+    load_dotenv()
+    asyncio.run(_serve(config_file, conn))
+
+
+async def _serve(config_file, conn):
+    from nat.runtime.loader import load_workflow
+
+    loop = asyncio.get_running_loop()
+    async with load_workflow(config_file) as workflow:
+        conn.send({"ready": True, "pid": os.getpid()})
+        while True:
+            try:
+                request = await loop.run_in_executor(None, conn.recv)
+            except EOFError:
+                return
+            if request is None:
+                return
+            started = time.perf_counter()
+            try:
+                async with workflow.run(request["input"]) as runner:
+                    result = await runner.result(to_type=str)
+                reply = {"id": request["id"], "result": result}
+            except Exception as e:
+                reply = {"id": request["id"], "error": repr(e)}
+            reply["seconds"] = time.perf_counter() - started
+            conn.send(reply)
+
+
+class _Worker:
+    def __init__(self, index, config_file):
+        self.index = index
+        self.config_file = os.path.abspath(config_file)
+        self.process = None
+        self.conn = None
+        self.restarts = -1
+
+    def spawn(self):
+        parent_conn, child_conn = Pipe()
+        try:
+            self.process = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), self.config_file, str(child_conn.fileno())],
+                pass_fds=(child_conn.fileno(),),
+            )
+        finally:
+            child_conn.close()
+        self.conn = parent_conn
+        self.restarts += 1
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def join(self, timeout):
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            pass
+
+    def kill(self):
+        if self.is_alive():
+            self.process.kill()
+            self.join(5)
+        if self.conn is not None:
+            self.conn.close()
+
+    def recv(self, timeout):
+        """Blocking receive that notices a dead worker instead of hanging."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.conn.poll(0.5):
+                try:
+                    return self.conn.recv()
+                except EOFError:
+                    raise WorkerCrashed(f"worker {self.index} closed its pipe")
+            if not self.is_alive():
+                raise WorkerCrashed(f"worker {self.index} exited with code {self.process.returncode}")
+            if time.monotonic() > deadline:
+                raise asyncio.TimeoutError()
+
+
+class NemoWorkerPool:
+    def __init__(self, config_file, workers=NEMO_WORKERS, queue_size=NEMO_QUEUE_SIZE,
+                 task_timeout=NEMO_TASK_TIMEOUT, startup_timeout=NEMO_STARTUP_TIMEOUT):
+        self.config_file = config_file
+        self.task_timeout = task_timeout
+        self.startup_timeout = startup_timeout
+        self._workers = [_Worker(i, config_file) for i in range(workers)]
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        # One blocking pipe reader per worker, so no worker starves another.
+        self._io = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nemo-pipe")
+        self._ids = count()
+        self._dispatchers = []
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    async def _start_worker(self, worker):
+        worker.spawn()
+        loop = asyncio.get_running_loop()
+        hello = await loop.run_in_executor(self._io, worker.recv, self.startup_timeout)
+        logger.info(f"🧠 NeMo worker {worker.index} ready (pid {hello['pid']}, restarts={worker.restarts})")
+
+    async def start(self):
+        started = time.perf_counter()
+        await asyncio.gather(*(self._start_worker(w) for w in self._workers))
+        self._dispatchers = [asyncio.create_task(self._dispatch(w)) for w in self._workers]
+        logger.info(f"✅ {len(self._workers)} NeMo workers loaded in {time.perf_counter() - started:.1f}s")
+
+    async def _dispatch(self, worker):
+        loop = asyncio.get_running_loop()
+        while True:
+            payload, future = await self._queue.get()
+            try:
+                if future.cancelled():
+                    continue
+                request_id = next(self._ids)
+                worker.conn.send({"id": request_id, "input": payload})
+                reply = await loop.run_in_executor(self._io, worker.recv, self.task_timeout)
+                if "error" in reply:
+                    self.failed += 1
+                    if not future.done():
+                        future.set_exception(RuntimeError(reply["error"]))
+                else:
+                    self.completed += 1
+                    if not future.done():
+                        future.set_result(reply["result"])
+            except (WorkerCrashed, asyncio.TimeoutError, OSError) as e:
+                self.failed += 1
+                reason = f"worker {worker.index} timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+                logger.error(f"💥 NeMo {reason}; restarting it")
+                if not future.done():
+                    future.set_exception(WorkerCrashed(reason))
+                await loop.run_in_executor(None, worker.kill)
+                await self._restart(worker)
+            finally:
+                self._queue.task_done()
+
+    async def _restart(self, worker):
+        backoff = 1.0
+        while True:
+            try:
+                await self._start_worker(worker)
+                return
+            except Exception as e:
+                logger.error(f"❌ NeMo worker {worker.index} failed to start: {e!r}")
+                worker.kill()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+    async def submit(self, payload):
+        """Queue ``payload`` for the next free worker and return its result.
+
+        Waits for queue space when all workers are busy and the queue is full.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((payload, future))
+        return await future
+
+    async def close(self, timeout=10):
+        for task in self._dispatchers:
+            task.cancel()
+        loop = asyncio.get_running_loop()
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except Exception:
+                pass
+        await asyncio.gather(*(
+            loop.run_in_executor(None, w.join, timeout)
+            for w in self._workers if w.process is not None
+        ))
+        for worker in self._workers:
+            worker.kill()
+        self._io.shutdown(wait=False)
+
+    def metrics(self):
+        return {
+            "workers": len(self._workers),
+            "alive": sum(1 for w in self._workers if w.is_alive()),
+            "restarts": sum(max(w.restarts, 0) for w in self._workers),
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+if __name__ == "__main__":
+    _worker_main(sys.argv[1], Connection(int(sys.argv[2])))
@@ -0,0 +1,131 @@
+"""Concurrent web-search fan-out for the researcher.
+
+Runs every generated query against every search tool at once (bounded by a
+semaphore), merges the results, drops duplicate URLs and keeps the
+best-ranked ones, so search latency is the slowest query rather than the
+sum of all of them.
+"""
+import asyncio
+import re
+import time
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+SEARCH_CONCURRENCY = 3
+MAX_RESULTS = 10
+
+# Format produced by NAT's serp_api_tool: documents joined by "---"
+DOCUMENT_RE = re.compile(r'<Document href="(?P<link>[^"]*)"\s*/>\s*(?P<body>.*?)</Document>', re.S)
+TERM_PREFIX_RE = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s*')
+
+
+def parse_search_terms(text: str, limit: int = 3) -> list[str]:
+    """Pull search terms out of a model reply with one term per line."""
+    terms = []
+    for line in (text or "").splitlines():
+        term = TERM_PREFIX_RE.sub("", line).strip().strip('"\'`').strip()
+        if term and term.lower() not in (t.lower() for t in terms):
+            terms.append(term)
+    return terms[:limit]
+
+
+def normalize_url(url: str) -> str:
+    """Key used to spot the same page behind cosmetic URL differences."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{parts.query}" if parts.query else "")
+
+
+def parse_results(raw: str) -> list[dict]:
+    """Split a search tool reply into ``{"link", "title", "snippet"}`` dicts, best first.
+
+    A non-empty reply in any other format is kept whole as one result
+    without a link, so research is never silently lost.
+    """
+    results = []
+    for match in DOCUMENT_RE.finditer(raw or ""):
+        lines = match.group("body").strip().splitlines()
+        title = lines[0].lstrip("# ").strip() if lines else ""
+        snippet = " ".join(line.strip() for line in lines[1:] if line.strip())
+        results.append({"link": match.group("link"), "title": title, "snippet": snippet})
+    if not results and (raw or "").strip():
+        logger.warning(f"⚠️ Search reply has no <Document> entries, using it as raw text: {raw[:80]!r}")
+        results.append({"link": "", "title": "Search result", "snippet": " ".join(raw.split())})
+    return results
+
+
+async def fan_out_search(searches, queries, concurrency: int = SEARCH_CONCURRENCY, limit: int = MAX_RESULTS):
+    """Run ``await search(query)`` for every search and query concurrently and merge the results.
+
+    ``searches`` maps tool names to search callables (a single callable is
+    taken as one tool named ``search``). Results are ranked by reciprocal
+    rank summed over the calls that returned them, so pages found by several
+    queries or tools rise to the top. Failed calls are logged and skipped.
+    Returns ``(results, stats)``.
+    """
+    if callable(searches):
+        searches = {"search": searches}
+    pairs = [(name, query) for query in queries for name in searches]
+    sem = asyncio.Semaphore(max(1, concurrency))
+    started = time.perf_counter()
+    raw_chars = 0
+    calls = []
+
+    async def one(name, query):
+        nonlocal raw_chars
+        async with sem:
+            call_started = time.perf_counter()
+            try:
+                raw = await searches[name](query)
+                raw_chars += len(raw or "")
+                calls.append({"tool": name, "query": query, "seconds": time.perf_counter() - call_started,
+                              "error": False})
+                return parse_results(raw)
+            except Exception as e:
+                calls.append({"tool": name, "query": query, "seconds": time.perf_counter() - call_started,
+                              "error": True})
+                logger.warning(f"⚠️ Search with {name} failed for '{query}': {e!r}")
+                return None
+
+    replies = await asyncio.gather(*(one(name, query) for name, query in pairs))
+
+    merged = {}
+    raw_count = 0
+    for (name, query), results in zip(pairs, replies):
+        for rank, result in enumerate(results or []):
+            raw_count += 1
+            # Raw-text replies have no URL to deduplicate on
+            key = normalize_url(result["link"]) if result["link"] else f"{name}:{query}:{rank}"
+            entry = merged.get(key)
+            if entry is None:
+                entry = merged[key] = {**result, "score": 0.0, "queries": []}
+            elif len(result["snippet"]) > len(entry["snippet"]):
+                entry["snippet"] = result["snippet"]
+            entry["score"] += 1.0 / (rank + 1)
+            entry["queries"].append(query)
+
+    ranked = sorted(merged.values(), key=lambda r: r["score"], reverse=True)[:limit]
+    stats = {
+        "queries": len(queries),
+        "searches": len(pairs),
+        "failed": sum(1 for r in replies if r is None),
+        "raw_results": raw_count,
+        "raw_chars": raw_chars,
+        "unique_results": len(merged),
+        "kept": len(ranked),
+        "calls": calls,
+        "seconds": time.perf_counter() - started,
+    }
+    return ranked, stats
+
+
+def tool_search(fn):
+    """Adapt a NAT function to the ``await search(query) -> str`` shape used above.
+
+    The call is awaited on the workflow's own event loop, where the
+    function's clients and context live.
+    """
+    async def search(query):
+        return await fn.ainvoke(query, to_type=str)
+    return search
@@ -3,12 +3,39 @@ load_dotenv()
 
 import asyncio
 import json
-from xpander_sdk import Task, on_task
+import os
+from loguru import logger
+from xpander_sdk import Task, on_task, on_boot
 
-@on_task
-async def my_agent_handler(task: Task):
-    cmd = ["nat", "run", "--config_file", "nemo_config.yml", "--input", json.dumps({"xpander_task_id": task.id})]
+from nemo_worker_pool import NemoWorkerPool
+
+NEMO_CONFIG_FILE = "nemo_config.yml"
+
+# "pool" keeps NeMo workflows loaded in long-lived workers; "spawn" runs
+# `nat run` per task as before (useful for comparison and debugging).
+NEMO_WORKER_MODE = os.getenv("NEMO_WORKER_MODE", "pool")
+
+worker_pool = NemoWorkerPool(NEMO_CONFIG_FILE) if NEMO_WORKER_MODE == "pool" else None
+
+@on_boot
+async def start_workers():
+    if worker_pool is not None:
+        await worker_pool.start()
+
+async def run_in_subprocess(payload: str):
+    cmd = ["nat", "run", "--config_file", NEMO_CONFIG_FILE, "--input", payload]
     proc = await asyncio.create_subprocess_exec(*cmd)
     await proc.wait()
+
+@on_task
+async def my_agent_handler(task: Task):
+    payload = json.dumps({"xpander_task_id": task.id})
+    try:
+        if worker_pool is not None:
+            await worker_pool.submit(payload)
+        else:
+            await run_in_subprocess(payload)
+    except Exception as e:
+        logger.error(f"NeMo workflow failed for task {task.id}: {e}")
     await task.areload()
     return task
@@ -1,3 +1,6 @@
+import inspect
+import time
+from collections import deque
 from textwrap import dedent
 from dotenv import load_dotenv
 load_dotenv()
@@ -11,14 +14,55 @@ from nat.data_models.function import FunctionBaseConfig
 from nat.data_models.component_ref import FunctionRef
 
 
-from xpander_sdk import Backend, OutputFormat, Tokens
+from xpander_sdk import Backend, OutputFormat
 from pydantic import BaseModel, Field
 from agno.agent import Agent
 from loguru import logger
 
+from compaction import compact_results
+from search_fanout import fan_out_search, parse_search_terms, tool_search
+from task_metrics import TaskMetrics
+
+# agno 1.x emits "RunResponseContent", agno 2.x "RunContent"
+CONTENT_EVENTS = {"RunResponseContent", "RunContent"}
+
+# Latency of recent runs, for benchmarks running the workflow in-process
+pipeline_timings = deque(maxlen=1000)
+
 class XpanderAgentConfig(FunctionBaseConfig, name="xpander_nemo_agent"):
     llm_name: LLMRef
     tools: list[FunctionRef] = Field(..., description="The tools to use for the financial research and planner agents.")
+    streaming: bool = Field(True, description="Save the plan to the task while the planner generates it.")
+    flush_interval: float = Field(0.5, description="Minimum seconds between partial result saves while streaming.")
+    search_terms: int = Field(3, description="Number of search terms the researcher generates.")
+    search_concurrency: int = Field(3, description="Maximum searches running at once.")
+    max_results: int = Field(10, description="Unique search results passed to the planner.")
+    research_token_budget: int = Field(1500, description="Maximum tokens of research placed in the planner prompt.")
+
+async def astream_content(agent: Agent, message: str):
+    """Yield content chunks of an agent run as the model produces them."""
+    stream = agent.arun(message, stream=True)
+    if inspect.isawaitable(stream):  # agno 1.x returns the iterator from a coroutine
+        stream = await stream
+    async for event in stream:
+        if getattr(event, "event", None) in CONTENT_EVENTS and isinstance(event.content, str):
+            yield event.content
+
+def last_run_response(agent: Agent):
+    """The completed run of ``agent``, including metrics collected while streaming."""
+    if hasattr(agent, "get_last_run_output"):
+        return agent.get_last_run_output()
+    return agent.run_response
+
+def build_planner_input(inputs: str, research) -> str:
+    return f"""
+                User query: {inputs}
+
+                Research results:
+                {research}
+
+                Based on the above information, please create a personalized financial plan.
+                """
 
 @register_function(config_type=XpanderAgentConfig, framework_wrappers=[LLMFrameworkEnum.AGNO])
 async def xpander_nemo_agent_function(config: XpanderAgentConfig, builder: Builder):
@@ -29,8 +73,8 @@ async def xpander_nemo_agent_function(config: XpanderAgentConfig, builder: Build
             # Load NeMo LLM Gateway
             llm = await builder.get_llm(config.llm_name, wrapper_type=LLMFrameworkEnum.AGNO)
             
-             # Get the search tool
-            tools = builder.get_tools(tool_names=config.tools, wrapper_type=LLMFrameworkEnum.AGNO)
+            # Get the search tools; queries are run by the fan-out stage, not by the model
+            searches = {str(name): tool_search(await builder.get_function(name)) for name in config.tools}
             
             # Load xpander backend
             backend = Backend()
@@ -65,34 +109,77 @@ async def xpander_nemo_agent_function(config: XpanderAgentConfig, builder: Build
                 description=dedent("""\
                 You are a world-class financial researcher. Given a user's financial goals and current financial situation,
                 generate a list of search terms for finding relevant financial advice, investment opportunities, and savings
-                strategies. Then search the web for each term, analyze the results, and return the 10 most relevant results.
+                strategies.
                 """),
                 instructions=[
-                    "Given a user's financial goals and current financial situation, first generate a list of 3 search terms "
-                    "related to those goals.",
-                    "For each search term, use the web_search_tool function to search the internet for information.",
-                    "From the results of all searches, return the 10 most relevant results to the user's preferences.",
-                    "Remember: the quality of the results is important.",
+                    "Given a user's financial goals and current financial situation, generate a list of "
+                    f"{config.search_terms} search terms related to those goals.",
+                    "Reply with the search terms only, one per line, without numbering or commentary.",
+                    "Remember: the quality of the search terms is important.",
                 ],
-                tools=tools,
                 add_datetime_to_instructions=True,
             )
             
-            # First, use the researcher to gather relevant financial information
+            # Structured output is only valid once complete, so it is never streamed
+            streaming = config.streaming and task.output_format != OutputFormat.Json
+            metrics = TaskMetrics()
+            started = time.perf_counter()
+            first_token_at = None
+
+            # First, use the researcher to pick search terms, then run all searches at once.
+            # The planner needs the complete research, so only its output is streamed.
             researcher_response = await researcher.arun(task.to_message(), stream=False)
-            
-            # Combine the original input with the research results for the planner
-            planner_input = f"""
-                User query: {inputs}
+            metrics.record("researcher", researcher_response, time.perf_counter() - started)
+            queries = parse_search_terms(researcher_response.content, limit=config.search_terms) or [inputs]
+            results, search_stats = await fan_out_search(searches, queries, concurrency=config.search_concurrency,
+                                                         limit=None)
+            metrics.add_step("search", seconds=search_stats['seconds'], tools=[
+                {"name": call["tool"], "seconds": call["seconds"], "error": call["error"]}
+                for call in search_stats['calls']
+            ])
+            logger.info(f"🔎 {search_stats['searches']} searches in {search_stats['seconds']:.2f}s: "
+                        f"{search_stats['raw_results']} results, {search_stats['unique_results']} unique")
 
-                Research results:
-                {researcher_response}
+            # Compact the results to a token budget before they reach the planner
+            research, compaction = compact_results(results, max_results=config.max_results,
+                                                   token_budget=config.research_token_budget)
+            research_tokens_saved = max(compaction['uncompacted_tokens'] - compaction['tokens'], 0)
+            metrics.add_step("compaction", tokens_saved=research_tokens_saved)
+            logger.info(f"🗜️ Research compacted to {compaction['tokens']} tokens: kept {compaction['kept']}, "
+                        f"dropped {compaction['duplicates']} near-duplicates and {compaction['over_budget']} over budget")
+            research_done_at = time.perf_counter()
 
-                Based on the above information, please create a personalized financial plan.
-                """
-            
-            # Now run the planner with the research results
-            planner_response = await planner.arun(message=planner_input)
+            if streaming:
+                # Planner tokens are flushed to the task while it writes
+                plan_chunks = []
+                last_flush = time.perf_counter()
+                async for chunk in astream_content(planner, build_planner_input(inputs, research)):
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    plan_chunks.append(chunk)
+                    if time.perf_counter() - last_flush >= config.flush_interval:
+                        task.result = "".join(plan_chunks)
+                        await task.asave()
+                        last_flush = time.perf_counter()
+                planner_response = last_run_response(planner)
+                if not planner_response.content:
+                    planner_response.content = "".join(plan_chunks)
+            else:
+                # Now run the planner with the research results
+                planner_response = await planner.arun(message=build_planner_input(inputs, research))
+                first_token_at = time.perf_counter()
+
+            finished = time.perf_counter()
+            metrics.record("planner", planner_response, finished - research_done_at)
+            timings = {
+                "mode": "streaming" if streaming else "batch",
+                "research_seconds": research_done_at - started,
+                "time_to_first_token": first_token_at - started if first_token_at else None,
+                "end_to_end_seconds": finished - started,
+            }
+            pipeline_timings.append(timings)
+            logger.info(f"⏱️ {timings['mode']} pipeline: research {timings['research_seconds']:.2f}s, "
+                        f"first token {timings['time_to_first_token'] or 0:.2f}s, total {timings['end_to_end_seconds']:.2f}s")
             
             # in case of structured output, return as stringified json
             if task.output_format == OutputFormat.Json and isinstance(planner_response.content, BaseModel):
@@ -101,8 +188,7 @@ async def xpander_nemo_agent_function(config: XpanderAgentConfig, builder: Build
             task.result = planner_response.content
             
             # report execution metrics
-            task.tokens = Tokens(prompt_tokens=sum(planner_response.metrics['input_tokens']),completion_tokens=sum(planner_response.metrics['completion_tokens']))
-            task.used_tools = [tool.tool_name for tool in planner_response.tools]
+            timings["research_tokens_saved"] = metrics.apply(task)["tokens_saved"]
             
             # save changes
             await task.asave()